@@ -8,111 +8,115 @@
 import os
 import pandas as pd
 import argparse
-from collections import defaultdict
+import io
+import time
+from collections import defaultdict, namedtuple
+from itertools import chain
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm 
 from speaker_metadata_checks import check_speaker_metadata
-
-# Error codes as specified
-ERROR_CODES = {
-    'State or district mismatch': 'SPK-E12',
-    'Filename contains space': 'SPK-E13',
-    'Incorrect number of underscores': 'SPK-E14',
-    'Image district mismatch': 'SPK-E15',
-    'Incorrect number of underscores in .txt': 'SPK-E16',
-    'Repeated speaker ID': 'SPK-E17',
-    'Repeated utterance ID': 'SPK-E18',
-    'TSV file does not end with newline': 'SPK-E19',
-    'Unicode character in TSV file': 'SPK-E20',
-    'Mismatched Speaker ID from the meta-data': 'SPK-E21',
-    'Speaker_ID not found in meta-data': 'SPK-E22',
-    'No .txt file found (meta-data)': 'SPK-E23',
-    'Non-numeric uttID': 'SPK-E24',
-    'Not Present in database of images': 'SPK-E25',
-    'Incorrect Audio Extension not .wav': 'SPK-E26',
-    'Total duration out of range': 'SPK-E27',
-    'Exception occurred': 'SPK-E99' 
+from folder_scanner import build_speaker_folder, list_speaker_locations, location_relative_path, scan_locations
+from manifest import load_manifest
+from phase1_index import load_phase1_id_sets
+from id_store import IdSet
+from tsv_inspector import inspect_tsv
+from image_catalog import ImageCatalog
+from filename_grammar import (AUDIO_EXTENSIONS, NAMED_EXTENSIONS, SPACE_RULE, UNDERSCORE_RULE,
+                              IMAGE_DISTRICT_RULE, TXT_UNDERSCORE_RULE, STATE_DISTRICT_RULE, UTT_ID_RULE,
+                              AUDIO_EXTENSION_RULE, parse_filename, name_rule_violations)
+from segment_timeline import build_timeline, check_timeline
+from charset_rules import ISSUES, WRONG_SCRIPT, CONTROL_CHARACTER, MISPLACED_JOINER, script_for, describe
+from wav_inspector import WavSpec, WavHeaderError, inspect_wav, matches_spec
+from results_cache import open_results_cache, context_fingerprint, folder_fingerprint, file_version, get_cached_result, store_result
+import profiling
+from report_sink import ReportSink, SPILL_ROWS
+from prefetch import PREFETCH_BYTES, iter_prefetched, prefetch_folder
+from audio_fingerprint import (fingerprint_wav, open_fingerprint_index, update_fingerprint_index, add_phase2_fingerprints,
+                               clear_phase2_fingerprints, find_phase1_duplicates)
+from checkpoint import CheckpointWriter, resumable_records, replay_records, record_partials
+from shards import parse_shard, shard_of, shard_output_path, write_shard, open_shards, iter_merged_records
+from error_codes import ERROR_CODES
+
+# Naming rules reported together with the TSV format findings, in this order
+FORMAT_RULES = (SPACE_RULE, UNDERSCORE_RULE, IMAGE_DISTRICT_RULE, TXT_UNDERSCORE_RULE)
+
+# Reports written by write_batch_reports(); the first one is only written when it has rows
+REPORT_FILES = ('speaker_metadata_preinitial_checks_report.tsv', 'speaker_metadata_df_extras.csv', 'speaker_metadata_flagged.csv',
+                'Error_files.tsv')
+
+# Findings of the character-set scan of the segment TSVs (--check_charset), by issue
+CHARSET_FINDINGS = {
+    WRONG_SCRIPT: 'Character outside the language script in TSV file',
+    CONTROL_CHARACTER: 'Control character in TSV file',
+    MISPLACED_JOINER: 'Misplaced zero-width joiner in TSV file',
 }
 
-def get_duration(file, file_path):
+# Segment end times may overshoot the audio by this many seconds before SPK-E31 is raised
+SEGMENT_END_TOLERANCE = 0.05
+
+# What the checks of one speaker folder record
+FolderState = namedtuple('FolderState', ['log_entries', 'd1', 'd2', 'd3', 'd4', 'file_image_mapping', 'speaker_ids_phase2',
+                                         'utt_ids_phase2', 'wav_fingerprints'])
+# What the folders' partial results are merged into, together with the findings of the batch-wide checks
+BatchState = namedtuple('BatchState', ['log_entries', 'd1', 'd2', 'd3', 'd4', 'file_image_mapping'])
+
+def get_duration(state, file, file_path, inspection=None):
     duration_sum = 0
     try:
         if file.endswith('.tsv'):
             try:
-                df = pd.read_csv(file_path, sep='\t', header=None)
-                
-                if df.empty:
-                    raise ValueError("The file is empty")
+                if inspection is None:
+                    inspection = inspect_tsv(file_path, [])
+                if inspection.parse_error is not None:
+                    raise inspection.parse_error
                 
                 # Calculate the total duration for the current file
-                duration_sum = (df.iloc[:, 4] - df.iloc[:, 3]).sum()
+                duration_sum = (inspection.ends - inspection.starts).sum()
                 #print(file_path, duration_sum)
                 duration_sum
             
             except ValueError as e:
                 print(f"Skipping file {file_path} as it is empty: {e}")
-                log_exception(log_entries, file, e)
+                log_exception(state.log_entries, file, e)
             except Exception as e:
                 print(f"An error occurred with file {file_path}: {e}")
-                log_exception(log_entries, file, e)
+                log_exception(state.log_entries, file, e)
     except Exception as e:
         print(f"Error calculating total duration in {file_path}: {e}")
-        log_exception(log_entries, file, e)
+        log_exception(state.log_entries, file, e)
     
     # Convert total duration from seconds to hours
     return duration_sum / 3600
 
-def questions_regarding_audio_tsv_formats(file_path, filename, unicode_chars):
+def check_tsv_content(state, file_path, filename, unicode_chars, inspection=None):
     entries = defaultdict(list)
     try:
         base_name = os.path.basename(file_path)
 
-        if filename.endswith('.wav') or filename.endswith('.tsv'):
-            if ' ' in filename:
-                entries[base_name].append(ERROR_CODES['Filename contains space'])
-
-            underscore_count = filename.count('_')
-            if underscore_count != 5:
-                entries[base_name].append(ERROR_CODES['Incorrect number of underscores'])
-
-            img = filename.split('_')[4]
-            img_district = img.split('-')[0]
-            district = filename.split('_')[1]
-
-            if '-' in img and img_district != district:
-                entries[base_name].append(ERROR_CODES['Image district mismatch'])
-
-        if filename.endswith('.txt'):
-            underscore_count = filename.count('_')
-            if underscore_count != 2:
-                entries[base_name].append(ERROR_CODES['Incorrect number of underscores in .txt'])
-
         if filename.endswith('.tsv'):
-            try:
-                with open(file_path, 'rb') as file:
-                    file.seek(-1, os.SEEK_END)
-                    last_char = file.read(1)
-                    if last_char != b'\n':
-                        entries[base_name].append(ERROR_CODES['TSV file does not end with newline'])
-            except Exception as e:
-                print(f"Error reading last character of TSV file {file_path}: {e}")
-                log_exception(log_entries, filename, e)
+            if inspection is None:
+                inspection = inspect_tsv(file_path, unicode_chars)
 
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                    for char in unicode_chars:
-                        if char in content:
-                            entries[base_name].append(ERROR_CODES['Unicode character in TSV file'])
-            except Exception as e:
-                print(f"Error reading TSV file {file_path}: {e}")
-                log_exception(log_entries, filename, e)
+            if inspection.read_error is not None:
+                print(f"Error reading TSV file {file_path}: {inspection.read_error}")
+                log_exception(state.log_entries, filename, inspection.read_error)
+            else:
+                if not inspection.ends_with_newline:
+                    entries[base_name].append(ERROR_CODES['TSV file does not end with newline'])
+                for char in inspection.found_chars:
+                    entries[base_name].append(ERROR_CODES['Unicode character in TSV file'])
+                # The offending codepoints and their 0-based lines are reported with the code
+                charset_issues = inspection.charset_issues or {}
+                for issue in [issue for issue in ISSUES if issue in charset_issues]:
+                    entries[base_name].append(f"{ERROR_CODES[CHARSET_FINDINGS[issue]]}: {describe(*charset_issues[issue])}")
     except Exception as e:
         print(f"Error processing formats in file {filename}: {e}")
-        log_exception(log_entries, filename, e)
+        log_exception(state.log_entries, filename, e)
 
     return entries
 
-def extract_state_district_names_from_txt_file(txt_file_path):
+def extract_state_district_names_from_txt_file(txt_file_path, log_entries):
     try:
         state_district_data = pd.read_csv(txt_file_path, sep='\t', header=None, names=['State', 'District'])
         unique_states = set(state_district_data['State'].unique())
@@ -123,64 +127,47 @@ def extract_state_district_names_from_txt_file(txt_file_path):
         log_exception(log_entries, os.path.basename(txt_file_path), e)
     return set(), set()
 
-def compare_state_district_names(filename, txt_unique_states, txt_unique_districts):
-    unique_states = set()
-    unique_districts = set()
-    mismatched_filenames = []
-
-    try:
-        if filename.endswith(('.wav', '.tsv', '.txt')):
-            state = filename.split('_')[0]
-            district = filename.split('_')[1]
-            unique_states.add(state)
-            unique_districts.add(district)
-            state_match = state in txt_unique_states
-            district_match = district in txt_unique_districts
-            if not state_match or not district_match:
-                mismatched_filenames.append(filename)
-    except Exception as e:
-        print(f"Error extracting state and district names from TXT for file {filename}: {e}")
-        log_exception(log_entries, filename, e)
-
-    return mismatched_filenames
-
-def verify_speaker_id_in_filenames(file_name, speaker_id):
+def verify_speaker_id_in_filenames(state, file_name, speaker_id):
     issues = defaultdict(list)
     try:
-        if file_name.endswith(('.wav', '.tsv', '.txt')):
-            file_speaker_id = (file_name.split('_')[2]).split('.')[0]
+        name = parse_filename(file_name)
+        if name.ext in NAMED_EXTENSIONS:
+            file_speaker_id = name.speaker.split('.')[0] if name.speaker is not None else None
             if file_speaker_id != speaker_id:
                 issues[file_name].append(ERROR_CODES['Mismatched Speaker ID from the meta-data'])
     except Exception as e:
         print(f"Error verifying speaker ID in file {file_name}: {e}")
-        log_exception(log_entries, file_name, e)
+        log_exception(state.log_entries, file_name, e)
     return issues
 
-def extract_speaker_id_from_file(file_path):
+def extract_speaker_id_from_file(state, file_path, data=None):
     try:
-        with open(file_path, 'r') as file:
+        # data holds the file's bytes when they were read ahead
+        with (open(file_path, 'r') if data is None else io.TextIOWrapper(io.BytesIO(data))) as file:
             for line in file:
                 if line.startswith("Speaker_ID:"):
                     return line.split(":")[1].strip()
     except Exception as e:
         print(f"Error extracting speaker ID from file {file_path}: {e}")
-        log_exception(log_entries, os.path.basename(file_path), e)
+        log_exception(state.log_entries, os.path.basename(file_path), e)
     return None
 
-def process_folders(folder_path, folder):
+def process_folders(state, speaker_folder, contents=None):
     issues = defaultdict(list)
+    folder_path = speaker_folder.path
+    file_name = folder_path
     try:
         txt_file_path = None
 
-        for file_name in os.listdir(folder_path):
-            if file_name.endswith(".txt"):
-                txt_file_path = os.path.join(folder_path, file_name)
-                break
+        text_files = speaker_folder.by_ext.get('.txt', ())
+        if text_files:
+            file_name = text_files[0]
+            txt_file_path = os.path.join(folder_path, file_name)
 
         if txt_file_path:
-            speaker_id = extract_speaker_id_from_file(txt_file_path)
+            speaker_id = extract_speaker_id_from_file(state, txt_file_path, (contents or {}).get(file_name))
             if speaker_id:
-                speaker_id_issues = verify_speaker_id_in_filenames(folder_path, speaker_id)
+                speaker_id_issues = verify_speaker_id_in_filenames(state, folder_path, speaker_id)
                 for file, error_list in speaker_id_issues.items():
                     issues[file].extend(error_list)
             else:
@@ -188,166 +175,78 @@ def process_folders(folder_path, folder):
         else:
             issues[folder_path].append(ERROR_CODES['No .txt file found (meta-data)'])
     except Exception as e:
-        print(f"Error processing file {file_name} for folders in {folder}: {e}")
-        log_exception(log_entries, file_name, e)
-    return issues
-
-def is_numeric(s):
-    try:
-        float(s)
-        return True
-    except ValueError:
-        return False
-
-def check_uttID_in_folder(file):
-    issues = defaultdict(list)
-    try:
-        if file.endswith(('.tsv', '.wav')):
-            filename_parts = file.split('_')
-            if len(filename_parts) > 3:
-                uttID = filename_parts[3]
-                if not is_numeric(uttID):
-                    issues[file].append(ERROR_CODES['Non-numeric uttID'])
-    except Exception as e:
-        print(f"Error checking uttID in file {file}: {e}")
-        log_exception(log_entries, file, e)
-    return issues
-
-def check_audio_extensions(file):
-    issues = defaultdict(list)
-    try:
-        if file.lower().endswith(('.mp3', '.flac', '.aac', '.ogg', '.wma', '.alac')):
-            issues[file].append(ERROR_CODES['Incorrect Audio Extension not .wav'])
-    except Exception as e:
-        print(f"Error checking audio extensions in file {file}: {e}")
-        log_exception(log_entries, file, e)
+        print(f"Error processing file {file_name} for folders in {speaker_folder.speaker}: {e}")
+        log_exception(state.log_entries, file_name, e)
     return issues
 
-def extract_image_id(filename):
-    parts = filename.split('_')
-    image_id = (('_'.join(parts[4:6])).split('.')[0]) + '.jpg'
-    return image_id
-
-def file_to_image_mapping(file, file_image_mapping):
-    try:
-        if file.endswith(('.tsv', '.wav')):
-            image_id = extract_image_id(file)
-            file_image_mapping[file] = image_id
-    except Exception as e:
-        print(f"Error processing file {file}: {e}")
-        log_exception(log_entries, file, e)
-    return file_image_mapping
-
-def check_image_ids_in_csv(image_ids, xls_file):
+def load_image_catalog(xls_file, log_entries, cache_path=None):
     try:
-        # Read both sheets from the Excel file
-        district_specific_df = pd.read_excel(xls_file, sheet_name='DistrictSpecificImages')
-        generic_images_df = pd.read_excel(xls_file, sheet_name='GenericImages')
-
-        #print(district_specific_df)
-        # Combine the 'Filename' columns from both sheets
-        combined_filenames = set(district_specific_df['Filename']).union(set(generic_images_df['Filename']))
-        # print(combined_filenames)
-        # Check for image ID presence in the combined set of filenames
-        image_id_presence = {image_id: (image_id in combined_filenames) for image_id in image_ids}
-        
-        return image_id_presence
+        return ImageCatalog.load(xls_file, cache_path)
     except Exception as e:
-        print(f"Error checking image IDs in CSV file {xls_file}: {e}")
+        print(f"Error loading the image catalog from {xls_file}: {e}")
         log_exception(log_entries, xls_file, e)
-    return {}
-
-def check_for_repeats_in_tsv(folder_path_phase1):
-    speaker_utt_pairs_phase1 = set()
-    try:
-        file_paths = []
-        for root, dirs, files in os.walk(folder_path_phase1):
-            for file in files:
-                file_paths.append(os.path.join(root, file))
-        
-        for idx, file_path in tqdm(enumerate(file_paths), total=len(file_paths), desc="Processing TSV files"):
-            file_name = os.path.basename(file_path)
-            
-            try:
-                df = pd.read_csv(file_path, sep='\t', chunksize=100000)
-                for chunk in df:
-                    for _, row in chunk.iterrows():
-                        first_column = row.iloc[0]
-                        if isinstance(first_column, str) and first_column.startswith('/'):
-                            basename = os.path.basename(first_column)
-                            parts = basename.split("_")
-                            if len(parts) >= 4:
-                                speakerid = parts[2]
-                                uttid = parts[3]
-                                speaker_utt_pairs_phase1.add((speakerid, uttid))
-            except Exception as e:
-                print(f"Skipping file {file_name} in TSV check: {e}")
-                log_exception(log_entries, file_name, e)
-    except Exception as e:
-        print(f"Error checking for repeats in TSV folder {folder_path_phase1} and file {file_name}: {e}")
-        log_exception(log_entries, file_name, e)
-    
-    return speaker_utt_pairs_phase1
+    return None
 
-def extract_speakerid_uttid(filename):
-    parts = filename.split('_')
-    speaker_id = parts[2]
-    utt_id = parts[3]
-    return speaker_id, utt_id
+def check_image_ids_in_csv(file_image_mapping, catalog):
+    """Return the files whose image ID is missing from the catalog, looked up in one batch."""
+    files = list(file_image_mapping)
+    image_id_presence = catalog.contains(file_image_mapping[file] for file in files)
+    return [file for file, present in zip(files, image_id_presence) if not present]
 
-def add_spk_utt_ids(filename):
+def check_for_repeats_in_tsv(folder_path_phase1, index_path, log_entries):
+    """Return (speaker_ids, utt_ids, pair_count) of Phase 1, with empty IdSets if the index cannot be loaded."""
+    phase1_ids = IdSet(), IdSet(), 0
     try:
-        if filename.endswith('.wav'):
-            speaker_id, utt_id = extract_speakerid_uttid(filename)
-            speaker_ids_phase2.add(speaker_id)
-            utt_ids_phase2.add(utt_id)
-
+        speaker_ids, utt_ids, pair_count, errors = load_phase1_id_sets(folder_path_phase1, index_path)
+        phase1_ids = speaker_ids, utt_ids, pair_count
+        for file_name, e in errors:
+            print(f"Skipping file {file_name} in TSV check: {e}")
+            log_exception(log_entries, file_name, e)
     except Exception as e:
-        print(f"Error checking for repeats in file {filename}: {e}")
-        log_exception(log_entries, filename, e)
+        print(f"Error checking for repeats in TSV folder {folder_path_phase1}: {e}")
+        log_exception(log_entries, folder_path_phase1, e)
+    
+    return phase1_ids
 
-def run_pipeline(district_folder, speaker_folder):
+def run_pipeline(state, speaker_folder):
     
     #print("run_pipeline", speaker_folder)
-    all_files = os.listdir(speaker_folder)
-    text_files = [file for file in all_files if file.endswith('.txt')]
-    wav_files = [file for file in all_files if file.endswith('.wav')]
-    tsv_files = [file for file in all_files if file.endswith('.tsv')]
+    text_files = speaker_folder.by_ext.get('.txt', ())
+    wav_files = speaker_folder.by_ext.get('.wav', ())
+    tsv_files = speaker_folder.by_ext.get('.tsv', ())
+    i = '/'.join(speaker_folder.district_path.split('/')[-4:])
+    s = '/'.join(speaker_folder.path.split('/')[-5:])
 
     if len(text_files) == 1:
-        fp = os.path.join(speaker_folder, text_files[0])
-        pdf_path = os.path.join(speaker_folder, text_files[0].replace('.txt', '.pdf'))
+        fp = os.path.join(speaker_folder.path, text_files[0])
+        pdf_name = text_files[0].replace('.txt', '.pdf')
         log_error = check_speaker_metadata(fp)
-        i = '/'.join(district_folder.split('/')[-4:])
-        s = '/'.join(speaker_folder.split('/')[-5:])
-        d2.append([i, s, log_error[1]])
-        d3.append([i, s, log_error[2]])
-        if os.path.isfile(pdf_path):
-            d4.append([i, s, True])
+        state.d2.append([i, s, log_error[1]])
+        state.d3.append([i, s, log_error[2]])
+        if pdf_name in speaker_folder.by_ext.get('.pdf', ()):
+            state.d4.append([i, s, True])
         else:
             log_error[0].append('Error: (PDF-E1)')
-            d4.append([i, s, False])
+            state.d4.append([i, s, False])
         if len(wav_files) < 1:
             log_error[0].append('Error: (WAV-E1)')
         if len(tsv_files) < 1:
             log_error[0].append('Error: (TSV-E1)')
         if len(log_error[0]) != 0:
-            d1.append([i, s, log_error[0]])
+            state.d1.append([i, s, log_error[0]])
     else:
-        i = '/'.join(i.split('/')[-4:])
-        s = '/'.join(s.split('/')[-5:])
         er_ = ['Error: (TXT-E1)']
         if len(wav_files) < 1:
             er_.append('Error: (WAV-E1)')
         if len(tsv_files) < 1:
             er_.append('Error: (TSV-E1)')
-        d1.append([i, s, er_])
+        state.d1.append([i, s, er_])
 
-def save_to_csv_run_pipeline(output_path):
-    df1 = pd.DataFrame(d1)
-    df2 = pd.DataFrame(d2)
-    df3 = pd.DataFrame(d3)
-    df4 = pd.DataFrame(d4)
+def save_to_csv_run_pipeline(batch, output_path):
+    df1 = pd.DataFrame(batch.d1)
+    df2 = pd.DataFrame(batch.d2)
+    df3 = pd.DataFrame(batch.d3)
+    df4 = pd.DataFrame(batch.d4)
     
     column_name = 2
     expanded_df = pd.json_normalize(df3[column_name])
@@ -378,6 +277,456 @@ def save_to_csv_run_pipeline(output_path):
 def log_exception(log_entries, file_path, e):
     log_entries[file_path].append(f"{ERROR_CODES['Exception occurred']}: {str(e)}")
 
+def fingerprint_phase2_wav(state, file, file_path):
+    try:
+        return fingerprint_wav(file_path)
+    except WavHeaderError as e:
+        # Without a valid header there are no samples to compare; --check_wav_headers reports it as SPK-E28
+        print(f"Cannot fingerprint {file_path}: {e}")
+    except Exception as e:
+        print(f"Error fingerprinting {file_path}: {e}")
+        log_exception(state.log_entries, file, e)
+    return None
+
+def check_wav_header(state, file, file_path, wav_spec):
+    issues = defaultdict(list)
+    info = None
+    try:
+        info = inspect_wav(file_path)
+        if info.truncated:
+            issues[file].append(ERROR_CODES['WAV data chunk truncated'])
+        if not matches_spec(info, wav_spec):
+            issues[file].append(ERROR_CODES['WAV format not as specified'])
+    except WavHeaderError as e:
+        print(f"Invalid WAV header in {file_path}: {e}")
+        issues[file].append(ERROR_CODES['Invalid WAV header'])
+    except Exception as e:
+        print(f"Error reading WAV header of {file_path}: {e}")
+        log_exception(state.log_entries, file, e)
+    return info, issues
+
+def reconcile_segments_with_audio(tsv_segment_ends, wav_durations):
+    """Flag segment TSVs whose last segment ends after the real length of the matching .wav."""
+    issues = defaultdict(list)
+    for stem, (file, segment_end) in tsv_segment_ends.items():
+        audio_duration = wav_durations.get(stem)
+        if audio_duration is not None and segment_end > audio_duration + SEGMENT_END_TOLERANCE:
+            issues[file].append(ERROR_CODES['TSV segment ends after the audio'])
+    return issues
+
+def check_segment_timelines(state, segment_files, segment_tables):
+    """Check the segment timelines of a folder's TSVs together and return their corrected duration in hours."""
+    issues = check_timeline(build_timeline(segment_tables), len(segment_files))
+    for name, flags in (('Negative segment duration', issues.negative), ('Overlapping segments', issues.overlapping),
+                        ('Segments out of order', issues.out_of_order)):
+        for file in [file for file, flagged in zip(segment_files, flags) if flagged]:
+            state.log_entries[file].append(ERROR_CODES[name])
+    return issues.covered_seconds.sum() / 3600
+
+def check_speaker_folder(state, speaker_folder, txt_unique_states, txt_unique_districts, unicode_characters_to_check, wav_spec=None,
+                         fingerprint_audio=False, segment_timeline=False, check_charset=False, contents=None):
+    """Run every check on one speaker folder, recording findings in state (a FolderState).
+
+    Returns (durations, timeline_hours): the per-file durations (in hours) in
+    listing order so the caller can add them to the batch total in the same
+    order as a serial run, and with segment_timeline the folder's corrected
+    duration (None otherwise). WAV headers are only inspected when a wav_spec
+    is given, and the audio of the .wav files is only fingerprinted with
+    fingerprint_audio. With check_charset the segment TSVs are scanned against
+    the script of the state/district in their names. contents maps file names
+    to bytes already read by the prefetcher; other files are read here.
+    """
+    contents = contents or {}
+    durations = []
+    wav_durations = {}
+    tsv_segment_ends = {}
+    segment_files, segment_tables = [], []
+
+    speaker_id_issues = process_folders(state, speaker_folder, contents)
+    for file, error_list in speaker_id_issues.items():
+        state.log_entries[file].extend(error_list)
+
+    run_pipeline(state, speaker_folder)
+
+    for entry in speaker_folder.files:
+        file = entry.name
+        file_path = os.path.join(speaker_folder.path, file)
+        try:
+            # Parse the name once and share it between the naming rules and the charset lookup
+            name = parse_filename(file)
+            broken_rules = name_rule_violations(name, txt_unique_states, txt_unique_districts)
+
+            # Read each TSV once and share the result between the duration and format checks
+            inspection = None
+            if file.endswith('.tsv'):
+                charset_script = script_for(name.state, name.district) if check_charset else None
+                inspection = inspect_tsv(file_path, unicode_characters_to_check, contents.get(file), charset_script)
+
+            total_duration_hours = get_duration(state, file, file_path, inspection)
+            durations.append(total_duration_hours)
+            if segment_timeline and inspection is not None and inspection.parse_error is None:
+                segment_files.append(file)
+                segment_tables.append((inspection.starts, inspection.ends))
+
+            for rule in FORMAT_RULES:
+                if rule in broken_rules:
+                    state.log_entries[file].append(ERROR_CODES[rule])
+
+            content_issues = check_tsv_content(state, file_path, file, unicode_characters_to_check, inspection)
+            for file, issues in content_issues.items():
+                state.log_entries[file].extend(issues)
+
+            if wav_spec is not None:
+                stem = os.path.splitext(file)[0]
+                if file.endswith('.wav'):
+                    info, wav_issues = check_wav_header(state, file, file_path, wav_spec)
+                    for file, error_list in wav_issues.items():
+                        state.log_entries[file].extend(error_list)
+                    if info is not None:
+                        wav_durations[stem] = info.duration
+                elif inspection is not None and inspection.parse_error is None:
+                    tsv_segment_ends[stem] = (file, float(inspection.ends.max()))
+
+            if fingerprint_audio and file.endswith('.wav'):
+                fingerprint = fingerprint_phase2_wav(state, file, file_path)
+                if fingerprint is not None:
+                    state.wav_fingerprints[file] = fingerprint
+
+            if STATE_DISTRICT_RULE in broken_rules:
+                state.log_entries[file].append(ERROR_CODES[STATE_DISTRICT_RULE])
+
+            if name.ext == '.wav' and name.speaker is not None and name.utt is not None:
+                state.speaker_ids_phase2.add(name.speaker)
+                state.utt_ids_phase2.add(name.utt)
+
+            for rule in (UTT_ID_RULE, AUDIO_EXTENSION_RULE):
+                if rule in broken_rules:
+                    state.log_entries[file].append(ERROR_CODES[rule])
+
+            if name.ext in AUDIO_EXTENSIONS:
+                state.file_image_mapping[file] = name.image_id
+
+        except Exception as e:
+            log_exception(state.log_entries, speaker_folder.district_path, e)
+
+    for file, error_list in reconcile_segments_with_audio(tsv_segment_ends, wav_durations).items():
+        state.log_entries[file].extend(error_list)
+
+    timeline_hours = None
+    if segment_timeline:
+        try:
+            timeline_hours = check_segment_timelines(state, segment_files, segment_tables)
+        except Exception as e:
+            log_exception(state.log_entries, speaker_folder.district_path, e)
+
+    return durations, timeline_hours
+
+def new_folder_state():
+    return FolderState(defaultdict(list), [], [], [], [], {}, set(), set(), {})
+
+def new_batch_state():
+    return BatchState(defaultdict(list), [], [], [], [], {})
+
+def validate_speaker_folder(speaker_folder, context, contents=None):
+    """Check one speaker folder against fresh state and return its partial results.
+
+    Nothing is shared between calls, so this is safe to call from the main
+    process, a pool worker or several threads at once.
+    """
+    state = new_folder_state()
+    durations, timeline_hours = check_speaker_folder(state, speaker_folder, *context, contents=contents)
+    return {
+        'log_entries': dict(state.log_entries),
+        'd1': state.d1, 'd2': state.d2, 'd3': state.d3, 'd4': state.d4,
+        'durations': durations,
+        'timeline_hours': timeline_hours,
+        'file_image_mapping': state.file_image_mapping,
+        'speaker_ids_phase2': state.speaker_ids_phase2,
+        'utt_ids_phase2': state.utt_ids_phase2,
+        'wav_fingerprints': state.wav_fingerprints,
+    }
+
+# Functions timed by --profile, and how to count the bytes each call reads
+PROFILED_CHECKS = (
+    'get_duration', 'check_tsv_content', 'verify_speaker_id_in_filenames', 'extract_speaker_id_from_file', 'process_folders',
+    'run_pipeline', 'check_speaker_metadata', 'check_wav_header', 'reconcile_segments_with_audio', 'check_segment_timelines',
+    'check_speaker_folder', 'inspect_tsv', 'inspect_wav', 'extract_state_district_names_from_txt_file',
+    'check_for_repeats_in_tsv', 'load_image_catalog', 'check_image_ids_in_csv', 'save_to_csv_run_pipeline',
+)
+PROFILED_BYTES = {name: profiling.file_size for name in (
+    'inspect_tsv', 'check_speaker_metadata', 'extract_state_district_names_from_txt_file',
+)}
+PROFILED_BYTES['extract_speaker_id_from_file'] = lambda state, file_path, *args, **kwargs: profiling.file_size(file_path)
+
+def enable_profiling():
+    profiling.enable()
+    profiling.instrument(globals(), PROFILED_CHECKS, PROFILED_BYTES)
+
+def init_worker(context, profile=False, io_threads=1):
+    global worker_context, worker_io
+    worker_context = context
+    # Each worker reads the files of its current folder with its own I/O threads
+    worker_io = ThreadPoolExecutor(io_threads) if io_threads > 1 else None
+    if profile:
+        enable_profiling()
+        # A forked worker starts with a copy of the parent's samples; only report its own
+        profiling.drain()
+
+def validate_speaker_folder_worker(speaker_folder):
+    """Pool entry point for validate_speaker_folder."""
+    contents = prefetch_folder(speaker_folder, worker_io) if worker_io is not None else None
+    partial = validate_speaker_folder(speaker_folder, worker_context, contents)
+    if profiling.enabled:
+        # Hand this worker's timings to the parent, which writes the report
+        partial['profile'] = profiling.drain()
+    return partial
+
+def iter_partial_results(speaker_folders, context, workers, io_threads=1, prefetch_bytes=PREFETCH_BYTES):
+    if workers > 1:
+        with Pool(workers, initializer=init_worker, initargs=(context, profiling.enabled, io_threads)) as pool:
+            # imap keeps the results in submission order, so merging them one
+            # after another reproduces the serial run exactly.
+            yield from pool.imap(validate_speaker_folder_worker, speaker_folders)
+    elif io_threads > 1:
+        for speaker_folder, contents in iter_prefetched(speaker_folders, io_threads, prefetch_bytes):
+            yield validate_speaker_folder(speaker_folder, context, contents)
+    else:
+        for speaker_folder in speaker_folders:
+            yield validate_speaker_folder(speaker_folder, context)
+
+def merge_partial_results(batch, partial):
+    for file, issues in partial['log_entries'].items():
+        batch.log_entries[file].extend(issues)
+    batch.d1.extend(partial['d1'])
+    batch.d2.extend(partial['d2'])
+    batch.d3.extend(partial['d3'])
+    batch.d4.extend(partial['d4'])
+    batch.file_image_mapping.update(partial['file_image_mapping'])
+
+def flush_log_entries(log_entries, sink):
+    """Move the findings collected in log_entries so far to the report sink."""
+    sink.add_entries(log_entries)
+    log_entries.clear()
+
+def load_phase1_ids(args, log_entries):
+    print("Retrieving the Speaker and Utterance Ids for Phase1....")
+    phase1_index_path = args.phase1_index_path or os.path.join(args.output_file_path, 'phase1_speaker_utt_index.sqlite')
+    with profiling.stage('phase1_index'):
+        speaker_ids_phase1, utt_ids_phase1, pair_count = check_for_repeats_in_tsv(args.phase1_tsv_folder, phase1_index_path, log_entries)
+    print(f"Speaker-Utterance pairs Phase 1: {pair_count} pairs found.")
+    return speaker_ids_phase1, utt_ids_phase1
+
+def checks_fingerprint(args, context):
+    """Fingerprint of everything besides a folder's own files that its results depend on."""
+    unicode_characters_to_check, wav_spec, fingerprint_audio, segment_timeline, check_charset = context[2:]
+    code_versions = [file_version(path) for path in (__file__, check_speaker_metadata.__code__.co_filename,
+                                                      inspect_tsv.__code__.co_filename, inspect_wav.__code__.co_filename,
+                                                      parse_filename.__code__.co_filename, fingerprint_wav.__code__.co_filename,
+                                                      check_timeline.__code__.co_filename, script_for.__code__.co_filename)]
+    return context_fingerprint(file_version(args.txt_file_path), file_version(args.xls_file_path),
+                               unicode_characters_to_check, wav_spec, fingerprint_audio, segment_timeline, check_charset, code_versions,
+                               sorted(ERROR_CODES.items()))
+
+def build_context(args, txt_unique_states, txt_unique_districts):
+    unicode_characters_to_check = ['\r']
+    wav_spec = None
+    if args.check_wav_headers:
+        wav_spec = WavSpec(args.wav_sample_rate, args.wav_channels, args.wav_bits_per_sample)
+    # Shard runs fingerprint their Phase 2 audio too; the Phase 1 index is only needed by the merge
+    return (txt_unique_states, txt_unique_districts, unicode_characters_to_check, wav_spec, args.phase1_audio_folder is not None,
+            args.check_segment_timeline, args.check_charset)
+
+def iter_checked_folders(args, speaker_folders, context, context_fp):
+    """Yield the partial results of speaker_folders in order, from the results cache where possible."""
+    cache = None
+    fingerprints = [None] * len(speaker_folders)
+    cached_results = [None] * len(speaker_folders)
+    if not args.no_cache:
+        cache_path = args.cache_path or os.path.join(args.output_file_path, 'speaker_folder_results_cache.sqlite')
+        cache = open_results_cache(cache_path, rebuild=args.rebuild_cache)
+        fingerprints = [folder_fingerprint(speaker_folder, context_fp) for speaker_folder in speaker_folders]
+        cached_results = [get_cached_result(cache, speaker_folder.path, fingerprint)
+                          for speaker_folder, fingerprint in zip(speaker_folders, fingerprints)]
+        reused = sum(partial is not None for partial in cached_results)
+        print(f"Reusing cached results for {reused} of {len(speaker_folders)} speaker folders.")
+
+    pending = [speaker_folder for speaker_folder, partial in zip(speaker_folders, cached_results) if partial is None]
+    fresh_results = iter_partial_results(pending, context, args.workers, args.io_threads, args.prefetch_bytes)
+    try:
+        for speaker_folder, fingerprint, partial in tqdm(zip(speaker_folders, fingerprints, cached_results),
+                                                          total=len(speaker_folders), desc="Processing speaker folders"):
+            if partial is None:
+                partial = next(fresh_results)
+                if 'profile' in partial:
+                    profiling.merge(partial.pop('profile'))
+                if cache is not None:
+                    store_result(cache, speaker_folder.path, fingerprint, partial)
+            yield partial
+    finally:
+        fresh_results.close()
+        if cache is not None:
+            cache.close()
+
+def load_audio_fingerprint_index(args, log_entries):
+    """Open the Phase 1 audio fingerprint index and bring it up to date, or return None without --phase1_audio_folder."""
+    if args.phase1_audio_folder is None:
+        return None
+    print("Fingerprinting the Phase 1 audio....")
+    index_path = args.audio_fingerprint_index or os.path.join(args.output_file_path, 'phase1_audio_fingerprints.sqlite')
+    conn = open_fingerprint_index(index_path)
+    with profiling.stage('phase1_audio_index'):
+        errors = update_fingerprint_index(conn, args.phase1_audio_folder, args.fingerprint_threads)
+    for file_name, e in errors:
+        print(f"Error fingerprinting Phase 1 audio {file_name}: {e}")
+        log_exception(log_entries, file_name, e)
+    return conn
+
+def load_batch_catalog(args, log_entries):
+    image_catalog_cache = args.image_catalog_cache or os.path.join(args.output_file_path, 'image_catalog_cache.json')
+    return load_image_catalog(args.xls_file_path, log_entries, image_catalog_cache)
+
+def write_batch_reports(args, batch, speaker_ids_phase1, utt_ids_phase1, catalog, partials, fingerprint_index=None, output_path=None):
+    """Merge the per-folder partial results into batch, run the batch-wide checks and write the reports to output_path."""
+    output_path = output_path or args.output_file_path
+    log_entries = batch.log_entries
+    # Findings go to disk as they arrive; log_entries only ever holds one folder's worth
+    sink = ReportSink(args.report_spill_dir, args.report_buffer_rows)
+    # The spill folder and its run files are removed however the batch checks end
+    try:
+        flush_log_entries(log_entries, sink)
+
+        total_duration_hours_all_folders = 0.0
+        corrected_duration_hours = None
+        # The batch-wide Phase 2 IDs are kept as compact IdSets; each folder's own are plain sets
+        speaker_ids_phase2, utt_ids_phase2 = IdSet(), IdSet()
+        for partial in partials:
+            merge_partial_results(batch, partial)
+            speaker_ids_phase2.update(partial['speaker_ids_phase2'])
+            utt_ids_phase2.update(partial['utt_ids_phase2'])
+            flush_log_entries(log_entries, sink)
+            if fingerprint_index is not None:
+                add_phase2_fingerprints(fingerprint_index, partial['wav_fingerprints'])
+            for total_duration_hours in partial['durations']:
+                total_duration_hours_all_folders += total_duration_hours
+            if partial.get('timeline_hours') is not None:
+                corrected_duration_hours = (corrected_duration_hours or 0.0) + partial['timeline_hours']
+    
+        if catalog is not None:
+            for file in check_image_ids_in_csv(batch.file_image_mapping, catalog):
+                log_entries[file].append(ERROR_CODES['Not Present in database of images'])
+    
+        print(f'Total Duration across all folders: {total_duration_hours_all_folders:.2f} hours')
+        if corrected_duration_hours is not None:
+            # Overlaps counted once and negative segments left out; this is the total the range check uses
+            print(f'Corrected Duration across all folders: {corrected_duration_hours:.2f} hours')
+            total_duration_hours_all_folders = corrected_duration_hours
+        if total_duration_hours_all_folders < 300 or total_duration_hours_all_folders > 900:
+            log_entries["Batch Duration not between 300 to 900 Hours"].append(ERROR_CODES['Total duration out of range'])
+
+        repeated_speaker_ids = speaker_ids_phase1.intersection(speaker_ids_phase2)
+        repeated_utt_ids = utt_ids_phase1.intersection(utt_ids_phase2)
+    
+        if repeated_speaker_ids:
+            for speaker_id in sorted(repeated_speaker_ids):
+                log_entries[f"Repeated_speaker_ID_{speaker_id}"].append('Repeated speaker ID')
+        if repeated_utt_ids:
+            for utt_id in sorted(repeated_utt_ids):
+                log_entries[f"Repeated_utt_ID_{utt_id}"].append('Repeated utterance ID')
+
+        if fingerprint_index is not None:
+            for file in find_phase1_duplicates(fingerprint_index):
+                log_entries[file].append(ERROR_CODES['Duplicate of Phase 1 audio'])
+
+        save_to_csv_run_pipeline(batch, output_path)
+
+        flush_log_entries(log_entries, sink)
+        with profiling.stage('error_report'):
+            sink.write(os.path.join(output_path, 'Error_files.tsv'))
+    finally:
+        sink.close()
+
+    print(f"Results saved to {output_path}")
+
+def publish_reports(staging_path, output_path):
+    """Move the reports written to staging_path over the ones in output_path, one atomic rename each."""
+    for name in REPORT_FILES:
+        staged = os.path.join(staging_path, name)
+        if os.path.exists(staged):
+            os.replace(staged, os.path.join(output_path, name))
+        elif os.path.exists(os.path.join(output_path, name)):
+            # Not written this time because it has no rows
+            os.remove(os.path.join(output_path, name))
+
+def settled_since(speaker_folder, settle_seconds):
+    """Whether nothing in speaker_folder was modified in the last settle_seconds."""
+    cutoff = time.time_ns() - int(settle_seconds * 1e9)
+    return all(entry.mtime_ns <= cutoff for entry in speaker_folder.files)
+
+def watch_batch(args, startup_entries, speaker_ids_phase1, utt_ids_phase1, context, fingerprint_index=None):
+    """Check speaker folders as they arrive under main_root_folder and keep the reports up to date.
+
+    The Phase 1 IDs, the state/district mapping and the image catalog stay
+    loaded. Every --watch_interval seconds the root folder is listed again.
+    Only speaker folders that are new or whose files changed are checked, once
+    nothing in them has been modified for --watch_settle seconds. The reports,
+    including the batch duration and SPK-E27, are then rebuilt from the
+    results kept in memory and renamed into place. startup_entries holds the
+    findings made while loading, e.g. an unreadable Phase 1 TSV; every
+    rebuild starts from them.
+    """
+    context_fp = checks_fingerprint(args, context)
+    catalog = load_batch_catalog(args, startup_entries)
+    staging_path = os.path.join(args.output_file_path, '.watch_staging')
+    os.makedirs(staging_path, exist_ok=True)
+
+    checked = {}  # speaker folder path -> (folder fingerprint, partial result)
+    cycle = 0
+    while True:
+        try:
+            speaker_folders = scan_locations(list_speaker_locations(args.main_root_folder), args.io_threads)
+        except OSError as e:
+            # A folder was removed or renamed while it was being listed; try again on the next poll
+            print(f"Error listing {args.main_root_folder}: {e}")
+            speaker_folders = None
+
+        if speaker_folders is not None:
+            present = {speaker_folder.path for speaker_folder in speaker_folders}
+            removed = [path for path in checked if path not in present]
+            for path in removed:
+                del checked[path]
+            pending = []
+            for speaker_folder in speaker_folders:
+                fingerprint = folder_fingerprint(speaker_folder, context_fp)
+                if checked.get(speaker_folder.path, (None,))[0] != fingerprint and settled_since(speaker_folder, args.watch_settle):
+                    pending.append((speaker_folder, fingerprint))
+
+            if pending:
+                partials = iter_checked_folders(args, [speaker_folder for speaker_folder, _ in pending], context, context_fp)
+                for (speaker_folder, fingerprint), partial in zip(pending, partials):
+                    checked[speaker_folder.path] = (fingerprint, partial)
+
+            if not checked:
+                # The metadata reports cannot be built from zero speaker folders
+                print("No settled speaker folders to report on yet.")
+            elif pending or removed:
+                batch = new_batch_state()
+                for file, issues in startup_entries.items():
+                    batch.log_entries[file].extend(issues)
+                if fingerprint_index is not None:
+                    clear_phase2_fingerprints(fingerprint_index)
+                write_batch_reports(args, batch, speaker_ids_phase1, utt_ids_phase1, catalog,
+                                    (checked[speaker_folder.path][1] for speaker_folder in speaker_folders if speaker_folder.path in checked),
+                                    fingerprint_index, staging_path)
+                publish_reports(staging_path, args.output_file_path)
+                print(f"Checked {len(pending)} new or changed speaker folders; "
+                      f"the reports cover {len(checked)} of {len(speaker_folders)} speaker folders.")
+
+        cycle += 1
+        if args.watch_cycles and cycle >= args.watch_cycles:
+            break
+        time.sleep(args.watch_interval)
+    os.rmdir(staging_path)
+
 def main():
     parser = argparse.ArgumentParser(description='Process audio and metadata checks.')
     parser.add_argument('--main_root_folder', type=str, help='Path to the main folder containing subfolders for Phase 2')
@@ -385,96 +734,138 @@ def main():
     parser.add_argument('--txt_file_path', type=str, help='Path to the text file containing state and district information')
     parser.add_argument('--xls_file_path', type=str, help='Path to the XLS file with image mappings')
     parser.add_argument('--output_file_path', type=str, help='Path to save the output TSV file')
+    parser.add_argument('--phase1_index_path', type=str, help='SQLite index of the Phase 1 speaker/utterance IDs (default: phase1_speaker_utt_index.sqlite in the output folder)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes used to check speaker folders in parallel')
+    parser.add_argument('--image_catalog_cache', type=str, help='Compiled cache of the image workbook (default: image_catalog_cache.json in the output folder)')
+    parser.add_argument('--check_wav_headers', action='store_true', help='Inspect .wav headers and compare the real audio length with the segment TSVs')
+    parser.add_argument('--wav_sample_rate', type=int, help='Expected sample rate of the .wav files (checked with --check_wav_headers)')
+    parser.add_argument('--wav_channels', type=int, help='Expected number of channels of the .wav files (checked with --check_wav_headers)')
+    parser.add_argument('--wav_bits_per_sample', type=int, help='Expected bit depth of the .wav files (checked with --check_wav_headers)')
+    parser.add_argument('--check_charset', action='store_true', help='Check the segment TSVs for characters outside the script of the language of their state/district (SPK-E36), control characters (SPK-E37) and misplaced zero-width joiners (SPK-E38)')
+    parser.add_argument('--check_segment_timeline', action='store_true', help='Check the segment TSVs for negative, overlapping and out-of-order segments (SPK-E33 to SPK-E35) and use the corrected duration for SPK-E27')
+    parser.add_argument('--cache_path', type=str, help='SQLite cache of per-speaker-folder results (default: speaker_folder_results_cache.sqlite in the output folder)')
+    parser.add_argument('--no_cache', '--no-cache', action='store_true', help='Check every speaker folder without reading or writing the results cache')
+    parser.add_argument('--rebuild_cache', '--rebuild-cache', action='store_true', help='Discard the results cache and check every speaker folder again')
+    parser.add_argument('--report_spill_dir', type=str, help='Folder for the temporary run files of Error_files.tsv (default: the system temp folder)')
+    parser.add_argument('--report_buffer_rows', type=int, default=SPILL_ROWS, help='Findings held in memory before they are spilled to disk while building Error_files.tsv')
+    parser.add_argument('--io_threads', type=int, default=1, help='Threads that list folders and read the .txt/.tsv files ahead of the checks (useful on network storage)')
+    parser.add_argument('--prefetch_bytes', type=int, default=PREFETCH_BYTES, help='Upper bound on the bytes read ahead of the checks with --io_threads')
+    parser.add_argument('--manifest', type=str, help='File list (path or path/size/mtime TSV, optionally gzipped) to use instead of walking --main_root_folder')
+    parser.add_argument('--phase1_audio_folder', type=str, help='Folder with the Phase 1 .wav files; Phase 2 audio identical to any of them is reported as SPK-E32')
+    parser.add_argument('--audio_fingerprint_index', type=str, help='SQLite index of the Phase 1 audio fingerprints (default: phase1_audio_fingerprints.sqlite in the output folder)')
+    parser.add_argument('--fingerprint_threads', type=int, help='Threads hashing the Phase 1 audio (default: one per CPU)')
+    parser.add_argument('--checkpoint_every', type=int, default=25, help='Sync the checkpoint of finished speaker folders to disk every this many folders (0 disables checkpointing)')
+    parser.add_argument('--checkpoint_path', type=str, help='Checkpoint file (default: checkpoint.bin in the output folder)')
+    parser.add_argument('--resume', action='store_true', help='Skip the speaker folders recorded in the checkpoint of an interrupted run with the same settings')
+    parser.add_argument('--shard', type=parse_shard, help='Check only shard i of N (given as i/N) and write shard_<i>_of_<N>.pkl instead of the reports')
+    parser.add_argument('--merge_shards', nargs='+', metavar='SHARD_FILE', help='Build the reports from the shard_<i>_of_<N>.pkl outputs of every shard instead of checking folders')
+    parser.add_argument('--watch', action='store_true', help='Keep running, check speaker folders as they are uploaded and rewrite the reports after every change')
+    parser.add_argument('--watch_interval', type=float, default=60, help='Seconds between two scans of --main_root_folder with --watch')
+    parser.add_argument('--watch_settle', type=float, default=120, help='With --watch, only check a speaker folder once none of its files changed for this many seconds')
+    parser.add_argument('--watch_cycles', type=int, default=0, help='Stop --watch after this many scans (0 runs until interrupted)')
+    parser.add_argument('--profile', action='store_true', help='Time every check and write profile_report.json/.tsv to the output folder')
     args = parser.parse_args()
 
-    unicode_characters_to_check = ['\r']
-    
-    print("Retrieving the Speaker and Utterance Ids for Phase1....")
-    speaker_utt_pairs_phase1 = check_for_repeats_in_tsv(args.phase1_tsv_folder)
-    speaker_ids_phase1 = {pair[0] for pair in speaker_utt_pairs_phase1}
-    utt_ids_phase1 = {pair[1] for pair in speaker_utt_pairs_phase1}
-    print(f"Speaker-Utterance pairs Phase 1: {len(speaker_utt_pairs_phase1)} pairs found.")
-
-    txt_unique_states, txt_unique_districts = extract_state_district_names_from_txt_file(args.txt_file_path)
-    
-    total_duration_hours_all_folders = 0.0
-    for state_folder in tqdm(os.listdir(args.main_root_folder), desc="Processing state folders"):
-        state_folder_path = os.path.join(args.main_root_folder, state_folder)
-        for district_folder in tqdm(os.listdir(state_folder_path), desc="Processing district folders"):
-            district_folder_path = os.path.join(state_folder_path, district_folder)
-            for speaker_folder in tqdm(os.listdir(district_folder_path), desc="Processing speaker folders"):
-                speaker_folder_path = os.path.join(district_folder_path, speaker_folder)
-
-                speaker_id_issues = process_folders(speaker_folder_path, speaker_folder)
-                for file, error_list in speaker_id_issues.items():
-                    log_entries[file].extend(error_list)
-
-                run_pipeline(district_folder_path, speaker_folder_path)
-
-                for file in os.listdir(speaker_folder_path):
-                    file_path = os.path.join(speaker_folder_path, file)
-                    try:
-                        total_duration_hours = get_duration(file, file_path)
-                        total_duration_hours_all_folders += total_duration_hours
-
-                        format_issues = questions_regarding_audio_tsv_formats(file_path, file, unicode_characters_to_check)
-                        for file, issues in format_issues.items():
-                            log_entries[file].extend(issues)
-
-                        mismatched_filenames = compare_state_district_names(file, txt_unique_states, txt_unique_districts)
-                        if mismatched_filenames:
-                            for filename in mismatched_filenames:
-                                log_entries[filename].append(ERROR_CODES['State or district mismatch'])
-
-                        add_spk_utt_ids(file)
-                        
-                        uttID_issues = check_uttID_in_folder(file)
-                        for file, error_list in uttID_issues.items():
-                            log_entries[file].extend(error_list)
-                        
-                        extension_issues = check_audio_extensions(file)
-                        for file, error_list in extension_issues.items():
-                            log_entries[file].extend(error_list)
-
-                        file_to_image_mapping(file, file_image_mapping)
-
-                    except Exception as e:
-                        log_exception(log_entries, district_folder_path, e)
-
-    
-    image_id_presence = check_image_ids_in_csv(file_image_mapping.values(), args.xls_file_path)
-    for file, image_id in file_image_mapping.items():
-        if not image_id_presence[image_id]:
-            log_entries[file].append(ERROR_CODES['Not Present in database of images'])
-    
-    print(f'Total Duration across all folders: {total_duration_hours_all_folders:.2f} hours')
-    if total_duration_hours_all_folders < 300 or total_duration_hours_all_folders > 900:
-        log_entries["Batch Duration not between 300 to 900 Hours"].append(ERROR_CODES['Total duration out of range'])
-
-    repeated_speaker_ids = speaker_ids_phase1.intersection(speaker_ids_phase2)
-    repeated_utt_ids = utt_ids_phase1.intersection(utt_ids_phase2)
-    
-    if repeated_speaker_ids:
-        for speaker_id in repeated_speaker_ids:
-            log_entries[f"Repeated_speaker_ID_{speaker_id}"].append('Repeated speaker ID')
-    if repeated_utt_ids:
-        for utt_id in repeated_utt_ids:
-            log_entries[f"Repeated_utt_ID_{utt_id}"].append('Repeated utterance ID')
+    if args.profile:
+        enable_profiling()
+
+    batch = new_batch_state()
+    log_entries = batch.log_entries
+
+    if args.merge_shards:
+        try:
+            headers = open_shards(args.merge_shards)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        speaker_ids_phase1, utt_ids_phase1 = load_phase1_ids(args, log_entries)
+        fingerprint_index = load_audio_fingerprint_index(args, log_entries)
+        # Findings the shard runs made outside the speaker folders, e.g. an unreadable txt file
+        for header in headers:
+            for file, issues in header['log_entries'].items():
+                log_entries[file].extend(issues)
+        write_batch_reports(args, batch, speaker_ids_phase1, utt_ids_phase1, load_batch_catalog(args, log_entries),
+                            tqdm(iter_merged_records(headers), total=headers[0]['folders'], desc="Merging shard results"),
+                            fingerprint_index)
+        if fingerprint_index is not None:
+            fingerprint_index.close()
+    elif args.watch:
+        if args.shard is not None or args.manifest or args.resume:
+            parser.error('--watch cannot be combined with --shard, --manifest or --resume')
+        speaker_ids_phase1, utt_ids_phase1 = load_phase1_ids(args, log_entries)
+        fingerprint_index = load_audio_fingerprint_index(args, log_entries)
+        txt_unique_states, txt_unique_districts = extract_state_district_names_from_txt_file(args.txt_file_path, log_entries)
+        try:
+            watch_batch(args, log_entries, speaker_ids_phase1, utt_ids_phase1, build_context(args, txt_unique_states, txt_unique_districts),
+                        fingerprint_index)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+        if fingerprint_index is not None:
+            fingerprint_index.close()
+    else:
+        if args.shard is None:
+            speaker_ids_phase1, utt_ids_phase1 = load_phase1_ids(args, log_entries)
+            fingerprint_index = load_audio_fingerprint_index(args, log_entries)
 
-    save_to_csv_run_pipeline(args.output_file_path)
+        txt_unique_states, txt_unique_districts = extract_state_district_names_from_txt_file(args.txt_file_path, log_entries)
+        
+        with profiling.stage('scan_root'):
+            if args.manifest:
+                tree = load_manifest(args.manifest, args.main_root_folder)
+                listed = tree.speaker_locations()
+                locations = list(listed)
+            else:
+                locations = list_speaker_locations(args.main_root_folder)
+            positions = range(len(locations))
+            if args.shard is not None:
+                shard_index, shard_count = args.shard
+                positions = [position for position in positions
+                             if shard_of(location_relative_path(locations[position]), shard_count) == shard_index]
+            if args.manifest:
+                speaker_folders = [build_speaker_folder(*locations[position], listed[locations[position]]) for position in positions]
+            else:
+                speaker_folders = scan_locations([locations[position] for position in positions], args.io_threads)
+
+        if args.manifest and not args.no_cache and not tree.complete_metadata:
+            # Without sizes and mtimes a changed file cannot be told from an unchanged one
+            print("The manifest has no size/mtime columns; not using the results cache.")
+            args.no_cache = True
+
+        context = build_context(args, txt_unique_states, txt_unique_districts)
+        context_fp = checks_fingerprint(args, context)
+        checkpoint = None
+        if args.checkpoint_every > 0:
+            checkpoint_path = args.checkpoint_path or os.path.join(args.output_file_path, 'checkpoint.bin')
+            folder_fps = [folder_fingerprint(speaker_folder, context_fp) for speaker_folder in speaker_folders]
+            # A checkpoint only resumes a run with the same settings over the same shard
+            run_fp = context_fingerprint(context_fp, args.shard)
+            resumed, resume_offset = 0, 0
+            if args.resume:
+                resumed, resume_offset = resumable_records(checkpoint_path, run_fp, folder_fps)
+                print(f"Resuming after {resumed} of {len(speaker_folders)} speaker folders from {checkpoint_path}.")
+            checkpoint = CheckpointWriter(checkpoint_path, run_fp, args.checkpoint_every, resume_offset)
+            fresh = iter_checked_folders(args, speaker_folders[resumed:], context, context_fp)
+            partials = chain(replay_records(checkpoint_path, resumed), record_partials(checkpoint, folder_fps[resumed:], fresh))
+        else:
+            partials = iter_checked_folders(args, speaker_folders, context, context_fp)
 
-    final_log_entries = [{"File": file, "Issue": ', '.join(set(issues))} for file, issues in log_entries.items()]
+        if args.shard is None:
+            write_batch_reports(args, batch, speaker_ids_phase1, utt_ids_phase1, load_batch_catalog(args, log_entries), partials,
+                                fingerprint_index)
+            if fingerprint_index is not None:
+                fingerprint_index.close()
+        else:
+            shard_path = shard_output_path(args.output_file_path, shard_index, shard_count)
+            header = {'index': shard_index, 'count': shard_count, 'folders': len(locations), 'log_entries': dict(log_entries)}
+            write_shard(shard_path, header, zip(positions, partials))
+            print(f"Shard {shard_index}/{shard_count}: {len(speaker_folders)} of {len(locations)} speaker folders saved to {shard_path}")
 
-    log_df = pd.DataFrame(final_log_entries, columns=["File", "Issue"])
-    log_df.to_csv(os.path.join(args.output_file_path, 'Error_files.tsv'), sep='\t', index=False)
+        if checkpoint is not None:
+            checkpoint.close()
+            # The outputs are complete; a later --resume must not pick this run up again
+            os.remove(checkpoint_path)
 
-    print(f"Results saved to {args.output_file_path}")
+    if args.profile:
+        profiling.write_report(os.path.join(args.output_file_path, 'profile_report'))
 
 if __name__ == "__main__":
-    log_entries = defaultdict(list)
-    file_image_mapping = {}
-    speaker_ids_phase2 = set()
-    utt_ids_phase2 = set()
-    d1, d2, d3, d4 = [], [], [], []
-
-    main()
\ No newline at end of file
+    main()
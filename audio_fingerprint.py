@@ -0,0 +1,146 @@
+"""Content fingerprints of .wav audio and a persistent index of the Phase 1 ones.
+
+A fingerprint is the 128-bit BLAKE2b digest of the samples in the data chunk.
+The header is skipped, so a clip that was only renamed, or had its metadata
+chunks rewritten, still matches. Files are hashed by streaming reads into one
+reused buffer. hashlib releases the GIL while hashing, so a thread pool spreads
+the work over the cores. The Phase 1 index is a SQLite file keyed on path, size
+and mtime, so a rerun only hashes new or changed clips. It is updated in
+batches and never held in memory, which keeps it workable for tens of millions
+of clips. Phase 2 fingerprints are matched against it in a single join.
+"""
+
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+from wav_inspector import inspect_wav
+
+FINGERPRINT_SIZE = 16
+READ_BLOCK = 1 << 20
+# Paths per batch; kept below SQLite's default limit of 999 bound parameters
+BATCH_SIZE = 900
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    fingerprint BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_fingerprint ON files (fingerprint);
+CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY);
+CREATE TEMP TABLE IF NOT EXISTS phase2 (id INTEGER PRIMARY KEY, file TEXT NOT NULL, fingerprint BLOB NOT NULL);
+"""
+
+
+def fingerprint_wav(file_path):
+    """Return the fingerprint of the PCM data of file_path; raises WavHeaderError for a broken header."""
+    info = inspect_wav(file_path)
+    digest = hashlib.blake2b(digest_size=FINGERPRINT_SIZE)
+    block = bytearray(READ_BLOCK)
+    view = memoryview(block)
+    remaining = info.data_size
+    with open(file_path, 'rb', buffering=0) as file:
+        file.seek(info.data_offset)
+        while remaining > 0:
+            read = file.readinto(view[:min(remaining, READ_BLOCK)])
+            if not read:
+                break
+            digest.update(view[:read])
+            remaining -= read
+    return digest.digest()
+
+
+def iter_wav_files(folder):
+    for root, dirs, names in os.walk(folder):
+        for name in names:
+            if name.lower().endswith('.wav'):
+                yield os.path.join(root, name)
+
+
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def open_fingerprint_index(index_path):
+    conn = sqlite3.connect(index_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def try_fingerprint(file_path):
+    try:
+        return fingerprint_wav(file_path), None
+    except Exception as e:
+        return None, e
+
+
+def update_fingerprint_index(conn, audio_folder, workers=None):
+    """Bring the index up to date with the .wav files under audio_folder.
+
+    Returns (file_name, exception) for the clips that could not be hashed.
+    Those are left out of the index so they are retried on the next run.
+    """
+    errors = []
+    with conn:
+        conn.execute("DELETE FROM seen")
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as executor:
+        for batch in tqdm(iter_batches(iter_wav_files(audio_folder), BATCH_SIZE), desc="Indexing Phase 1 audio batches"):
+            current = {}
+            for file_path in batch:
+                try:
+                    st = os.stat(file_path)
+                except OSError as e:
+                    errors.append((os.path.basename(file_path), e))
+                    continue
+                current[file_path] = (st.st_size, st.st_mtime_ns)
+
+            placeholders = ','.join('?' * len(current))
+            stored = {path: (size, mtime_ns) for path, size, mtime_ns in
+                      conn.execute(f"SELECT path, size, mtime_ns FROM files WHERE path IN ({placeholders})", list(current))}
+            changed = [path for path, stat in current.items() if stored.get(path) != stat]
+
+            rows = []
+            for file_path, (fingerprint, error) in zip(changed, executor.map(try_fingerprint, changed)):
+                if error is not None:
+                    errors.append((os.path.basename(file_path), error))
+                    # Not marked as seen, so the row hashed from its old contents is dropped below
+                    del current[file_path]
+                    continue
+                size, mtime_ns = current[file_path]
+                rows.append((file_path, size, mtime_ns, fingerprint))
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO files (path, size, mtime_ns, fingerprint) VALUES (?, ?, ?, ?)", rows)
+                conn.executemany("INSERT OR IGNORE INTO seen (path) VALUES (?)", ((path,) for path in current))
+
+    with conn:
+        conn.execute("DELETE FROM files WHERE path NOT IN (SELECT path FROM seen)")
+    return errors
+
+
+def add_phase2_fingerprints(conn, fingerprints):
+    """Stage {file name: fingerprint} of Phase 2 clips for find_phase1_duplicates()."""
+    with conn:
+        conn.executemany("INSERT INTO phase2 (file, fingerprint) VALUES (?, ?)", fingerprints.items())
+
+
+def clear_phase2_fingerprints(conn):
+    """Forget the staged Phase 2 fingerprints, e.g. before the reports are rebuilt."""
+    with conn:
+        conn.execute("DELETE FROM phase2")
+
+
+def find_phase1_duplicates(conn):
+    """Return the staged Phase 2 files whose audio is also in the Phase 1 index, in the order they were added."""
+    rows = conn.execute("SELECT p.file FROM phase2 p WHERE EXISTS (SELECT 1 FROM files f WHERE f.fingerprint = p.fingerprint) ORDER BY p.id")
+    return [file for file, in rows]
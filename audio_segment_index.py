@@ -0,0 +1,148 @@
+"""Index of the audio batch that transcription rows are joined against.
+
+Every .wav name of the batch is kept once in a hash-based pandas Index. Every
+segment of its segment TSV (start and end, columns 4 and 5, in milliseconds)
+is kept in sorted int64 arrays keyed on (wav id << 32 | start). A batch of
+transcription rows is then matched with one get_indexer() and one
+searchsorted() call. Segments matched by some transcription row are flagged,
+so the segments left untranscribed can be listed at the end.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Segment times are compared at millisecond resolution
+TIME_SCALE = 1000
+MAX_START_MS = (1 << 32) - 1
+
+
+def to_milliseconds(values):
+    values = pd.Series(values)
+    try:
+        seconds = values.to_numpy(dtype=float)
+    except (TypeError, ValueError):
+        # Some cell is not a number; those become NaN
+        seconds = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+    return np.rint(seconds * TIME_SCALE)
+
+
+def wav_basenames(values):
+    names = pd.Series(values, dtype=object)
+    if names.str.contains('/', regex=False).any():
+        names = names.str.rsplit('/', n=1).str[-1]
+    return names
+
+
+def read_segment_bounds(file_path):
+    df = pd.read_csv(file_path, sep='\t', header=None, usecols=[3, 4])
+    starts = to_milliseconds(df[3])
+    ends = to_milliseconds(df[4])
+    rows = np.arange(len(df))
+    valid = ~np.isnan(starts) & ~np.isnan(ends) & (starts >= 0) & (starts <= MAX_START_MS)
+    return starts[valid].astype(np.int64), ends[valid].astype(np.int64), rows[valid]
+
+
+class AudioSegmentIndex:
+    def __init__(self, wav_names, segment_wav_ids, segment_starts, segment_ends, segment_rows):
+        self.wav_names = pd.Index(wav_names, dtype=object)
+        keys = (np.asarray(segment_wav_ids, dtype=np.int64) << 32) | np.asarray(segment_starts, dtype=np.int64)
+        ends = np.asarray(segment_ends, dtype=np.int64)
+        order = np.lexsort((ends, keys))
+        self.keys = keys[order]
+        self.ends = ends[order]
+        self.rows = np.asarray(segment_rows, dtype=np.int64)[order]
+        # Segments of one audio may share a start; match() scans runs of equal keys up to the longest one
+        self.longest_run = int(np.unique(self.keys, return_counts=True)[1].max()) if len(self.keys) else 0
+        self.transcribed = np.zeros(len(self.keys), dtype=bool)
+        self.referenced = np.zeros(len(self.wav_names), dtype=bool)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def match(self, wav_names, starts, ends):
+        """Match a batch of transcription rows.
+
+        Returns (missing, mismatched, segment_positions, wav_ids): boolean masks
+        of the rows whose audio is not in the batch and of the rows whose
+        bounds match no segment of their audio, the index positions of the
+        segments that were matched and the ids of the audio referenced.
+        """
+        names = wav_basenames(wav_names)
+        wav_ids = self.wav_names.get_indexer(names)
+        start_ms = to_milliseconds(starts)
+        end_ms = to_milliseconds(ends)
+
+        present = wav_ids >= 0
+        missing = ~present & names.notna().to_numpy()
+        timed = present & ~np.isnan(start_ms) & ~np.isnan(end_ms) & (start_ms >= 0) & (start_ms <= MAX_START_MS)
+
+        keys = (wav_ids[timed].astype(np.int64) << 32) | start_ms[timed].astype(np.int64)
+        row_ends = end_ms[timed].astype(np.int64)
+        run_starts = np.searchsorted(self.keys, keys, side='left')
+        run_ends = np.searchsorted(self.keys, keys, side='right')
+        positions = np.full(len(keys), -1, dtype=np.int64)
+        for offset in range(self.longest_run):
+            candidates = run_starts + offset
+            open_rows = np.flatnonzero((positions < 0) & (candidates < run_ends))
+            if not len(open_rows):
+                break
+            hits = open_rows[self.ends[candidates[open_rows]] == row_ends[open_rows]]
+            positions[hits] = candidates[hits]
+        found = positions >= 0
+
+        mismatched = present.copy()
+        mismatched[np.flatnonzero(timed)[found]] = False
+        return missing, mismatched, positions[found], np.unique(wav_ids[present])
+
+    def mark_transcribed(self, segment_positions, wav_ids):
+        self.transcribed[segment_positions] = True
+        self.referenced[wav_ids] = True
+
+    def clear_coverage(self):
+        self.transcribed[:] = False
+        self.referenced[:] = False
+
+    def untranscribed(self):
+        """Yield (wav name, first untranscribed segment row) for every referenced audio with an untranscribed segment."""
+        wav_ids = self.keys >> 32
+        open_positions = np.flatnonzero(~self.transcribed & self.referenced[wav_ids])
+        if not len(open_positions):
+            return
+        # keys are sorted by wav id, so the open segments of each audio are one run
+        open_wav_ids, run_starts = np.unique(wav_ids[open_positions], return_index=True)
+        first_rows = np.minimum.reduceat(self.rows[open_positions], run_starts)
+        for wav_id, row in zip(open_wav_ids.tolist(), first_rows.tolist()):
+            yield self.wav_names[wav_id], row
+
+
+def build_audio_segment_index(tree):
+    """Index every .wav of a ManifestTree together with the segments of its segment TSV."""
+    wav_names = {}
+    segment_files = []
+    for dirpath, dirnames, filenames in tree.walk(tree.root):
+        for name in filenames:
+            if name.endswith('.wav'):
+                wav_names.setdefault(name, len(wav_names))
+            elif name.endswith('.tsv'):
+                segment_files.append(os.path.join(dirpath, name))
+
+    wav_ids, starts, ends, rows = [], [], [], []
+    for file_path in segment_files:
+        wav_id = wav_names.get(os.path.splitext(os.path.basename(file_path))[0] + '.wav')
+        if wav_id is None:
+            continue
+        try:
+            file_starts, file_ends, file_rows = read_segment_bounds(file_path)
+        except Exception:
+            # Unreadable segment TSVs are reported by the audio checks; the audio then has no segments
+            continue
+        wav_ids.append(np.full(len(file_starts), wav_id, dtype=np.int64))
+        starts.append(file_starts)
+        ends.append(file_ends)
+        rows.append(file_rows)
+
+    def joined(parts):
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    return AudioSegmentIndex(list(wav_names), joined(wav_ids), joined(starts), joined(ends), joined(rows))
@@ -0,0 +1,365 @@
+"""python benchmarks/generate_corpus.py /tmp/vaani_corpus --states 2 --districts 3 --speakers 20 --utterances 25 --seed 0
+
+Builds a deterministic, Vaani-style synthetic delivery for benchmarking the
+checkers without copying real data:
+
+    <out>/raw/<State>/<District>/<Speaker>/   .wav/.tsv segment pairs, .txt/.pdf metadata
+    <out>/phase1/                              Phase 1 TSVs (audio paths in the first column)
+    <out>/phase1_audio/                        Phase 1 .wav files (for --phase1_audio_folder)
+    <out>/state_district_mapping.txt           state<TAB>district mapping
+    <out>/Images_Phase2.xlsx                   DistrictSpecificImages / GenericImages sheets
+    <out>/transcription/<batch>/<folder>/      transcription TSVs of the segments of the raw audio
+    <out>/corpus.json                          generation parameters and injected errors
+
+A small fraction of speaker folders and transcription folders get one injected
+error each, cycling through every SPK-* and TRXN_* code so each one is
+exercised. The transcriptions cover the segments of the clips that carry no
+injected error, so they join cleanly against raw/ with --audio_root_folder.
+WAV sample data is left sparse after a marker that makes every clip unique, so
+large corpora stay cheap on disk.
+"""
+
+import argparse
+import json
+import os
+import random
+import struct
+
+STATES = ['Karnataka', 'Bihar', 'Maharashtra', 'TamilNadu', 'WestBengal', 'UttarPradesh', 'Telangana', 'Rajasthan']
+DISTRICTS = ['Mysore', 'Udupi', 'Patna', 'Pune', 'Chennai', 'Kolkata', 'Agra', 'Warangal', 'Jaipur', 'Gaya', 'Nashik', 'Madurai']
+
+SAMPLE_RATE = 16000
+
+# Injected into speaker folders, one per chosen folder, in this order
+SPK_ERRORS = ['SPK-E12', 'SPK-E13', 'SPK-E14', 'SPK-E15', 'SPK-E16', 'SPK-E17', 'SPK-E18', 'SPK-E19', 'SPK-E20',
+              'SPK-E21', 'SPK-E22', 'SPK-E23', 'SPK-E24', 'SPK-E25', 'SPK-E26', 'SPK-E28', 'SPK-E29', 'SPK-E30',
+              'SPK-E31', 'SPK-E32', 'SPK-E33', 'SPK-E34', 'SPK-E35', 'SPK-E36', 'SPK-E37', 'SPK-E38', 'PDF-E1', 'WAV-E1',
+              'TSV-E1']
+# SPK-E27 (batch duration) depends on the corpus size and is not injected per folder
+
+TRXN_ERRORS = ['TRXN_E1', 'TRXN_E2', 'TRXN_E3', 'TRXN_E4', 'TRXN_E5', 'TRXN_E6', 'TRXN_E7', 'TRXN_E8', 'TRXN_E9', 'TRXN_E10',
+               'TRXN_E11', 'TRXN_E12', 'TRXN_E13']
+
+# A word in the script of every state's language, so clean transcripts pass --check_charset
+STATE_WORDS = {'Karnataka': 'ಕನ್ನಡ', 'Bihar': 'हिन्दी', 'Maharashtra': 'मराठी', 'TamilNadu': 'தமிழ்', 'WestBengal': 'বাংলা',
+               'UttarPradesh': 'हिन्दी', 'Telangana': 'తెలుగు', 'Rajasthan': 'हिन्दी'}
+# Written into texts by the character-set injectors: an Arabic letter, a zero-width space and a zero-width joiner
+WRONG_SCRIPT_CHARACTER = '\u0628'
+CONTROL_CHARACTER = '\u200b'
+JOINER = '\u200d'
+
+
+def wav_header(data_size, sample_rate=SAMPLE_RATE, channels=1, bits_per_sample=16, declared_size=None):
+    block_align = channels * bits_per_sample // 8
+    declared_size = data_size if declared_size is None else declared_size
+    return (b'RIFF' + struct.pack('<I', 36 + declared_size) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample)
+            + b'data' + struct.pack('<I', declared_size))
+
+
+def write_wav(path, seconds, sample_rate=SAMPLE_RATE, truncate_by=0, corrupt=False, marker=0):
+    data_size = int(seconds * sample_rate) * 2
+    with open(path, 'wb') as file:
+        if corrupt:
+            file.write(b'not a wav file')
+            return
+        header = wav_header(data_size - truncate_by, sample_rate=sample_rate, declared_size=data_size)
+        file.write(header)
+        # The marker gives every clip its own audio fingerprint
+        if data_size - truncate_by >= 8:
+            file.write(struct.pack('<Q', marker))
+        # Sparse sample data: extend the file without writing the zeros
+        file.truncate(len(header) + data_size - truncate_by)
+
+
+def segment_bounds(rng, audio_seconds, segments, error=None):
+    """Return the (start, end) of every segment of a clip, with the timeline error of error injected."""
+    bounds = []
+    step = audio_seconds / segments
+    for i in range(segments):
+        start = round(i * step, 3)
+        bounds.append((start, round(start + step * rng.uniform(0.6, 0.95), 3)))
+    if error == 'SPK-E31':
+        bounds[-1] = (bounds[-1][0], audio_seconds + 5)
+    if error == 'SPK-E33':
+        bounds[0] = bounds[0][::-1]
+    if error == 'SPK-E34' and segments > 1:
+        # The second segment starts halfway through the first
+        bounds[1] = (round((bounds[0][0] + bounds[0][1]) / 2, 3), bounds[1][1])
+    if error == 'SPK-E35' and segments > 1:
+        bounds[0], bounds[1] = bounds[1], bounds[0]
+    return bounds
+
+
+def segment_rows(district, bounds, error=None):
+    label = 'speech'
+    if error == 'SPK-E36':
+        label = f"speech {WRONG_SCRIPT_CHARACTER}"
+    if error == 'SPK-E37':
+        label = f"speech{CONTROL_CHARACTER}"
+    if error == 'SPK-E38':
+        label = f"{JOINER}speech"
+    return ''.join(f"{i}\t{district}\t{label}\t{start}\t{end}\n" for i, (start, end) in enumerate(bounds))
+
+
+def generate_speaker_folder(rng, raw_root, state, district, speaker_id, utterances, segments, audio_seconds,
+                            error, image_ids, phase1_ids, phase1_audio_root):
+    """Write one speaker folder and return [(wav name, image, segment bounds)] of its clips without an injected error."""
+    speaker = str(speaker_id)
+    folder = os.path.join(raw_root, state, district, speaker)
+    os.makedirs(folder, exist_ok=True)
+    prefix = f"{state}_{district}_{speaker}"
+
+    if error != 'SPK-E23':
+        txt_name = f"{state}_{district}_{speaker}_meta.txt" if error == 'SPK-E16' else f"{prefix}.txt"
+        with open(os.path.join(folder, txt_name), 'w', encoding='utf-8') as file:
+            if error != 'SPK-E22':
+                meta_speaker = str(speaker_id + 1) if error == 'SPK-E21' else speaker
+                file.write(f"Speaker_ID: {meta_speaker}\n")
+            file.write(f"State: {state}\nDistrict: {district}\nAge: {rng.randint(18, 70)}\nGender: {rng.choice(['M', 'F'])}\n")
+        if error != 'PDF-E1':
+            with open(os.path.join(folder, txt_name.replace('.txt', '.pdf')), 'wb') as file:
+                file.write(b'%PDF-1.4\n%%EOF\n')
+
+    clips = []
+    for u in range(utterances):
+        marker = speaker_id * 1000 + u
+        utt_id = str(marker)
+        image = rng.choice(image_ids[district])
+        first = u == 0
+        if first and error == 'SPK-E18':
+            utt_id = phase1_ids[1]
+        if first and error == 'SPK-E24':
+            utt_id = f"u{utt_id}"
+        if first and error == 'SPK-E15':
+            image = f"Elsewhere-{u}_1"
+        if first and error == 'SPK-E25':
+            image = f"{district}-999999_1"
+
+        base = f"{prefix}_{utt_id}_{image}"
+        if first and error == 'SPK-E13':
+            base = f"{prefix}_{utt_id}_{image} copy"
+        if first and error == 'SPK-E14':
+            base = f"{prefix}_{utt_id}_extra_{image}"
+        if first and error == 'SPK-E17':
+            base = f"{state}_{district}_{phase1_ids[0]}_{utt_id}_{image}"
+
+        bounds = segment_bounds(rng, audio_seconds, segments, error if first else None)
+        if error != 'TSV-E1':
+            body = segment_rows(district, bounds, error if first else None)
+            if first and error == 'SPK-E19':
+                body = body.rstrip('\n')
+            if first and error == 'SPK-E20':
+                body = body.replace('\n', '\r\n')
+            with open(os.path.join(folder, base + '.tsv'), 'w', encoding='utf-8', newline='') as file:
+                file.write(body)
+
+        if error == 'WAV-E1':
+            continue
+        if first and error == 'SPK-E26':
+            with open(os.path.join(folder, base + '.mp3'), 'wb') as file:
+                file.write(b'ID3')
+            continue
+        write_wav(os.path.join(folder, base + '.wav'), audio_seconds,
+                  sample_rate=8000 if first and error == 'SPK-E29' else SAMPLE_RATE,
+                  truncate_by=1000 if first and error == 'SPK-E30' else 0,
+                  corrupt=first and error == 'SPK-E28', marker=marker)
+        if first and error == 'SPK-E32':
+            # The same samples were already delivered in Phase 1, under another name
+            write_wav(os.path.join(phase1_audio_root, f"phase1_{utt_id}.wav"), audio_seconds, marker=marker)
+        if not (first and error) and error != 'TSV-E1':
+            clips.append((base + '.wav', image, bounds))
+
+    return clips
+
+
+def generate_phase1(rng, out, files, rows_per_file, reserved_ids):
+    phase1_root = os.path.join(out, 'phase1')
+    os.makedirs(phase1_root, exist_ok=True)
+    for f in range(files):
+        with open(os.path.join(phase1_root, f"phase1_part{f:03d}.tsv"), 'w', encoding='utf-8') as file:
+            file.write("audio_path\tduration\n")
+            for r in range(rows_per_file):
+                speaker, utt = (reserved_ids if f == 0 and r == 0 else (str(900000 + rng.randrange(50000)), str(rng.randrange(10 ** 9))))
+                file.write(f"/data/phase1/S_D_{speaker}_{utt}_IMG-D_{r}.wav\t{rng.uniform(1, 30):.2f}\n")
+
+
+def generate_phase1_audio(out, files, audio_seconds):
+    phase1_audio_root = os.path.join(out, 'phase1_audio')
+    os.makedirs(phase1_audio_root, exist_ok=True)
+    for f in range(files):
+        # Markers below 100000000 are never used by the Phase 2 clips
+        write_wav(os.path.join(phase1_audio_root, f"phase1_clip{f:03d}.wav"), audio_seconds, marker=f)
+    return phase1_audio_root
+
+
+def generate_image_workbook(out, image_ids):
+    import pandas as pd
+
+    district_specific = [f"{image}.jpg" for images in image_ids.values() for image in images]
+    generic = [f"GENERIC_{i}.jpg" for i in range(50)]
+    with pd.ExcelWriter(os.path.join(out, 'Images_Phase2.xlsx')) as writer:
+        pd.DataFrame({'Filename': district_specific}).to_excel(writer, sheet_name='DistrictSpecificImages', index=False)
+        pd.DataFrame({'Filename': generic}).to_excel(writer, sheet_name='GenericImages', index=False)
+
+
+def transcription_rows(rng, clips, error):
+    """Return the transcription TSV of clips, one row per segment, with error injected."""
+    rows = []
+    for wav, image, bounds in clips:
+        word = STATE_WORDS.get(wav.split('_', 1)[0], 'text')
+        for i, (start, end) in enumerate(bounds):
+            rows.append([str(rng.randint(1, 40)), f"{image}.jpg", wav, str(i), str(start), str(end), f"{word} transcript {i}"])
+    middle = rows[len(rows) // 2] if rows else [''] * 7
+    if error == 'TRXN_E4':
+        middle[6] = f'"{middle[6]}\nsecond line"'
+    if error == 'TRXN_E7':
+        middle[0] = 'transcriber'
+    # TRXN_E8 and TRXN_E9 add a row, so every segment of the clips stays transcribed
+    if error == 'TRXN_E8' and rows:
+        rows.append(middle[:2] + [middle[2].replace('.wav', '_missing.wav')] + middle[3:])
+    if error == 'TRXN_E9' and rows:
+        rows.append(middle[:4] + [str(float(middle[5]) + 0.5), str(float(middle[5]) + 1.0), middle[6]])
+    if error == 'TRXN_E10' and rows:
+        rows.pop()
+    if error == 'TRXN_E11':
+        middle[6] += f" {WRONG_SCRIPT_CHARACTER}"
+    if error == 'TRXN_E12':
+        middle[6] += CONTROL_CHARACTER
+    if error == 'TRXN_E13':
+        middle[6] = JOINER + middle[6]
+    text = ''.join('\t'.join(row) + '\n' for row in rows)
+    if error == 'TRXN_E3':
+        text = ''.join(line.rsplit('\t', 1)[0] + '\n' for line in text.splitlines())
+    if error == 'TRXN_E6':
+        text = text.replace('\t', ',')
+    return text
+
+
+def generate_transcriptions(rng, out, batches, folders_per_batch, rows, error_every, clips):
+    """Write the transcription folders; each transcribes whole clips, taken in turn from clips.
+
+    The first clip is kept for the TRXN_E10 folders, so the segment they leave
+    out is not transcribed by any other folder.
+    """
+    root = os.path.join(out, 'transcription')
+    reserved, shared = clips[:1], clips[1:] or clips
+    clips_per_file = max(1, rows // max(1, len(clips[0][2]))) if clips else 0
+    injected = []
+    k = 0
+    c = 0
+    for b in range(batches):
+        for f in range(folders_per_batch):
+            folder = os.path.join(root, f"batch{b:02d}", f"folder{f:04d}")
+            os.makedirs(folder, exist_ok=True)
+            error = TRXN_ERRORS[(k // error_every) % len(TRXN_ERRORS)] if k % error_every == 0 else None
+            k += 1
+            if error == 'TRXN_E10':
+                folder_clips = reserved
+            else:
+                folder_clips = [shared[(c + i) % len(shared)] for i in range(clips_per_file)] if shared else []
+                c += clips_per_file
+            if error == 'TRXN_E2':
+                os.makedirs(os.path.join(folder, 'empty'), exist_ok=True)
+            if error == 'TRXN_E5':
+                open(os.path.join(folder, 'transcript.tsv'), 'w').close()
+            else:
+                with open(os.path.join(folder, 'transcript.tsv'), 'w', encoding='utf-8') as file:
+                    file.write(transcription_rows(rng, folder_clips, error))
+            if error == 'TRXN_E1':
+                with open(os.path.join(folder, 'transcript_copy.tsv'), 'w', encoding='utf-8') as file:
+                    file.write(transcription_rows(rng, folder_clips, None))
+            if error:
+                injected.append({'folder': folder, 'error': error})
+    return injected
+
+
+def generate_corpus(out, states=2, districts=2, speakers=10, utterances=20, segments=5, audio_seconds=8.0,
+                    phase1_files=4, phase1_rows=5000, transcription_batches=2, transcription_folders=20,
+                    transcription_rows_per_file=200, error_every=5, seed=0):
+    """Generate the corpus under out and return its description (also written to corpus.json)."""
+    rng = random.Random(seed)
+    os.makedirs(out, exist_ok=True)
+    raw_root = os.path.join(out, 'raw')
+
+    chosen_states = STATES[:states]
+    district_names = [DISTRICTS[i % len(DISTRICTS)] + ('' if i < len(DISTRICTS) else str(i)) for i in range(states * districts)]
+    layout = {state: district_names[i * districts:(i + 1) * districts] for i, state in enumerate(chosen_states)}
+    # Image parts look like <District>-<n>_<m>, so the image ID is <District>-<n>_<m>.jpg
+    image_ids = {district: [f"{district}-{i}_{j}" for i in range(10) for j in (1, 2)] for district in district_names}
+
+    phase1_ids = ('900001', '555000001')
+    generate_phase1(rng, out, phase1_files, phase1_rows, phase1_ids)
+    phase1_audio_root = generate_phase1_audio(out, phase1_files, audio_seconds)
+
+    injected = []
+    clean_clips = []
+    k = 0
+    speaker_id = 100000
+    for state, state_districts in layout.items():
+        for district in state_districts:
+            for s in range(speakers):
+                error = SPK_ERRORS[(k // error_every) % len(SPK_ERRORS)] if k % error_every == 0 else None
+                k += 1
+                folder_district = district
+                if error == 'SPK-E12':
+                    folder_district = district + 'Unmapped'
+                    image_ids.setdefault(folder_district, [image.replace(district, folder_district) for image in image_ids[district]])
+                clips = generate_speaker_folder(rng, raw_root, state, folder_district, speaker_id, utterances, segments,
+                                                audio_seconds, error, image_ids, phase1_ids, phase1_audio_root)
+                clean_clips.extend(clips)
+                if error:
+                    injected.append({'folder': os.path.join(raw_root, state, folder_district, str(speaker_id)), 'error': error})
+                speaker_id += 1
+
+    with open(os.path.join(out, 'state_district_mapping.txt'), 'w', encoding='utf-8') as file:
+        for state, state_districts in layout.items():
+            for district in state_districts:
+                file.write(f"{state}\t{district}\n")
+
+    generate_image_workbook(out, {d: ids for d, ids in image_ids.items() if not d.endswith('Unmapped')})
+    injected.extend(generate_transcriptions(rng, out, transcription_batches, transcription_folders,
+                                            transcription_rows_per_file, error_every, clean_clips))
+
+    description = {
+        'params': {'states': states, 'districts': districts, 'speakers': speakers, 'utterances': utterances,
+                   'segments': segments, 'audio_seconds': audio_seconds, 'phase1_files': phase1_files,
+                   'phase1_rows': phase1_rows, 'transcription_batches': transcription_batches,
+                   'transcription_folders': transcription_folders,
+                   'transcription_rows_per_file': transcription_rows_per_file, 'error_every': error_every, 'seed': seed},
+        'speaker_folders': states * districts * speakers,
+        'injected_errors': injected,
+    }
+    with open(os.path.join(out, 'corpus.json'), 'w', encoding='utf-8') as file:
+        json.dump(description, file, indent=2)
+    return description
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Vaani-style corpus for benchmarking.')
+    parser.add_argument('output_folder', type=str, help='Folder to create the corpus in')
+    parser.add_argument('--states', type=int, default=2, help='Number of state folders')
+    parser.add_argument('--districts', type=int, default=2, help='District folders per state')
+    parser.add_argument('--speakers', type=int, default=10, help='Speaker folders per district')
+    parser.add_argument('--utterances', type=int, default=20, help='.wav/.tsv pairs per speaker folder')
+    parser.add_argument('--segments', type=int, default=5, help='Segments per segment TSV')
+    parser.add_argument('--audio_seconds', type=float, default=8.0, help='Length of every .wav file')
+    parser.add_argument('--phase1_files', type=int, default=4, help='Number of Phase 1 TSVs')
+    parser.add_argument('--phase1_rows', type=int, default=5000, help='Rows per Phase 1 TSV')
+    parser.add_argument('--transcription_batches', type=int, default=2, help='Top-level transcription folders')
+    parser.add_argument('--transcription_folders', type=int, default=20, help='Transcription subfolders per batch')
+    parser.add_argument('--transcription_rows', type=int, default=200, help='Rows per transcription TSV')
+    parser.add_argument('--error_every', type=int, default=5, help='Inject an error into every N-th folder')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    description = generate_corpus(args.output_folder, args.states, args.districts, args.speakers, args.utterances,
+                                  args.segments, args.audio_seconds, args.phase1_files, args.phase1_rows,
+                                  args.transcription_batches, args.transcription_folders, args.transcription_rows,
+                                  args.error_every, args.seed)
+    print(f"Generated {description['speaker_folders']} speaker folders with "
+          f"{len(description['injected_errors'])} injected errors in {args.output_folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""python benchmarks/run_benchmarks.py --sizes 5,20,80 --output benchmark_results.json
+python benchmarks/run_benchmarks.py --compare old_results.json new_results.json
+
+Generates a synthetic corpus for every size (speaker folders per district,
+see generate_corpus.py) and times each stage of the two checkers on it. Every
+stage runs in a fresh child process so its peak RSS can be read from
+os.wait4(). Results are written as JSON together with the git commit they
+were measured on; --compare prints the per-stage ratio between two result files.
+"""
+
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from generate_corpus import generate_corpus
+
+
+def corpus_files(corpus, pattern):
+    return sorted(glob.glob(os.path.join(corpus, pattern)))
+
+
+def stage_scan(corpus, workdir):
+    from folder_scanner import scan_root
+    return sum(len(speaker_folder.files) for speaker_folder in scan_root(os.path.join(corpus, 'raw')))
+
+
+def stage_phase1_index(corpus, workdir):
+    from phase1_index import load_phase1_id_sets
+    speaker_ids, utt_ids, pair_count, errors = load_phase1_id_sets(os.path.join(corpus, 'phase1'), os.path.join(workdir, 'phase1_index.sqlite'))
+    return len(corpus_files(corpus, 'phase1/*'))
+
+
+def stage_filename_rules(corpus, workdir):
+    # The per-name parse and rules the audio checker runs on every file of a speaker folder
+    from filename_grammar import parse_filename, name_rule_violations
+    names = [os.path.basename(path) for path in corpus_files(corpus, 'raw/*/*/*/*')]
+    with open(os.path.join(corpus, 'state_district_mapping.txt'), encoding='utf-8') as file:
+        rows = [line.rstrip('\n').split('\t') for line in file if line.strip()]
+    states, districts = {row[0] for row in rows}, {row[1] for row in rows}
+    for name in names:
+        name_rule_violations(parse_filename(name), states, districts)
+    return len(names)
+
+
+def stage_tsv_inspection(corpus, workdir):
+    from tsv_inspector import inspect_tsv
+    paths = corpus_files(corpus, 'raw/*/*/*/*.tsv')
+    for path in paths:
+        inspect_tsv(path, ['\r'])
+    return len(paths)
+
+
+def stage_wav_inspection(corpus, workdir):
+    from wav_inspector import inspect_wav
+    paths = corpus_files(corpus, 'raw/*/*/*/*.wav')
+    for path in paths:
+        try:
+            inspect_wav(path)
+        except ValueError:
+            pass
+    return len(paths)
+
+
+def stage_image_catalog(corpus, workdir):
+    from image_catalog import ImageCatalog
+    return len(ImageCatalog.load(os.path.join(corpus, 'Images_Phase2.xlsx'), os.path.join(workdir, 'image_catalog_cache.json')))
+
+
+def stage_transcription_columns(corpus, workdir):
+    from transcription_checks import validate_tsv_columns
+    paths = corpus_files(corpus, 'transcription/*/*/*.tsv')
+    for path in paths:
+        try:
+            validate_tsv_columns(path)
+        except Exception:
+            pass
+    return len(paths)
+
+
+# Stages run inside a child process; the ones listed twice measure a cold and a warm cache
+IN_PROCESS_STAGES = {
+    'scan': stage_scan,
+    'phase1_index_cold': stage_phase1_index,
+    'phase1_index_warm': stage_phase1_index,
+    'filename_rules': stage_filename_rules,
+    'tsv_inspection': stage_tsv_inspection,
+    'wav_inspection': stage_wav_inspection,
+    'image_catalog_cold': stage_image_catalog,
+    'image_catalog_warm': stage_image_catalog,
+    'transcription_columns': stage_transcription_columns,
+}
+
+
+def audio_checker_command(corpus, workdir, workers):
+    output = os.path.join(workdir, f'audio_output_w{workers}')
+    os.makedirs(output, exist_ok=True)
+    return [sys.executable, os.path.join(REPO_ROOT, 'audio_all_checks_combined_S_V.py'),
+            '--main_root_folder', os.path.join(corpus, 'raw'),
+            '--phase1_tsv_folder', os.path.join(corpus, 'phase1'),
+            '--txt_file_path', os.path.join(corpus, 'state_district_mapping.txt'),
+            '--xls_file_path', os.path.join(corpus, 'Images_Phase2.xlsx'),
+            '--output_file_path', output,
+            '--phase1_audio_folder', os.path.join(corpus, 'phase1_audio'),
+            '--workers', str(workers), '--no_cache', '--check_wav_headers', '--check_segment_timeline', '--check_charset']
+
+
+def transcription_checker_command(corpus, workdir):
+    return [sys.executable, os.path.join(REPO_ROOT, 'transcription_checks.py'),
+            os.path.join(corpus, 'transcription'), os.path.join(workdir, 'transcription_result.tsv'),
+            '--audio_root_folder', os.path.join(corpus, 'raw'), '--check_charset']
+
+
+def run_measured(command):
+    """Run command in a child process and return (seconds, peak_rss_mb, returncode, stdout)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=REPO_ROOT)
+    stdout = process.stdout.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    # The child was reaped by wait4; record its status so Popen does not wait again
+    process.returncode = os.waitstatus_to_exitcode(status)
+    process.stdout.close()
+    # ru_maxrss is reported in kilobytes on Linux
+    return seconds, rusage.ru_maxrss / 1024, process.returncode, stdout.decode('utf-8', 'replace')
+
+
+def benchmark_corpus(corpus, workdir, description, workers):
+    counts = {
+        'raw_files': len(corpus_files(corpus, 'raw/*/*/*/*')),
+        'transcription_files': len(corpus_files(corpus, 'transcription/*/*/*.tsv')),
+    }
+    results = []
+    for stage in IN_PROCESS_STAGES:
+        command = [sys.executable, os.path.abspath(__file__), '--run_stage', stage, '--corpus', corpus, '--workdir', workdir]
+        seconds, rss, returncode, stdout = run_measured(command)
+        items = json.loads(stdout)['items'] if returncode == 0 else None
+        results.append(stage_result(stage, seconds, items, rss, returncode))
+
+    full_runs = [('audio_checker_w1', audio_checker_command(corpus, workdir, 1), counts['raw_files'])]
+    if workers > 1:
+        full_runs.append((f'audio_checker_w{workers}', audio_checker_command(corpus, workdir, workers), counts['raw_files']))
+    full_runs.append(('transcription_checker', transcription_checker_command(corpus, workdir), counts['transcription_files']))
+    for stage, command, items in full_runs:
+        seconds, rss, returncode, _ = run_measured(command)
+        results.append(stage_result(stage, seconds, items, rss, returncode))
+
+    return {'speaker_folders': description['speaker_folders'], 'params': description['params'], 'counts': counts, 'stages': results}
+
+
+def stage_result(stage, seconds, items, rss, returncode):
+    """Record one stage; a stage that failed gets no timing, so it cannot pass for a fast run."""
+    failed = returncode != 0
+    return {
+        'stage': stage,
+        'seconds': None if failed else round(seconds, 4),
+        'items': items,
+        'items_per_sec': round(items / seconds, 1) if not failed and items and seconds > 0 else None,
+        'peak_rss_mb': round(rss, 1),
+        'returncode': returncode,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, workers, output, corpus_root=None, keep_corpus=False, seed=0):
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'runs': [],
+    }
+    root = corpus_root or tempfile.mkdtemp(prefix='vaani_bench_')
+    try:
+        for size in sizes:
+            corpus = os.path.join(root, f'corpus_{size}')
+            workdir = os.path.join(root, f'work_{size}')
+            shutil.rmtree(workdir, ignore_errors=True)
+            os.makedirs(workdir)
+            if not os.path.exists(os.path.join(corpus, 'corpus.json')):
+                generate_corpus(corpus, speakers=size, seed=seed)
+            with open(os.path.join(corpus, 'corpus.json'), encoding='utf-8') as file:
+                description = json.load(file)
+            print(f"Benchmarking {description['speaker_folders']} speaker folders...")
+            run = benchmark_corpus(corpus, workdir, description, workers)
+            for result in run['stages']:
+                seconds = 'failed' if result['seconds'] is None else f"{result['seconds']:.3f} s"
+                print(f"  {result['stage']:<24} {seconds:>11}  {result['items_per_sec'] or '-':>10} items/s  "
+                      f"{result['peak_rss_mb']:>8.1f} MB  rc={result['returncode']}")
+            report['runs'].append(run)
+    finally:
+        if not keep_corpus and corpus_root is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {output}")
+    return report
+
+
+def compare_reports(old_path, new_path):
+    """Print the per-stage ratio of two results files; stages that failed in either one are listed as skipped."""
+    with open(old_path, encoding='utf-8') as file:
+        old = json.load(file)
+    with open(new_path, encoding='utf-8') as file:
+        new = json.load(file)
+    old_stages = {(run['speaker_folders'], result['stage']): result for run in old['runs'] for result in run['stages']}
+    print(f"{'folders':>8} {'stage':<24} {'old s':>9} {'new s':>9} {'ratio':>7} {'old MB':>8} {'new MB':>8}")
+    for run in new['runs']:
+        for result in run['stages']:
+            before = old_stages.get((run['speaker_folders'], result['stage']))
+            if before is None:
+                continue
+            if before['seconds'] is None or result['seconds'] is None:
+                print(f"{run['speaker_folders']:>8} {result['stage']:<24} skipped: the stage failed "
+                      f"(rc={before['returncode']} old, rc={result['returncode']} new)")
+                continue
+            ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('nan')
+            print(f"{run['speaker_folders']:>8} {result['stage']:<24} {before['seconds']:>9.3f} {result['seconds']:>9.3f} "
+                  f"{ratio:>7.2f} {before['peak_rss_mb']:>8.1f} {result['peak_rss_mb']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the audio and transcription checkers on synthetic corpora.')
+    parser.add_argument('--sizes', type=str, default='5,20,80', help='Comma-separated speaker folders per district, one corpus each')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Workers for the parallel audio checker run')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='Path of the JSON results file')
+    parser.add_argument('--corpus_root', type=str, help='Reuse or keep generated corpora in this folder')
+    parser.add_argument('--keep_corpus', action='store_true', help='Do not delete the generated corpora')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus generator seed')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two results files instead of running')
+    parser.add_argument('--run_stage', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--corpus', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        print(json.dumps({'items': IN_PROCESS_STAGES[args.run_stage](args.corpus, args.workdir)}))
+    elif args.compare:
+        compare_reports(*args.compare)
+    else:
+        run_benchmarks([int(size) for size in args.sizes.split(',')], args.workers, args.output,
+                       args.corpus_root, args.keep_corpus, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Character-set checks of transcripts and segment TSVs against the script of their language.
+
+Every script has a lookup table that puts each codepoint of the Basic
+Multilingual Plane into one class: allowed everywhere (ASCII, common
+punctuation, the danda), a letter of the script, a zero-width joiner or
+non-joiner, a control or invisible formatting character, or other (a
+character of another script, which is wrong here). Codepoints above the BMP
+count as other. A whole column or file is joined into one string and screened
+with a compiled regex of the characters that are always fine, which is all a
+clean text costs. Only a text that fails the screen is turned into a NumPy
+array of codepoints with encode('utf-32'). That array is classified with one
+table lookup, and the offending positions are mapped back to their rows with
+searchsorted. There is no Python loop over characters on either path.
+
+The script is chosen by the state (or, for a few districts, the district)
+taken from the file name. Names that are not known get a table that allows
+every script, so only control characters and misplaced joiners are reported.
+"""
+
+import functools
+import re
+import numpy as np
+
+# Codepoint classes
+OTHER, ALLOWED, LETTER, JOINER, CONTROL = range(5)
+
+# Issues reported by find_issues()
+WRONG_SCRIPT = 'wrong_script'
+CONTROL_CHARACTER = 'control_character'
+MISPLACED_JOINER = 'misplaced_joiner'
+ISSUES = (WRONG_SCRIPT, CONTROL_CHARACTER, MISPLACED_JOINER)
+
+SCRIPT_BLOCKS = {
+    'devanagari': ((0x0900, 0x097F), (0xA8E0, 0xA8FF)),
+    'bengali': ((0x0980, 0x09FF),),
+    'gurmukhi': ((0x0A00, 0x0A7F),),
+    'gujarati': ((0x0A80, 0x0AFF),),
+    'oriya': ((0x0B00, 0x0B7F),),
+    'tamil': ((0x0B80, 0x0BFF),),
+    'telugu': ((0x0C00, 0x0C7F),),
+    'kannada': ((0x0C80, 0x0CFF),),
+    'malayalam': ((0x0D00, 0x0D7F),),
+    'arabic': ((0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFE)),
+}
+# Used for names that are not in the tables below
+ANY_SCRIPT = 'any'
+
+# Keys are lower-cased with everything but letters removed, so 'Andhra Pradesh',
+# 'Andhra-Pradesh' and 'AndhraPradesh' are the same state
+STATE_SCRIPTS = {
+    'andhrapradesh': 'telugu',
+    'telangana': 'telugu',
+    'karnataka': 'kannada',
+    'kerala': 'malayalam',
+    'tamilnadu': 'tamil',
+    'puducherry': 'tamil',
+    'odisha': 'oriya',
+    'westbengal': 'bengali',
+    'assam': 'bengali',
+    'tripura': 'bengali',
+    'gujarat': 'gujarati',
+    'punjab': 'gurmukhi',
+    'bihar': 'devanagari',
+    'jharkhand': 'devanagari',
+    'chhattisgarh': 'devanagari',
+    'madhyapradesh': 'devanagari',
+    'uttarpradesh': 'devanagari',
+    'uttarakhand': 'devanagari',
+    'rajasthan': 'devanagari',
+    'haryana': 'devanagari',
+    'himachalpradesh': 'devanagari',
+    'delhi': 'devanagari',
+    'maharashtra': 'devanagari',
+    'goa': 'devanagari',
+}
+# Districts whose language is written in another script than their state's
+DISTRICT_SCRIPTS = {
+    'darjeeling': 'devanagari',
+    'kalimpong': 'devanagari',
+}
+
+COMMON_RANGES = ((0x20, 0x7E), (0x0964, 0x0965), (0x00A0, 0x00A0), (0x2013, 0x2014), (0x2018, 0x201D), (0x2026, 0x2026))
+# Tab, newline and carriage return delimit the TSVs and are checked separately (TRXN_E4, SPK-E20)
+STRUCTURE_CHARACTERS = (0x09, 0x0A, 0x0D)
+CONTROL_RANGES = ((0x00, 0x1F), (0x7F, 0x9F), (0x00AD, 0x00AD), (0x200B, 0x200B), (0x200E, 0x200F), (0x202A, 0x202E),
+                  (0x2060, 0x2064), (0xFEFF, 0xFEFF))
+JOINERS = (0x200C, 0x200D)
+INDIC_RANGE = (0x0900, 0x0DFF)
+
+TABLE_SIZE = 0x10000
+# Codepoints reported per issue, and rows reported per codepoint
+MAX_REPORTED_CODEPOINTS = 10
+MAX_REPORTED_ROWS = 5
+
+
+def name_key(name):
+    return re.sub(r'[^a-z]', '', name.lower()) if isinstance(name, str) else ''
+
+
+def script_for(state, district=None):
+    """Return the script of the language spoken in state/district, or ANY_SCRIPT when it is not known."""
+    return DISTRICT_SCRIPTS.get(name_key(district)) or STATE_SCRIPTS.get(name_key(state), ANY_SCRIPT)
+
+
+@functools.lru_cache(maxsize=None)
+def script_table(script):
+    """Return the codepoint class table of script, built once per process."""
+    table = np.full(TABLE_SIZE, OTHER, dtype=np.uint8)
+    if script == ANY_SCRIPT:
+        table[:] = ALLOWED
+        table[INDIC_RANGE[0]:INDIC_RANGE[1] + 1] = LETTER
+    else:
+        for first, last in COMMON_RANGES:
+            table[first:last + 1] = ALLOWED
+        for first, last in SCRIPT_BLOCKS[script]:
+            table[first:last + 1] = LETTER
+        # The dandas sit in the Devanagari block but are shared by every Indic script
+        table[0x0964:0x0966] = ALLOWED
+    for first, last in CONTROL_RANGES:
+        table[first:last + 1] = CONTROL
+    table[list(STRUCTURE_CHARACTERS)] = ALLOWED
+    table[list(JOINERS)] = JOINER
+    # U+FFFF stands in for every codepoint above the BMP
+    table[TABLE_SIZE - 1] = ALLOWED if script == ANY_SCRIPT else OTHER
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def screen_pattern(script):
+    """Return a regex that finds the first character of a text that is not plainly fine for script."""
+    table = script_table(script)
+    fine = (table == ALLOWED) | (table == LETTER)
+    edges = np.flatnonzero(np.diff(np.r_[0, fine.astype(np.int8), 0]))
+    ranges = ''.join(f"{re.escape(chr(first))}-{re.escape(chr(end - 1))}" for first, end in zip(edges[::2], edges[1::2]))
+    if fine[TABLE_SIZE - 1]:
+        ranges += '\U00010000-\U0010ffff'
+    return re.compile(f'[^{ranges}]')
+
+
+def codepoints(text):
+    return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+
+def find_issues(cps, table, cell_ends):
+    """Return {issue: (codepoints, cells)} of the offending characters in cps.
+
+    cell_ends holds the exclusive end offset of every cell (or line) in cps,
+    in order; cells are numbered from 0. A joiner is only in place between two
+    letters of the script inside one cell.
+    """
+    classes = table[np.minimum(cps, TABLE_SIZE - 1)]
+    cell_starts = np.r_[0, cell_ends[:-1]]
+    issues = {}
+
+    for issue, positions in ((WRONG_SCRIPT, np.flatnonzero(classes == OTHER)), (CONTROL_CHARACTER, np.flatnonzero(classes == CONTROL))):
+        if len(positions):
+            issues[issue] = (cps[positions], np.searchsorted(cell_ends, positions, side='right'))
+
+    joiners = np.flatnonzero(classes == JOINER)
+    if len(joiners):
+        cells = np.searchsorted(cell_ends, joiners, side='right')
+        after_letter = (joiners > cell_starts[cells]) & (classes[np.maximum(joiners - 1, 0)] == LETTER)
+        before_letter = (joiners + 1 < cell_ends[cells]) & (classes[np.minimum(joiners + 1, len(classes) - 1)] == LETTER)
+        misplaced = ~(after_letter & before_letter)
+        if misplaced.any():
+            issues[MISPLACED_JOINER] = (cps[joiners[misplaced]], cells[misplaced])
+    return issues
+
+
+def scan_column(values, script):
+    """Check a pandas Series of strings; the cells of the result are the Series' index labels."""
+    values = values.dropna()
+    text = ''.join(values.tolist())
+    if screen_pattern(script).search(text) is None:
+        return {}
+    cell_ends = np.cumsum(values.str.len().to_numpy(dtype=np.int64))
+    issues = find_issues(codepoints(text), script_table(script), cell_ends)
+    labels = values.index.to_numpy()
+    return {issue: (cps, labels[cells]) for issue, (cps, cells) in issues.items()}
+
+
+def scan_buffer(buffer, script):
+    """Check the UTF-8 contents of a file; the cells of the result are its 0-based line numbers."""
+    text = bytes(buffer).decode('utf-8', errors='replace')
+    if screen_pattern(script).search(text) is None:
+        return {}
+    cps = codepoints(text)
+    cell_ends = np.r_[np.flatnonzero(cps == 0x0A) + 1, len(cps)]
+    return find_issues(cps, script_table(script), cell_ends)
+
+
+def merge_issues(parts):
+    """Concatenate the {issue: (codepoints, cells)} results of several scans."""
+    merged = {}
+    for part in parts:
+        for issue, (cps, cells) in part.items():
+            merged.setdefault(issue, []).append((cps, cells))
+    return {issue: (np.concatenate([cps for cps, _ in arrays]), np.concatenate([cells for _, cells in arrays]))
+            for issue, arrays in merged.items()}
+
+
+def describe(cps, cells):
+    """Summarize offending codepoints as 'U+0B95 x12 rows 3 7 19; ...', most frequent first."""
+    values, counts = np.unique(cps, return_counts=True)
+    order = np.argsort(-counts, kind='stable')[:MAX_REPORTED_CODEPOINTS]
+    parts = []
+    for value, count in zip(values[order], counts[order]):
+        rows = np.unique(cells[cps == value])[:MAX_REPORTED_ROWS]
+        parts.append(f"U+{int(value):04X} x{int(count)} rows {' '.join(str(int(row)) for row in rows)}")
+    if len(values) > MAX_REPORTED_CODEPOINTS:
+        parts.append(f"{len(values) - MAX_REPORTED_CODEPOINTS} more codepoints")
+    return '; '.join(parts)
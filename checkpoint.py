@@ -0,0 +1,106 @@
+"""Append-only checkpoint of the speaker folders a run has finished.
+
+Every finished folder is appended as one frame: the payload length, its
+CRC-32 and the zlib-compressed pickle of (folder fingerprint, partial result).
+Frames are flushed and fsynced every few folders. A crash can therefore only
+lose, or tear, the frames written since the last sync, and a torn frame fails
+its length or CRC check and is discarded on resume. The first frame records
+the fingerprint of the run settings, so a checkpoint is only resumed by a run
+with the same settings. Each record is only replayed while its folder still
+has the same fingerprint.
+"""
+
+import os
+import pickle
+import struct
+import zlib
+
+CHECKPOINT_FORMAT = 1
+FRAME_HEADER = struct.Struct('<QI')
+
+
+def encode_frame(value):
+    payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_frames(file):
+    """Yield (value, end_offset) for every intact frame, stopping at the first torn one."""
+    while True:
+        header = file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        size, crc = FRAME_HEADER.unpack(header)
+        payload = file.read(size)
+        if len(payload) < size or zlib.crc32(payload) != crc:
+            return
+        yield pickle.loads(zlib.decompress(payload)), file.tell()
+
+
+def resumable_records(path, run_fingerprint, folder_fingerprints):
+    """Return (count, end_offset) of the leading checkpoint records that still match this run."""
+    count = end_offset = 0
+    try:
+        with open(path, 'rb') as file:
+            frames = iter_frames(file)
+            header = next(frames, None)
+            if header is None or header[0] != {'format': CHECKPOINT_FORMAT, 'run': run_fingerprint}:
+                return 0, 0
+            end_offset = header[1]
+            for ((folder_fp, _), offset), expected in zip(frames, folder_fingerprints):
+                if folder_fp != expected:
+                    break
+                count, end_offset = count + 1, offset
+    except OSError:
+        return 0, 0
+    return count, end_offset
+
+
+def replay_records(path, count):
+    """Yield the partial results of the first count records."""
+    if count == 0:
+        return
+    with open(path, 'rb') as file:
+        frames = iter_frames(file)
+        next(frames)
+        for index, ((_, partial), _) in enumerate(frames):
+            yield partial
+            if index + 1 == count:
+                return
+
+
+class CheckpointWriter:
+    def __init__(self, path, run_fingerprint, every, resume_offset=0):
+        """Open the checkpoint at path, keeping its first resume_offset bytes or starting it anew."""
+        self.every = every
+        self.pending = 0
+        if resume_offset:
+            self.file = open(path, 'r+b')
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(encode_frame({'format': CHECKPOINT_FORMAT, 'run': run_fingerprint}))
+            self.sync()
+
+    def add(self, folder_fingerprint, partial):
+        self.file.write(encode_frame((folder_fingerprint, partial)))
+        self.pending += 1
+        if self.pending >= self.every:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+
+def record_partials(writer, folder_fingerprints, partials):
+    """Pass partials through, appending each one to the checkpoint first."""
+    for folder_fp, partial in zip(folder_fingerprints, partials):
+        writer.add(folder_fp, partial)
+        yield partial
@@ -0,0 +1,37 @@
+"""Error codes of the Phase 2 audio checks (SPK-*), keyed by the finding they report.
+
+Kept apart from the checker so that light-weight callers, such as the name
+checks of validation_api, can map findings to codes without loading pandas.
+"""
+
+# Error codes as specified
+ERROR_CODES = {
+    'State or district mismatch': 'SPK-E12',
+    'Filename contains space': 'SPK-E13',
+    'Incorrect number of underscores': 'SPK-E14',
+    'Image district mismatch': 'SPK-E15',
+    'Incorrect number of underscores in .txt': 'SPK-E16',
+    'Repeated speaker ID': 'SPK-E17',
+    'Repeated utterance ID': 'SPK-E18',
+    'TSV file does not end with newline': 'SPK-E19',
+    'Unicode character in TSV file': 'SPK-E20',
+    'Mismatched Speaker ID from the meta-data': 'SPK-E21',
+    'Speaker_ID not found in meta-data': 'SPK-E22',
+    'No .txt file found (meta-data)': 'SPK-E23',
+    'Non-numeric uttID': 'SPK-E24',
+    'Not Present in database of images': 'SPK-E25',
+    'Incorrect Audio Extension not .wav': 'SPK-E26',
+    'Total duration out of range': 'SPK-E27',
+    'Invalid WAV header': 'SPK-E28',
+    'WAV format not as specified': 'SPK-E29',
+    'WAV data chunk truncated': 'SPK-E30',
+    'TSV segment ends after the audio': 'SPK-E31',
+    'Duplicate of Phase 1 audio': 'SPK-E32',
+    'Negative segment duration': 'SPK-E33',
+    'Overlapping segments': 'SPK-E34',
+    'Segments out of order': 'SPK-E35',
+    'Character outside the language script in TSV file': 'SPK-E36',
+    'Control character in TSV file': 'SPK-E37',
+    'Misplaced zero-width joiner in TSV file': 'SPK-E38',
+    'Exception occurred': 'SPK-E99',
+}
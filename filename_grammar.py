@@ -0,0 +1,96 @@
+"""Parser for Phase 2 file names.
+
+Audio and segment files are named STATE_DISTRICT_SPEAKER_UTT_IMG-x_y.ext and
+the speaker metadata STATE_DISTRICT_SPEAKER.txt. A name is split on '_'
+exactly as the checks always did, so the extension stays attached to the last
+part. parse_filename() turns one name into a FileName record and
+name_rule_violations() applies the naming rules to it.
+"""
+
+from collections import namedtuple
+
+AUDIO_EXTENSIONS = ('.wav', '.tsv')
+NAMED_EXTENSIONS = ('.wav', '.tsv', '.txt')
+OTHER_AUDIO_EXTENSIONS = ('.mp3', '.flac', '.aac', '.ogg', '.wma', '.alac')
+
+FileName = namedtuple('FileName', ['name', 'ext', 'state', 'district', 'speaker', 'utt', 'image', 'image_id',
+                                   'underscore_count', 'has_space', 'image_district_mismatch', 'utt_is_numeric'])
+
+# Rule names match the ERROR_CODES keys of error_codes.py
+SPACE_RULE = 'Filename contains space'
+UNDERSCORE_RULE = 'Incorrect number of underscores'
+IMAGE_DISTRICT_RULE = 'Image district mismatch'
+TXT_UNDERSCORE_RULE = 'Incorrect number of underscores in .txt'
+STATE_DISTRICT_RULE = 'State or district mismatch'
+UTT_ID_RULE = 'Non-numeric uttID'
+AUDIO_EXTENSION_RULE = 'Incorrect Audio Extension not .wav'
+
+# The order in which the checks report the naming rules a file breaks
+NAME_RULES = (SPACE_RULE, UNDERSCORE_RULE, IMAGE_DISTRICT_RULE, TXT_UNDERSCORE_RULE, STATE_DISTRICT_RULE, UTT_ID_RULE,
+              AUDIO_EXTENSION_RULE)
+
+
+def is_numeric(s):
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+
+def file_extension(name):
+    dot = name.rfind('.')
+    return name[dot:] if dot != -1 else ''
+
+
+def build_image_id(image, image_suffix):
+    if image is None:
+        joined = ''
+    elif image_suffix is None:
+        joined = image
+    else:
+        joined = image + '_' + image_suffix
+    return joined.split('.')[0] + '.jpg'
+
+
+def parse_filename(name):
+    # The first six '_'-separated parts, missing ones as None; anything after the sixth is ignored
+    parts = name.split('_', 6)
+    state, district, speaker, utt, image, image_suffix = parts[:6] if len(parts) >= 6 else parts + [None] * (6 - len(parts))
+    # Fields in FileName order; plain digit strings skip float()
+    return FileName(
+        name,
+        file_extension(name),
+        state,
+        district,
+        speaker,
+        utt,
+        image,
+        build_image_id(image, image_suffix),
+        name.count('_'),
+        ' ' in name,
+        image is not None and '-' in image and image.split('-')[0] != district,
+        utt is None or (utt.isascii() and utt.isdigit()) or is_numeric(utt),
+    )
+
+
+def name_rule_violations(name, txt_unique_states, txt_unique_districts):
+    """Return the naming rules a parse_filename() record breaks, in NAME_RULES order."""
+    audio = name.ext in AUDIO_EXTENSIONS
+    broken = []
+    if audio and name.has_space:
+        broken.append(SPACE_RULE)
+    if audio and name.underscore_count != 5:
+        broken.append(UNDERSCORE_RULE)
+    if audio and name.image_district_mismatch:
+        broken.append(IMAGE_DISTRICT_RULE)
+    if name.ext == '.txt' and name.underscore_count != 2:
+        broken.append(TXT_UNDERSCORE_RULE)
+    if name.ext in NAMED_EXTENSIONS and not (name.state in txt_unique_states and name.district in txt_unique_districts):
+        broken.append(STATE_DISTRICT_RULE)
+    if audio and not name.utt_is_numeric:
+        broken.append(UTT_ID_RULE)
+    if name.name.lower().endswith(OTHER_AUDIO_EXTENSIONS):
+        broken.append(AUDIO_EXTENSION_RULE)
+    return broken
+
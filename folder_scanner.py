@@ -0,0 +1,77 @@
+"""Single-pass scanner for a Phase 2 delivery laid out as state/district/speaker folders.
+
+Each speaker folder is listed exactly once with os.scandir and turned into a
+SpeakerFolder record. The checks in audio_all_checks_combined_S_V.py read file
+names, extensions, sizes and mtimes from that record instead of going back to
+the filesystem.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+FileEntry = namedtuple('FileEntry', ['name', 'size', 'mtime_ns'])
+
+# files keeps the directory listing order; by_ext maps an extension such as
+# '.wav' to the file names carrying it, in the same order.
+SpeakerFolder = namedtuple('SpeakerFolder', ['state', 'district', 'speaker', 'path', 'district_path', 'files', 'by_ext'])
+
+
+def file_extension(file_name):
+    return os.path.splitext(file_name)[1]
+
+
+def build_speaker_folder(state, district, speaker, path, district_path, files):
+    by_ext = {}
+    for entry in files:
+        by_ext.setdefault(file_extension(entry.name), []).append(entry.name)
+    return SpeakerFolder(state, district, speaker, path, district_path, tuple(files),
+                         {ext: tuple(names) for ext, names in by_ext.items()})
+
+
+def _subdirectories(folder_path):
+    with os.scandir(folder_path) as it:
+        return [entry for entry in it if entry.is_dir()]
+
+
+def scan_speaker_folder(state, district, speaker, path, district_path):
+    files = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_file():
+                st = entry.stat()
+                files.append(FileEntry(entry.name, st.st_size, st.st_mtime_ns))
+    return build_speaker_folder(state, district, speaker, path, district_path, files)
+
+
+def list_speaker_locations(main_root_folder):
+    """Return (state, district, speaker, path, district_path) for every speaker folder, in listing order."""
+    locations = []
+    for state_entry in _subdirectories(main_root_folder):
+        for district_entry in _subdirectories(state_entry.path):
+            for speaker_entry in _subdirectories(district_entry.path):
+                locations.append((state_entry.name, district_entry.name, speaker_entry.name,
+                                  speaker_entry.path, district_entry.path))
+    return locations
+
+
+def location_relative_path(location):
+    state, district, speaker = location[:3]
+    return f'{state}/{district}/{speaker}'
+
+
+def scan_locations(locations, io_threads=1):
+    """List the files of the given speaker folder locations, concurrently with io_threads > 1."""
+    if io_threads > 1:
+        with ThreadPoolExecutor(io_threads) as executor:
+            return list(executor.map(lambda location: scan_speaker_folder(*location), locations))
+    return [scan_speaker_folder(*location) for location in locations]
+
+
+def scan_root(main_root_folder, io_threads=1):
+    """Walk main_root_folder once and return a SpeakerFolder per speaker folder, in listing order.
+
+    With io_threads > 1 the speaker folders are listed concurrently, which
+    hides the per-call latency of network storage.
+    """
+    return scan_locations(list_speaker_locations(main_root_folder), io_threads)
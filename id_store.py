@@ -0,0 +1,59 @@
+"""Compact sets of speaker and utterance IDs for the repeat checks.
+
+Almost every ID is a plain decimal number. Those are kept in one sorted int64
+NumPy array, 8 bytes each instead of a str object in a hash set, and
+intersected with np.intersect1d. Only IDs that would not survive the round
+trip through an integer (leading zeros, other characters, more than 18
+digits) go to an ordinary set. Added IDs are buffered and merged into the
+array in bulk.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Decimal IDs that convert to int64 and back to the same string
+NUMERIC_ID_PATTERN = r'(?:0|[1-9][0-9]{0,17})'
+# Buffered IDs are merged into the array once there are this many, or as many as it holds
+COMPACT_ROWS = 1 << 16
+
+
+def encode_ids(values):
+    """Split string IDs into (sorted unique int64 array, set of the IDs that are not kept as numbers)."""
+    ids = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    numeric = ids.str.fullmatch(NUMERIC_ID_PATTERN, na=False).to_numpy(dtype=bool)
+    return np.unique(ids[numeric].astype(np.int64).to_numpy()), set(ids[~numeric].dropna())
+
+
+class IdSet:
+    def __init__(self, values=()):
+        self.numbers = np.zeros(0, dtype=np.int64)
+        self.others = set()
+        self.pending = []
+        self.pending_rows = 0
+        self.update(values)
+
+    def update(self, values):
+        numbers, others = encode_ids(values)
+        self.others |= others
+        if len(numbers):
+            self.pending.append(numbers)
+            self.pending_rows += len(numbers)
+            if self.pending_rows >= max(COMPACT_ROWS, len(self.numbers)):
+                self.compact()
+
+    def compact(self):
+        if self.pending:
+            self.numbers = np.unique(np.concatenate([self.numbers] + self.pending))
+            self.pending = []
+            self.pending_rows = 0
+
+    def __len__(self):
+        self.compact()
+        return len(self.numbers) + len(self.others)
+
+    def intersection(self, other):
+        """Return the IDs in both sets as a set of strings."""
+        self.compact()
+        other.compact()
+        common = np.intersect1d(self.numbers, other.numbers, assume_unique=True)
+        return {str(number) for number in common.tolist()} | (self.others & other.others)
@@ -0,0 +1,79 @@
+"""Compiled catalog of the image file names listed in Images_Phase2.xlsx.
+
+Parsing the workbook with openpyxl is slow, so the 'Filename' columns of both
+sheets are compiled once into a small JSON cache keyed on the workbook path,
+size, mtime and SHA-1. Later runs load the cache instead of the workbook as
+long as the workbook is unchanged.
+"""
+
+import hashlib
+import json
+import os
+import pandas as pd
+
+CATALOG_SHEETS = ('DistrictSpecificImages', 'GenericImages')
+CACHE_FORMAT = 1
+
+
+def workbook_digest(xls_file):
+    digest = hashlib.sha1()
+    with open(xls_file, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ImageCatalog:
+    def __init__(self, filenames):
+        self.filenames = pd.Index(sorted(set(filenames)))
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def __contains__(self, image_id):
+        return image_id in self.filenames
+
+    def contains(self, image_ids):
+        """Return a boolean array telling, for each of image_ids, whether it is in the catalog."""
+        return pd.Index(list(image_ids), dtype=object).isin(self.filenames)
+
+    @classmethod
+    def from_workbook(cls, xls_file):
+        filenames = []
+        for sheet_name in CATALOG_SHEETS:
+            df = pd.read_excel(xls_file, sheet_name=sheet_name)
+            filenames.extend(name for name in df['Filename'] if isinstance(name, str))
+        return cls(filenames)
+
+    @classmethod
+    def load(cls, xls_file, cache_path=None):
+        """Load the catalog for xls_file, from cache_path when it matches the workbook."""
+        if cache_path is None:
+            return cls.from_workbook(xls_file)
+
+        st = os.stat(xls_file)
+        key = {'format': CACHE_FORMAT, 'workbook': os.path.abspath(xls_file), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        cached = None
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+        except (OSError, ValueError):
+            pass
+
+        if cached is not None and all(cached.get(field) == value for field, value in key.items()):
+            return cls(cached['filenames'])
+
+        # The workbook was touched or moved; a matching hash means the contents are the same
+        sha1 = workbook_digest(xls_file)
+        if cached is not None and cached.get('format') == CACHE_FORMAT and cached.get('sha1') == sha1:
+            catalog = cls(cached['filenames'])
+        else:
+            catalog = cls.from_workbook(xls_file)
+        catalog.save(cache_path, dict(key, sha1=sha1))
+        return catalog
+
+    def save(self, cache_path, key):
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(dict(key, filenames=list(self.filenames)), file)
+        os.replace(tmp_path, cache_path)
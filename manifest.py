@@ -0,0 +1,188 @@
+"""Delivery manifests as a stand-in for walking the filesystem.
+
+A manifest lists one path per line, either on its own or as the TSV columns
+path, size, mtime and type, e.g. the output of
+    find ROOT -printf '%p\t%s\t%T@\t%y\n'
+mtime is in seconds since the epoch (fractions allowed). type is 'd' for a
+directory and 'f' for a file. A path ending in '/' is also taken as a
+directory, which is how empty folders are listed in a plain file list.
+Paths are absolute or relative to the root folder of the check. Plain and
+gzip-compressed manifests are both streamed line by line.
+
+load_manifest() builds a ManifestTree, which answers the listing questions
+the checks ask (subfolders, files, an os.walk() equivalent) from memory.
+scan_tree() builds the same tree from a single os.scandir walk of the disk.
+"""
+
+import gzip
+import os
+from decimal import Decimal, InvalidOperation
+from folder_scanner import FileEntry
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def open_manifest(manifest_path):
+    with open(manifest_path, 'rb') as file:
+        magic = file.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(manifest_path, 'rt', encoding='utf-8', newline='\n')
+    return open(manifest_path, 'r', encoding='utf-8', newline='\n')
+
+
+def parse_mtime_ns(text):
+    return int(Decimal(text) * 1000000000)
+
+
+def parse_manifest_line(line):
+    """Return (path, size, mtime_ns, is_dir) for one manifest line, or None for blank and comment lines."""
+    line = line.rstrip('\r\n')
+    if not line or line.startswith('#'):
+        return None
+    fields = line.split('\t')
+    path = fields[0]
+    size = int(fields[1]) if len(fields) > 1 and fields[1] else None
+    mtime_ns = parse_mtime_ns(fields[2]) if len(fields) > 2 and fields[2] else None
+    is_dir = path.endswith('/') or (len(fields) > 3 and fields[3] == 'd')
+    return path, size, mtime_ns, is_dir
+
+
+class ManifestTree:
+    def __init__(self, root):
+        self.root = root
+        # Both keyed by the folder path relative to root, as a tuple of names;
+        # children and files keep the order in which the manifest lists them.
+        self.children = {(): {}}
+        self.files = {(): []}
+        self.complete_metadata = True
+
+    def relative_parts(self, path):
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        parts = tuple(part for part in path.replace(os.sep, '/').split('/') if part not in ('', '.'))
+        if parts and parts[0] == '..':
+            return None
+        return parts
+
+    def add_folder(self, parts):
+        for depth in range(1, len(parts) + 1):
+            folder = parts[:depth]
+            if folder not in self.children:
+                self.children[folder] = {}
+                self.files[folder] = []
+                self.children[folder[:-1]][folder[-1]] = None
+
+    def add(self, path, size, mtime_ns, is_dir):
+        parts = self.relative_parts(path)
+        if parts is None:
+            return
+        if is_dir:
+            self.add_folder(parts)
+            return
+        if not parts:
+            return
+        self.add_folder(parts[:-1])
+        self.files[parts[:-1]].append(FileEntry(parts[-1], size, mtime_ns))
+        if size is None or mtime_ns is None:
+            self.complete_metadata = False
+
+    def remove_folder(self, parts):
+        for folder in [folder for folder in self.children if folder[:len(parts)] == parts]:
+            del self.children[folder]
+            del self.files[folder]
+        self.children[parts[:-1]].pop(parts[-1], None)
+
+    def path_of(self, parts):
+        return os.path.join(self.root, *parts)
+
+    def subfolders(self, parts=()):
+        return list(self.children.get(parts, ()))
+
+    def folder_files(self, parts=()):
+        return self.files.get(parts, [])
+
+    def walk(self, top):
+        """Yield (dirpath, dirnames, filenames) top-down for top, like os.walk()."""
+        parts = self.relative_parts(top)
+        if parts is None or parts not in self.children:
+            return
+        stack = [parts]
+        while stack:
+            folder = stack.pop()
+            dirpath = os.path.join(top, *folder[len(parts):])
+            dirnames = self.subfolders(folder)
+            yield dirpath, dirnames, [entry.name for entry in self.folder_files(folder)]
+            stack.extend(folder + (name,) for name in reversed(dirnames))
+
+    def speaker_locations(self):
+        """Return {(state, district, speaker, path, district_path): [FileEntry]} in manifest order."""
+        locations = {}
+        for state in self.subfolders():
+            for district in self.subfolders((state,)):
+                district_path = self.path_of((state, district))
+                for speaker in self.subfolders((state, district)):
+                    location = (state, district, speaker, os.path.join(district_path, speaker), district_path)
+                    locations[location] = self.folder_files((state, district, speaker))
+        return locations
+
+
+def scan_tree(root):
+    """List root recursively with os.scandir, into the tree load_manifest() builds.
+
+    Symlinked folders are followed, as the listdir/isdir walk of the checks
+    always did, unless they lead back to a folder above them. Folders that
+    cannot be listed are left out. File sizes and mtimes are not collected.
+    """
+    tree = ManifestTree(root)
+    try:
+        root_stat = os.stat(root)
+        stack = [((), frozenset([(root_stat.st_dev, root_stat.st_ino)]))]
+    except OSError:
+        stack = [((), frozenset())]
+    while stack:
+        parts, ancestors = stack.pop()
+        try:
+            with os.scandir(tree.path_of(parts)) as it:
+                entries = list(it)
+        except OSError:
+            if parts:
+                tree.remove_folder(parts)
+            continue
+        folders = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                tree.files[parts].append(FileEntry(entry.name, None, None))
+                continue
+            # (device, inode) of every folder from root down; a symlink back to one of them is a cycle
+            try:
+                target = entry.stat()
+            except OSError:
+                continue
+            folder_id = (target.st_dev, target.st_ino)
+            if folder_id in ancestors:
+                continue
+            folder_ancestors = ancestors | {folder_id}
+            folders.append((parts + (entry.name,), folder_ancestors))
+            tree.add_folder(parts + (entry.name,))
+        stack.extend(reversed(folders))
+    return tree
+
+
+def load_manifest(manifest_path, root):
+    tree = ManifestTree(root)
+    with open_manifest(manifest_path) as file:
+        for line_number, line in enumerate(file, 1):
+            try:
+                parsed = parse_manifest_line(line)
+            except (ValueError, InvalidOperation):
+                # A header row (path, size, mtime, ...) is skipped; anything else is an error
+                if line_number == 1:
+                    continue
+                raise ValueError(f"{manifest_path}:{line_number}: cannot parse manifest line {line.rstrip()!r}")
+            if parsed is not None:
+                tree.add(*parsed)
+    return tree
@@ -0,0 +1,119 @@
+"""Persistent index of the Phase 1 (speakerid, uttid) pairs.
+
+The Phase 1 TSVs carry the audio path of every utterance in their first
+column. Pairs are pulled out of that column with vectorized string operations
+and stored in a SQLite file together with the size and mtime of the TSV they
+came from, so later runs only re-parse Phase 1 files that are new or changed.
+The speaker and utterance IDs are read back in batches into compact IdSets
+rather than materialized as Python tuples.
+"""
+
+import os
+import sqlite3
+import pandas as pd
+from tqdm import tqdm
+from id_store import IdSet
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    file_id INTEGER NOT NULL,
+    speakerid TEXT NOT NULL,
+    uttid TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pairs_file_id ON pairs (file_id);
+"""
+
+# Rows fetched from the index per IdSet update
+FETCH_ROWS = 500000
+
+# <state>_<district>_<speakerid>_<uttid>[_...] -> speakerid, uttid
+SPEAKER_UTT_PATTERN = r'^[^_]*_[^_]*_(?P<speakerid>[^_]*)_(?P<uttid>[^_]*)'
+
+
+def extract_speaker_utt_pairs(first_column):
+    """Return a DataFrame of unique (speakerid, uttid) pairs from a column of absolute audio paths."""
+    paths = first_column[first_column.str.startswith('/', na=False)]
+    basenames = paths.str.rsplit('/', n=1).str[-1]
+    pairs = basenames.str.extract(SPEAKER_UTT_PATTERN)
+    return pairs.dropna().drop_duplicates()
+
+
+def extract_pairs_from_tsv(file_path, chunksize=100000):
+    pairs = set()
+    for chunk in pd.read_csv(file_path, sep='\t', usecols=[0], dtype=str, chunksize=chunksize):
+        extracted = extract_speaker_utt_pairs(chunk.iloc[:, 0])
+        pairs.update(zip(extracted['speakerid'], extracted['uttid']))
+    return pairs
+
+
+def list_phase1_files(folder_path_phase1):
+    files = {}
+    for root, dirs, names in os.walk(folder_path_phase1):
+        for name in names:
+            file_path = os.path.join(root, name)
+            st = os.stat(file_path)
+            files[file_path] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def read_id_set(conn, column):
+    ids = IdSet()
+    cursor = conn.execute(f"SELECT DISTINCT {column} FROM pairs")
+    while True:
+        rows = cursor.fetchmany(FETCH_ROWS)
+        if not rows:
+            return ids
+        ids.update(pd.Series([value for value, in rows], dtype=object))
+
+
+def load_phase1_id_sets(folder_path_phase1, index_path):
+    """Bring the index at index_path up to date with folder_path_phase1 and return its IDs.
+
+    Returns (speaker_ids, utt_ids, pair_count, errors): IdSets of the Phase 1
+    speaker and utterance IDs, the number of distinct pairs, and
+    (file_name, exception) for the TSVs that could not be parsed. Those files
+    are left out of the index so they are retried on the next run.
+    """
+    errors = []
+    current = list_phase1_files(folder_path_phase1)
+
+    conn = sqlite3.connect(index_path)
+    try:
+        conn.executescript(SCHEMA)
+        stored = {path: (file_id, size, mtime_ns)
+                  for file_id, path, size, mtime_ns in conn.execute("SELECT id, path, size, mtime_ns FROM files")}
+
+        stale = [file_id for path, (file_id, size, mtime_ns) in stored.items()
+                 if current.get(path) != (size, mtime_ns)]
+        with conn:
+            conn.executemany("DELETE FROM pairs WHERE file_id = ?", [(file_id,) for file_id in stale])
+            conn.executemany("DELETE FROM files WHERE id = ?", [(file_id,) for file_id in stale])
+
+        to_parse = [path for path, stat in current.items()
+                    if path not in stored or stored[path][1:] != stat]
+        for file_path in tqdm(to_parse, desc="Indexing Phase 1 TSV files"):
+            try:
+                pairs = extract_pairs_from_tsv(file_path)
+            except Exception as e:
+                errors.append((os.path.basename(file_path), e))
+                continue
+            size, mtime_ns = current[file_path]
+            with conn:
+                file_id = conn.execute("INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                                       (file_path, size, mtime_ns)).lastrowid
+                conn.executemany("INSERT INTO pairs (file_id, speakerid, uttid) VALUES (?, ?, ?)",
+                                 ((file_id, speakerid, uttid) for speakerid, uttid in pairs))
+
+        speaker_ids = read_id_set(conn, 'speakerid')
+        utt_ids = read_id_set(conn, 'uttid')
+        pair_count, = conn.execute("SELECT COUNT(*) FROM (SELECT DISTINCT speakerid, uttid FROM pairs)").fetchone()
+    finally:
+        conn.close()
+
+    return speaker_ids, utt_ids, pair_count, errors
@@ -0,0 +1,74 @@
+"""Read-ahead of the small files of the speaker folders, for slow network storage.
+
+On a network mount every open() and read() waits a few milliseconds, so the
+metadata .txt and segment TSVs of the upcoming speaker folders are read by a
+pool of I/O threads while the checks work on the current one. The checks then
+take the contents from memory. Read-ahead is bounded by a byte budget taken
+from the sizes the folder scanner already recorded. TSVs large enough to be
+memory-mapped, or whose size a manifest did not give, are left to the checks.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from tsv_inspector import MMAP_THRESHOLD
+
+PREFETCH_EXTENSIONS = ('.tsv', '.txt')
+PREFETCH_BYTES = 256 * 1024 * 1024
+
+
+def read_file(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+def prefetch_entries(speaker_folder):
+    return [entry for entry in speaker_folder.files
+            if os.path.splitext(entry.name)[1] in PREFETCH_EXTENSIONS and entry.size is not None and entry.size < MMAP_THRESHOLD]
+
+
+def submit_folder(executor, speaker_folder):
+    return {entry.name: executor.submit(read_file, os.path.join(speaker_folder.path, entry.name))
+            for entry in prefetch_entries(speaker_folder)}
+
+
+def collect(futures):
+    """Wait for the reads of one folder and return {file name: bytes}.
+
+    Files that could not be read are left out, so the checks open them
+    themselves and report the error exactly as without read-ahead.
+    """
+    contents = {}
+    for name, future in futures.items():
+        try:
+            contents[name] = future.result()
+        except OSError:
+            pass
+    return contents
+
+
+def prefetch_folder(speaker_folder, executor):
+    """Read the files of a single speaker folder concurrently."""
+    return collect(submit_folder(executor, speaker_folder))
+
+
+def iter_prefetched(speaker_folders, io_threads, max_bytes=PREFETCH_BYTES):
+    """Yield (speaker_folder, contents) in order, reading later folders ahead.
+
+    At most max_bytes of files are queued ahead of the consumer, but at least
+    one folder always is, however large it is.
+    """
+    with ThreadPoolExecutor(io_threads) as executor:
+        queued = deque()
+        queued_bytes = 0
+        for speaker_folder in speaker_folders:
+            size = sum(entry.size for entry in prefetch_entries(speaker_folder))
+            while queued and queued_bytes + size > max_bytes:
+                ready_folder, futures, ready_size = queued.popleft()
+                queued_bytes -= ready_size
+                yield ready_folder, collect(futures)
+            queued.append((speaker_folder, submit_folder(executor, speaker_folder), size))
+            queued_bytes += size
+        while queued:
+            ready_folder, futures, _ = queued.popleft()
+            yield ready_folder, collect(futures)
@@ -0,0 +1,128 @@
+"""Per-check timing and throughput counters for the --profile flag.
+
+Nothing here runs unless profiling is switched on: instrument() swaps the
+named functions of a module for timed wrappers only at that point, so a normal
+run calls the original functions directly. Latencies are kept per function in
+compact float arrays; stage() times the coarse pipeline steps. Worker
+processes hand their samples back with drain() and the parent folds them in
+with merge() before writing the report.
+"""
+
+import functools
+import json
+import os
+import time
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+
+enabled = False
+latencies = defaultdict(lambda: array('d'))
+bytes_read = defaultdict(int)
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def timed(name, func, count_bytes=None):
+    if getattr(func, 'profiled_name', None) is not None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latencies[name].append(time.perf_counter() - start)
+            if count_bytes is not None:
+                try:
+                    bytes_read[name] += count_bytes(*args, **kwargs)
+                except Exception:
+                    pass
+
+    wrapper.profiled_name = name
+    return wrapper
+
+
+def instrument(namespace, names, count_bytes=None):
+    """Replace namespace[name] for every name by a timed wrapper.
+
+    count_bytes optionally maps a name to a callable that receives the call's
+    arguments and returns the number of bytes that call read.
+    """
+    count_bytes = count_bytes or {}
+    for name in names:
+        namespace[name] = timed(name, namespace[name], count_bytes.get(name))
+
+
+@contextmanager
+def stage(name):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        latencies['stage:' + name].append(time.perf_counter() - start)
+
+
+def file_size(file_path, *args, **kwargs):
+    """count_bytes helper for functions whose first argument is the file they read."""
+    return os.path.getsize(file_path)
+
+
+def drain():
+    """Return the samples collected so far and reset them."""
+    samples = {'latencies': dict(latencies), 'bytes_read': dict(bytes_read)}
+    latencies.clear()
+    bytes_read.clear()
+    return samples
+
+
+def merge(samples):
+    for name, values in samples['latencies'].items():
+        latencies[name].extend(values)
+    for name, count in samples['bytes_read'].items():
+        bytes_read[name] += count
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def summary():
+    rows = []
+    for name in sorted(latencies, key=lambda n: -sum(latencies[n])):
+        values = sorted(latencies[name])
+        total = sum(values)
+        count = len(values)
+        nbytes = bytes_read.get(name, 0)
+        rows.append({
+            'name': name,
+            'calls': count,
+            'total_s': round(total, 6),
+            'mean_ms': round(1000 * total / count, 4) if count else 0.0,
+            'p50_ms': round(1000 * percentile(values, 0.50), 4),
+            'p99_ms': round(1000 * percentile(values, 0.99), 4),
+            'bytes_read': nbytes,
+            'calls_per_s': round(count / total, 1) if total else None,
+            'mb_per_s': round(nbytes / total / 1e6, 2) if total and nbytes else None,
+        })
+    return rows
+
+
+def write_report(path_prefix):
+    """Write the summary to <path_prefix>.json and <path_prefix>.tsv."""
+    import pandas as pd
+
+    rows = summary()
+    with open(path_prefix + '.json', 'w', encoding='utf-8') as file:
+        json.dump(rows, file, indent=2)
+    pd.DataFrame(rows).to_csv(path_prefix + '.tsv', sep='\t', index=False)
+    print(f"Profile report saved to {path_prefix}.json and {path_prefix}.tsv")
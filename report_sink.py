@@ -0,0 +1,126 @@
+"""Disk-backed collector for the findings written to Error_files.tsv.
+
+Findings are appended as (file, issue) pairs and spilled to sorted run files
+whenever the in-memory buffer is full, so memory stays flat however many
+findings a batch produces. write() merges the runs in two passes: the first
+groups the findings by file and drops repeated issues, the second puts the
+files back in the order they were first reported. The result is the same
+report the checker used to build from the in-memory log_entries dict.
+"""
+
+import csv
+import heapq
+import os
+import shutil
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+SPILL_ROWS = 200000
+# Runs merged at once; more runs are first merged into bigger ones
+MERGE_FANIN = 64
+
+
+def write_run(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        csv.writer(file, delimiter='\t').writerows(rows)
+
+
+def read_run(path, decode):
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.reader(file, delimiter='\t'):
+            yield decode(row)
+
+
+def decode_finding(row):
+    file, seq, issue = row
+    return file, int(seq), issue
+
+
+def decode_grouped(row):
+    first_seq, file, issues = row
+    return int(first_seq), file, issues
+
+
+class ReportSink:
+    def __init__(self, spill_dir=None, spill_rows=SPILL_ROWS):
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix='error_report_', dir=spill_dir)
+        self.spill_rows = spill_rows
+        self.buffer = []
+        self.runs = []
+        self.run_count = 0
+        self.seq = 0
+
+    def add(self, file, issue):
+        self.buffer.append((file, self.seq, issue))
+        self.seq += 1
+        if len(self.buffer) >= self.spill_rows:
+            self.runs.append(self.spill(self.buffer))
+            self.buffer = []
+
+    def add_entries(self, entries):
+        """Add every issue of a {file: [issues]} mapping such as log_entries."""
+        for file, issues in entries.items():
+            for issue in issues:
+                self.add(file, issue)
+
+    def spill(self, rows):
+        rows.sort()
+        path = os.path.join(self.spill_dir, f'run_{self.run_count}.tsv')
+        self.run_count += 1
+        write_run(path, rows)
+        return path
+
+    def merge_runs(self, runs, decode):
+        """Yield the rows of the sorted runs in order, merging at most MERGE_FANIN files at a time."""
+        while len(runs) > MERGE_FANIN:
+            batch, runs = runs[:MERGE_FANIN], runs[MERGE_FANIN:]
+            path = os.path.join(self.spill_dir, f'run_{self.run_count}.tsv')
+            self.run_count += 1
+            write_run(path, heapq.merge(*(read_run(run, decode) for run in batch)))
+            for run in batch:
+                os.remove(run)
+            runs.append(path)
+        return heapq.merge(*(read_run(run, decode) for run in runs))
+
+    def sorted_rows(self, rows, decode):
+        """Sort rows externally, spilling every spill_rows rows to a run."""
+        runs = []
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= self.spill_rows:
+                runs.append(self.spill(buffer))
+                buffer = []
+        if buffer:
+            runs.append(self.spill(buffer))
+        return self.merge_runs(runs, decode)
+
+    def grouped_by_file(self):
+        """Yield (first_seq, file, issues) per file, issues joined in the order first seen."""
+        runs = self.runs
+        if self.buffer:
+            runs = runs + [self.spill(self.buffer)]
+        self.runs, self.buffer = [], []
+        for file, findings in groupby(self.merge_runs(runs, decode_finding), key=itemgetter(0)):
+            first_seq = None
+            # A dict keeps the first occurrence of each issue, in order
+            issues = {}
+            for _, seq, issue in findings:
+                if first_seq is None:
+                    first_seq = seq
+                issues.setdefault(issue)
+            yield first_seq, file, ', '.join(issues)
+
+    def write(self, output_file):
+        """Write the File/Issue report to output_file, one row per file."""
+        with open(output_file, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file, delimiter='\t', lineterminator='\n')
+            writer.writerow(['File', 'Issue'])
+            for _, name, issues in self.sorted_rows(self.grouped_by_file(), decode_grouped):
+                writer.writerow([name, issues])
+
+    def close(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
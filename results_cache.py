@@ -0,0 +1,64 @@
+"""Cache of per-speaker-folder check results for incremental re-validation.
+
+Each speaker folder is stored with a fingerprint of its manifest (file names,
+sizes and mtimes from the folder_scanner record) combined with the versions of
+the inputs the checks depend on (state/district mapping, image workbook, the
+checking code itself). A folder whose fingerprint is unchanged reuses its
+stored results; any other folder is checked again and its entry replaced.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    folder TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    result BLOB NOT NULL
+);
+"""
+
+
+def file_version(path):
+    try:
+        st = os.stat(path)
+        return (path, st.st_size, st.st_mtime_ns)
+    except (OSError, TypeError):
+        return (path, None, None)
+
+
+def context_fingerprint(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def folder_fingerprint(speaker_folder, context_fp):
+    digest = hashlib.sha1(context_fp.encode('utf-8'))
+    digest.update(repr(speaker_folder.files).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def open_results_cache(cache_path, rebuild=False):
+    conn = sqlite3.connect(cache_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    if rebuild:
+        with conn:
+            conn.execute("DELETE FROM results")
+    return conn
+
+
+def get_cached_result(conn, folder, fingerprint):
+    row = conn.execute("SELECT result FROM results WHERE folder = ? AND fingerprint = ?",
+                       (folder, fingerprint)).fetchone()
+    if row is None:
+        return None
+    return pickle.loads(row[0])
+
+
+def store_result(conn, folder, fingerprint, result):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO results (folder, fingerprint, result) VALUES (?, ?, ?)",
+                     (folder, fingerprint, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)))
@@ -0,0 +1,78 @@
+"""Timeline checks of the segment TSVs of a speaker folder.
+
+The start/end columns (in seconds) of all segment TSVs of a folder are put
+into one columnar table and checked without a Python loop over the rows:
+segments that end before they start, rows whose start is before the start of
+the row above them, and segments that overlap an earlier segment of the same
+file once the file is sorted by start time. The corrected duration is the
+length of the union of every file's segments, leaving out the negative ones,
+so overlapping speech is only counted once.
+"""
+
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Segments may overlap by this many seconds (rounding of the times) before it is reported
+OVERLAP_TOLERANCE = 0.001
+
+# negative, overlapping and out_of_order are boolean arrays with one flag per
+# file; covered_seconds holds the corrected duration of every file.
+TimelineIssues = namedtuple('TimelineIssues', ['negative', 'overlapping', 'out_of_order', 'covered_seconds'])
+
+
+def build_timeline(segment_tables):
+    """Concatenate [(starts, ends)] of several files into one frame with file, start and end columns.
+
+    File ids are the positions in segment_tables and every file keeps its row
+    order. Times that are not numbers become NaN and are left out by the checks.
+    """
+    file_ids, starts, ends = [], [], []
+    for file_id, (file_starts, file_ends) in enumerate(segment_tables):
+        file_starts = pd.to_numeric(pd.Series(file_starts), errors='coerce').to_numpy(dtype=float)
+        file_ends = pd.to_numeric(pd.Series(file_ends), errors='coerce').to_numpy(dtype=float)
+        file_ids.append(np.full(len(file_starts), file_id, dtype=np.int64))
+        starts.append(file_starts)
+        ends.append(file_ends)
+    if not file_ids:
+        return pd.DataFrame({'file': np.zeros(0, dtype=np.int64), 'start': np.zeros(0), 'end': np.zeros(0)})
+    return pd.DataFrame({'file': np.concatenate(file_ids), 'start': np.concatenate(starts), 'end': np.concatenate(ends)})
+
+
+def per_file(file_ids, flags, file_count):
+    return np.bincount(file_ids[flags], minlength=file_count) > 0
+
+
+def check_timeline(timeline, file_count):
+    """Check a build_timeline() frame holding file_count files and return its TimelineIssues."""
+    timeline = timeline[timeline['start'].notna() & timeline['end'].notna()]
+    file_ids = timeline['file'].to_numpy()
+    starts = timeline['start'].to_numpy()
+    ends = timeline['end'].to_numpy()
+
+    negative = ends < starts
+    # Rows of a file are contiguous, so the row above belongs to the same file unless the id changes
+    same_file = np.r_[False, file_ids[1:] == file_ids[:-1]]
+    out_of_order = same_file & (starts < np.r_[-np.inf, starts[:-1]])
+
+    # Sort the well-formed segments of every file by start and compare each
+    # start with the latest end of the segments before it in the same file
+    kept = ~negative
+    order = np.lexsort((ends[kept], starts[kept], file_ids[kept]))
+    sorted_files = file_ids[kept][order]
+    sorted_starts = starts[kept][order]
+    sorted_ends = ends[kept][order]
+    latest_end = pd.Series(sorted_ends).groupby(sorted_files).cummax()
+    previous_end = latest_end.groupby(sorted_files).shift().to_numpy(dtype=float)
+    overlapping = sorted_starts < previous_end - OVERLAP_TOLERANCE
+
+    # Only the part of a segment after everything before it adds to the covered time
+    covered_from = np.fmax(sorted_starts, previous_end)
+    covered = np.clip(sorted_ends - covered_from, 0, None)
+
+    return TimelineIssues(
+        per_file(file_ids, negative, file_count),
+        per_file(sorted_files, overlapping, file_count),
+        per_file(file_ids, out_of_order, file_count),
+        np.bincount(sorted_files, weights=covered, minlength=file_count),
+    )
@@ -0,0 +1,94 @@
+"""Split one batch over several machines and merge their outputs afterwards.
+
+--shard i/N keeps the speaker folders whose state/district/speaker path
+hashes to i modulo N, so every machine picks the same partition without
+coordination. A shard run does not write the reports. It streams one
+record per checked folder to shard_<i>_of_<N>.pkl in its output folder,
+along with the folder's position in the batch listing. --merge_shards reads
+those files back in batch order and builds the reports. The batch-wide
+checks run at that point, from the per-folder durations, IDs and image
+mappings.
+"""
+
+import argparse
+import hashlib
+import heapq
+import os
+import pickle
+from operator import itemgetter
+
+SHARD_FORMAT = 1
+
+
+def parse_shard(text):
+    """Parse 'i/N' into (i, N); used as the argparse type of --shard."""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, got {text!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 0 and N-1, got {text!r}")
+    return index, count
+
+
+def shard_of(relative_path, count):
+    # hashlib rather than hash(): the partition must not depend on PYTHONHASHSEED
+    digest = hashlib.sha1(relative_path.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+
+def shard_output_path(output_folder, index, count):
+    return os.path.join(output_folder, f'shard_{index}_of_{count}.pkl')
+
+
+def write_shard(path, header, records):
+    """Write the header and then every (position, partial) record of records, one pickle each."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(dict(header, format=SHARD_FORMAT), file, protocol=pickle.HIGHEST_PROTOCOL)
+        for record in records:
+            pickle.dump(record, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def read_shard_header(path):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def read_shard_records(path):
+    with open(path, 'rb') as file:
+        pickle.load(file)
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def open_shards(paths):
+    """Check that paths hold one output of every shard of a single split; return their headers by shard index."""
+    headers = {}
+    for path in paths:
+        header = read_shard_header(path)
+        if header.get('format') != SHARD_FORMAT:
+            raise ValueError(f"{path} is not a shard output of this version")
+        if header['index'] in headers:
+            raise ValueError(f"Shard {header['index']}/{header['count']} was given twice")
+        headers[header['index']] = dict(header, path=path)
+
+    first = headers[min(headers)]
+    for header in headers.values():
+        if (header['count'], header['folders']) != (first['count'], first['folders']):
+            raise ValueError(f"{header['path']} comes from a different split or listing than {first['path']}")
+    missing = sorted(set(range(first['count'])) - set(headers))
+    if missing:
+        raise ValueError(f"Missing shard outputs for shards {missing} of {first['count']}")
+    return [headers[index] for index in sorted(headers)]
+
+
+def iter_merged_records(headers):
+    """Yield the partial results of every shard in batch listing order."""
+    streams = [read_shard_records(header['path']) for header in headers]
+    for _, partial in heapq.merge(*streams, key=itemgetter(0)):
+        yield partial
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_CHECKER = os.path.join(REPO_ROOT, 'audio_all_checks_combined_S_V.py')
+
+# The checkers are flat top-level modules; make them importable from the tests
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(1, os.path.join(REPO_ROOT, 'benchmarks'))
+
+
+@pytest.fixture(scope='session')
+def small_corpus(tmp_path_factory):
+    """A generated delivery of 12 speaker folders with injected errors (see benchmarks/generate_corpus.py)."""
+    from generate_corpus import generate_corpus
+    corpus = str(tmp_path_factory.mktemp('corpus'))
+    generate_corpus(corpus, states=2, districts=2, speakers=3, utterances=4, segments=3, audio_seconds=2.0, phase1_files=2,
+                    phase1_rows=50, transcription_batches=1, transcription_folders=4, transcription_rows_per_file=10, error_every=2)
+    return corpus
+
+
+@pytest.fixture
+def run_audio_checker():
+    """Run the audio checker (or a copy of it at script) on a generated corpus in a child process; returns its stdout."""
+    pytest.importorskip('speaker_metadata_checks')
+
+    def run(corpus, output, *options, script=AUDIO_CHECKER):
+        os.makedirs(output, exist_ok=True)
+        command = [sys.executable, str(script),
+                   '--main_root_folder', os.path.join(corpus, 'raw'),
+                   '--phase1_tsv_folder', os.path.join(corpus, 'phase1'),
+                   '--txt_file_path', os.path.join(corpus, 'state_district_mapping.txt'),
+                   '--xls_file_path', os.path.join(corpus, 'Images_Phase2.xlsx'),
+                   '--output_file_path', str(output), *options]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        return subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+
+    return run
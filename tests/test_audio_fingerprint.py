@@ -0,0 +1,46 @@
+import os
+import struct
+from audio_fingerprint import (add_phase2_fingerprints, find_phase1_duplicates, fingerprint_wav, open_fingerprint_index,
+                               update_fingerprint_index)
+
+
+def write_wav(path, samples):
+    fmt = struct.pack('<HHIIHH', 1, 1, 16000, 32000, 2, 16)
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', len(samples)) + samples
+    path.write_bytes(b'RIFF' + struct.pack('<I', len(body)) + body)
+    return str(path)
+
+
+def test_index_follows_added_changed_and_removed_clips(tmp_path):
+    phase1 = tmp_path / 'phase1'
+    phase1.mkdir()
+    first = write_wav(phase1 / 'a.wav', b'\x01\x00' * 100)
+    second = write_wav(phase1 / 'b.wav', b'\x02\x00' * 100)
+    conn = open_fingerprint_index(str(tmp_path / 'index.sqlite'))
+    assert update_fingerprint_index(conn, str(phase1), workers=2) == []
+    assert conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 2
+
+    os.remove(second)
+    write_wav(phase1 / 'a.wav', b'\x03\x00' * 100)
+    os.utime(first, ns=(1, 1))
+    assert update_fingerprint_index(conn, str(phase1), workers=2) == []
+    rows = conn.execute("SELECT path, fingerprint FROM files").fetchall()
+    assert rows == [(first, fingerprint_wav(first))]
+    conn.close()
+
+
+def test_clip_that_no_longer_hashes_loses_its_old_fingerprint(tmp_path):
+    phase1 = tmp_path / 'phase1'
+    phase1.mkdir()
+    clip = write_wav(phase1 / 'a.wav', b'\x01\x00' * 100)
+    old_fingerprint = fingerprint_wav(clip)
+    conn = open_fingerprint_index(str(tmp_path / 'index.sqlite'))
+    update_fingerprint_index(conn, str(phase1), workers=1)
+
+    # The clip is rewritten with a broken header, so it changed and cannot be hashed
+    (phase1 / 'a.wav').write_bytes(b'RIFX' + b'\x00' * 60)
+    errors = update_fingerprint_index(conn, str(phase1), workers=1)
+    assert [name for name, _ in errors] == ['a.wav']
+    add_phase2_fingerprints(conn, {'phase2.wav': old_fingerprint})
+    assert find_phase1_duplicates(conn) == []
+    conn.close()
@@ -0,0 +1,81 @@
+import numpy as np
+from audio_segment_index import AudioSegmentIndex, build_audio_segment_index, wav_basenames
+from manifest import scan_tree
+
+WAVS = ['a.wav', 'b.wav', 'c.wav']
+# (wav id, start, end, row) in seconds; given out of order on purpose
+SEGMENTS = [(1, 2.0, 3.0, 0), (0, 1.5, 2.5, 1), (0, 0.0, 1.5, 0), (1, 0.0, 2.0, 3), (2, 0.0, 4.0, 0), (0, 2.5, 4.0, 2)]
+
+
+def make_index():
+    wav_ids, starts, ends, rows = zip(*SEGMENTS)
+    return AudioSegmentIndex(WAVS, wav_ids, np.rint(np.array(starts) * 1000), np.rint(np.array(ends) * 1000), rows)
+
+
+def untranscribed_by_loop(index):
+    """The per-audio scan untranscribed() replaced."""
+    wav_ids = index.keys >> 32
+    open_segments = ~index.transcribed & index.referenced[wav_ids]
+    return [(index.wav_names[wav_id], int(index.rows[open_segments & (wav_ids == wav_id)].min()))
+            for wav_id in np.unique(wav_ids[open_segments])]
+
+
+def test_match_sorts_rows_into_missing_mismatched_and_matched():
+    index = make_index()
+    missing, mismatched, positions, wav_ids = index.match(
+        ['a.wav', 'dir/b.wav', 'z.wav', 'a.wav', 'a.wav', None, 'c.wav'],
+        [0.0, 2.0, 0.0, 1.5, 'x', 0.0, -1.0],
+        [1.5, 3.0, 1.0, 2.6, 1.0, 1.0, 4.0])
+    assert missing.tolist() == [False, False, True, False, False, False, False]
+    assert mismatched.tolist() == [False, False, False, True, True, False, True]
+    assert sorted(index.keys[positions].tolist()) == sorted([0 << 32 | 0, 1 << 32 | 2000])
+    assert wav_ids.tolist() == [0, 1, 2]
+
+
+def test_untranscribed_lists_the_first_open_row_of_referenced_audio():
+    index = make_index()
+    assert list(index.untranscribed()) == []
+    _, _, positions, wav_ids = index.match(['a.wav', 'b.wav'], [1.5, 0.0], [2.5, 2.0])
+    index.mark_transcribed(positions, wav_ids)
+    # c.wav is never referenced, so its segment is not reported
+    assert list(index.untranscribed()) == [('a.wav', 0), ('b.wav', 0)] == untranscribed_by_loop(index)
+
+    _, _, positions, wav_ids = index.match(['a.wav', 'b.wav'], [0.0, 2.0], [1.5, 3.0])
+    index.mark_transcribed(positions, wav_ids)
+    assert list(index.untranscribed()) == [('a.wav', 2)] == untranscribed_by_loop(index)
+
+    index.clear_coverage()
+    assert list(index.untranscribed()) == []
+
+
+def test_untranscribed_agrees_with_the_per_audio_scan_on_random_coverage():
+    rng = np.random.default_rng(7)
+    wav_count, segment_count = 50, 2000
+    wav_ids = rng.integers(0, wav_count, segment_count)
+    starts = rng.integers(0, 1 << 20, segment_count)
+    index = AudioSegmentIndex([f'{i}.wav' for i in range(wav_count)], wav_ids, starts, starts + 10,
+                              rng.integers(0, 500, segment_count))
+    index.mark_transcribed(rng.choice(segment_count, 1500, replace=False), rng.choice(wav_count, 30, replace=False))
+    assert list(index.untranscribed()) == untranscribed_by_loop(index)
+
+
+def test_build_indexes_segment_tsvs_next_to_their_audio(tmp_path):
+    folder = tmp_path / 'state' / 'district'
+    folder.mkdir(parents=True)
+    (folder / 'a.wav').write_bytes(b'')
+    (folder / 'a.tsv').write_text('x\tx\tx\t0.0\t1.0\nx\tx\tx\tbad\t2.0\nx\tx\tx\t1.0\t2.0\n')
+    (folder / 'orphan.tsv').write_text('x\tx\tx\t0.0\t1.0\n')
+    index = build_audio_segment_index(scan_tree(str(tmp_path)))
+    assert list(index.wav_names) == ['a.wav']
+    assert index.keys.tolist() == [0, 1000]
+    assert index.rows.tolist() == [0, 2]
+    assert wav_basenames(['x/y/a.wav', 'a.wav']).tolist() == ['a.wav', 'a.wav']
+
+
+def test_segments_sharing_a_start_are_matched_by_their_end():
+    index = AudioSegmentIndex(['a.wav'], [0, 0, 0], [1000, 1000, 1000], [3000, 2000, 4000], [0, 1, 2])
+    missing, mismatched, positions, wav_ids = index.match(['a.wav'] * 3, [1.0, 1.0, 1.0], [2.0, 3.0, 5.0])
+    assert mismatched.tolist() == [False, False, True]
+    assert sorted(index.rows[positions].tolist()) == [0, 1]
+    index.mark_transcribed(positions, wav_ids)
+    assert list(index.untranscribed()) == [('a.wav', 2)]
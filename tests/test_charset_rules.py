@@ -0,0 +1,70 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from charset_rules import (ANY_SCRIPT, CONTROL_CHARACTER, LETTER, MISPLACED_JOINER, OTHER, CONTROL, TABLE_SIZE, WRONG_SCRIPT,
+                           describe, scan_buffer, scan_column, script_for, script_table)
+
+
+def issues_by_loop(cells, script):
+    """Classify the characters one by one; returns {issue: [(codepoint, cell)]}."""
+    table = script_table(script)
+    found = {}
+    for number, cell in enumerate(cells):
+        classes = [table[min(ord(char), TABLE_SIZE - 1)] for char in cell]
+        for position, (char, cls) in enumerate(zip(cell, classes)):
+            if cls == OTHER:
+                issue = WRONG_SCRIPT
+            elif cls == CONTROL:
+                issue = CONTROL_CHARACTER
+            elif ord(char) in (0x200C, 0x200D) and not (0 < position < len(cell) - 1 and classes[position - 1] == LETTER
+                                                            and classes[position + 1] == LETTER):
+                issue = MISPLACED_JOINER
+            else:
+                continue
+            found.setdefault(issue, []).append((ord(char), number))
+    return found
+
+
+def as_pairs(issues):
+    return {issue: list(zip(cps.tolist(), cells.tolist())) for issue, (cps, cells) in issues.items()}
+
+
+def test_script_for_uses_the_district_before_the_state():
+    assert script_for('Tamil Nadu', 'Chennai') == 'tamil'
+    assert script_for('West-Bengal', 'Darjeeling') == 'devanagari'
+    assert script_for('Atlantis') == script_for(None) == ANY_SCRIPT
+
+
+def test_clean_text_passes_the_screen():
+    assert scan_column(pd.Series(['வணக்கம் உலகம்.', 'நன்றி।', None]), 'tamil') == {}
+    assert scan_buffer('வணக்கம்\tநன்றி\r\n'.encode('utf-8'), 'tamil') == {}
+
+
+def test_scan_column_reports_index_labels():
+    values = pd.Series(['வணக்கம்', 'नमस्ते', 'க\u200dக', '\u200dக', 'a\x07b'], index=[10, 11, 12, 13, 14])
+    issues = as_pairs(scan_column(values, 'tamil'))
+    assert issues[WRONG_SCRIPT] == [(ord(char), 11) for char in 'नमस्ते']
+    assert issues[MISPLACED_JOINER] == [(0x200D, 13)]
+    assert issues[CONTROL_CHARACTER] == [(0x07, 14)]
+
+
+@pytest.mark.parametrize('script', ['tamil', 'devanagari', ANY_SCRIPT])
+def test_scan_column_agrees_with_a_character_loop(script):
+    rng = random.Random(script)
+    alphabet = list('abc ,.।') + [chr(cp) for cp in (0x0B95, 0x0BBE, 0x0915, 0x093E, 0x0C95, 0x200C, 0x200D, 0x200B, 0x07,
+                                                      0x00AD, 0xFEFF, 0x1F600, 0x0627)]
+    cells = [''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 12))) for _ in range(300)]
+    expected = issues_by_loop(cells, script)
+    assert as_pairs(scan_column(pd.Series(cells), script)) == expected
+    # Line numbers of a buffer are the same as the cells when every cell is a line
+    assert as_pairs(scan_buffer('\n'.join(cells).encode('utf-8'), script)) == expected
+
+
+def test_describe_lists_the_most_frequent_codepoints_first():
+    cps = np.array([0x0915, 0x0916, 0x0915, 0x0915, 0x0916, 0x0917])
+    rows = np.array([7, 3, 2, 7, 9, 1])
+    assert describe(cps, rows) == 'U+0915 x3 rows 2 7; U+0916 x2 rows 3 9; U+0917 x1 rows 1'
+    many = np.arange(0x0900, 0x0900 + 12)
+    assert describe(many, np.zeros(12, dtype=int)).endswith('; 2 more codepoints')
+
@@ -0,0 +1,99 @@
+import os
+from checkpoint import FRAME_HEADER, CheckpointWriter, resumable_records, replay_records, record_partials
+
+RUN = 'run-fingerprint'
+FOLDER_FPS = [f'folder-{i}' for i in range(6)]
+
+
+def partial(i):
+    return {'durations': [i / 3600], 'log_entries': {f'file_{i}.wav': ['SPK-E13']}}
+
+
+def write_checkpoint(path, count, every=2):
+    writer = CheckpointWriter(str(path), RUN, every)
+    for i in range(count):
+        writer.add(FOLDER_FPS[i], partial(i))
+    writer.close()
+
+
+def frame_ends(path):
+    """End offsets of the header frame and every record frame."""
+    data = path.read_bytes()
+    ends, offset = [], 0
+    while offset < len(data):
+        size, _ = FRAME_HEADER.unpack_from(data, offset)
+        offset += FRAME_HEADER.size + size
+        ends.append(offset)
+    return ends
+
+
+def test_complete_checkpoint_resumes_every_record(tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    write_checkpoint(path, 4)
+    count, offset = resumable_records(str(path), RUN, FOLDER_FPS)
+    assert (count, offset) == (4, os.path.getsize(path))
+    assert list(replay_records(str(path), count)) == [partial(i) for i in range(4)]
+
+
+def test_torn_last_frame_is_dropped_and_overwritten(tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    write_checkpoint(path, 4)
+    ends = frame_ends(path)
+    # The crash tore the fourth record halfway through its payload
+    with open(path, 'r+b') as file:
+        file.truncate(ends[4] - 5)
+    count, offset = resumable_records(str(path), RUN, FOLDER_FPS)
+    assert (count, offset) == (3, ends[3])
+
+    writer = CheckpointWriter(str(path), RUN, 1, offset)
+    assert os.path.getsize(path) == ends[3]
+    replayed = list(record_partials(writer, FOLDER_FPS[3:], (partial(i) for i in range(3, 6))))
+    writer.close()
+    assert replayed == [partial(i) for i in range(3, 6)]
+    assert resumable_records(str(path), RUN, FOLDER_FPS) == (6, os.path.getsize(path))
+    assert list(replay_records(str(path), 6)) == [partial(i) for i in range(6)]
+
+
+def test_torn_frame_header(tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    write_checkpoint(path, 2)
+    with open(path, 'ab') as file:
+        file.write(b'\x01\x02\x03')
+    assert resumable_records(str(path), RUN, FOLDER_FPS) == (2, os.path.getsize(path) - 3)
+
+
+def test_corrupted_payload_fails_its_crc(tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    write_checkpoint(path, 5)
+    ends = frame_ends(path)
+    data = bytearray(path.read_bytes())
+    data[ends[2] + FRAME_HEADER.size + 3] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert resumable_records(str(path), RUN, FOLDER_FPS) == (2, ends[2])
+
+
+def test_changed_folder_stops_the_resume(tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    write_checkpoint(path, 5)
+    ends = frame_ends(path)
+    changed = FOLDER_FPS[:3] + ['folder-3-changed'] + FOLDER_FPS[4:]
+    count, offset = resumable_records(str(path), RUN, changed)
+    assert (count, offset) == (3, ends[3])
+    # The stale records after the change are cut off when the run goes on
+    CheckpointWriter(str(path), RUN, 1, offset).close()
+    assert os.path.getsize(path) == ends[3]
+
+
+def test_other_runs_and_missing_files_start_over(tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    assert resumable_records(str(path), RUN, FOLDER_FPS) == (0, 0)
+    write_checkpoint(path, 3)
+    assert resumable_records(str(path), 'other-run', FOLDER_FPS) == (0, 0)
+    # A header torn before the first sync leaves nothing to resume
+    with open(path, 'r+b') as file:
+        file.truncate(frame_ends(path)[0] - 1)
+    assert resumable_records(str(path), RUN, FOLDER_FPS) == (0, 0)
+    writer = CheckpointWriter(str(path), RUN, 1, 0)
+    writer.add(FOLDER_FPS[0], partial(0))
+    writer.close()
+    assert list(replay_records(str(path), 1)) == [partial(0)]
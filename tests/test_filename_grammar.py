@@ -0,0 +1,83 @@
+import pytest
+from filename_grammar import (NAME_RULES, SPACE_RULE, UNDERSCORE_RULE, IMAGE_DISTRICT_RULE, TXT_UNDERSCORE_RULE, STATE_DISTRICT_RULE,
+                              UTT_ID_RULE, AUDIO_EXTENSION_RULE, parse_filename, name_rule_violations)
+
+STATES = {'Karnataka', 'Bihar'}
+DISTRICTS = {'Mysore', 'Patna'}
+
+NAMES = [
+    'Karnataka_Mysore_100060_0_IMG-Mysore_0.wav',
+    'Karnataka_Mysore_100060_0_IMG-Mysore_0.tsv',
+    'Karnataka_Mysore_100060.txt',
+    'Karnataka_Mysore_100060_x4_IMG-Mysore_4.wav',
+    'Karnataka_Mysore_100060_1.5_IMG-Mysore_1.tsv',
+    'Karnataka_Mysore_100060_1e3_IMG-Mysore_1.tsv',
+    'Karnataka_Mysore_100060_3_MysoreOther-3_1.wav',
+    'Karnataka_Mysore_100060_3_Patna-3_1.wav',
+    'Karnataka_Udupi_100060_3_IMG-Udupi_1.wav',
+    'Kerala_Mysore_100060_3_IMG-Mysore_1.wav',
+    'Karnataka_Mysore_100060_5_IMG-Mysore_5_extra.wav',
+    'Karnataka_Mysore_100060_5_IMG Mysore_5.wav',
+    'Karnataka_Mysore_100060_5_IMG-Mysore.wav',
+    'Karnataka_Mysore_100060_extra.txt',
+    'Karnataka_Mysore_100060_9_IMG-Mysore_9.MP3',
+    'Karnataka_Mysore_100060_9_IMG-Mysore_9.flac',
+    'Karnataka_Mysore_100060.pdf',
+    'Bihar_Patna_100050_²_IMG-Patna_0.wav',
+    'notes.docx',
+]
+
+
+def is_numeric(s):
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+
+def legacy_rules(filename, states, districts):
+    """The naming checks as the checker wrote them before the grammar, one split('_') per rule."""
+    broken = set()
+    if filename.endswith('.wav') or filename.endswith('.tsv'):
+        if ' ' in filename:
+            broken.add(SPACE_RULE)
+        if filename.count('_') != 5:
+            broken.add(UNDERSCORE_RULE)
+        img = filename.split('_')[4]
+        if '-' in img and img.split('-')[0] != filename.split('_')[1]:
+            broken.add(IMAGE_DISTRICT_RULE)
+    if filename.endswith('.txt') and filename.count('_') != 2:
+        broken.add(TXT_UNDERSCORE_RULE)
+    if filename.endswith(('.wav', '.tsv', '.txt')):
+        if not (filename.split('_')[0] in states and filename.split('_')[1] in districts):
+            broken.add(STATE_DISTRICT_RULE)
+    if filename.endswith(('.tsv', '.wav')):
+        parts = filename.split('_')
+        if len(parts) > 3 and not is_numeric(parts[3]):
+            broken.add(UTT_ID_RULE)
+    if filename.lower().endswith(('.mp3', '.flac', '.aac', '.ogg', '.wma', '.alac')):
+        broken.add(AUDIO_EXTENSION_RULE)
+    return [rule for rule in NAME_RULES if rule in broken]
+
+
+def legacy_image_id(filename):
+    parts = filename.split('_')
+    return ('_'.join(parts[4:6])).split('.')[0] + '.jpg'
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_scalar_rules_match_split_logic(name):
+    parsed = parse_filename(name)
+    assert name_rule_violations(parsed, STATES, DISTRICTS) == legacy_rules(name, STATES, DISTRICTS)
+    if name.endswith(('.wav', '.tsv')):
+        parts = name.split('_')
+        assert (parsed.speaker, parsed.utt) == (parts[2], parts[3])
+        assert parsed.image_id == legacy_image_id(name)
+
+
+@pytest.mark.parametrize('name', ['Karnataka', 'Karnataka_Mysore_1.wav', 'a__b.tsv', ''])
+def test_short_names_are_flagged_instead_of_raising(name):
+    rules = name_rule_violations(parse_filename(name), STATES, DISTRICTS)
+    if name.endswith('.wav') or name.endswith('.tsv'):
+        assert UNDERSCORE_RULE in rules
@@ -0,0 +1,49 @@
+import os
+from folder_scanner import scan_root
+
+
+def make_tree(root):
+    for state, district, speaker, files in (('Bihar', 'Patna', '100001', 3), ('Bihar', 'Patna', '100002', 0),
+                                            ('Bihar', 'Gaya', '100003', 2), ('Karnataka', 'Mysore', '100004', 4)):
+        speaker_path = os.path.join(root, state, district, speaker)
+        os.makedirs(speaker_path)
+        for i in range(files):
+            name = f'{state}_{district}_{speaker}_{i}.wav'
+            with open(os.path.join(speaker_path, name), 'wb') as file:
+                file.write(b'\x00' * (i * 100 + 1))
+    # Neither the stray file in a district folder nor the nested folder's files belong to a speaker folder
+    with open(os.path.join(root, 'Bihar', 'Patna', 'notes.txt'), 'w') as file:
+        file.write('notes')
+    os.makedirs(os.path.join(root, 'Bihar', 'Gaya', '100003', 'backup'))
+    with open(os.path.join(root, 'Bihar', 'Gaya', '100003', 'backup', 'old.wav'), 'wb') as file:
+        file.write(b'\x00' * 10)
+
+
+def walk_speaker_folders(root):
+    """{speaker folder path: {file name: (size, mtime_ns)}} of the folders three levels below root, from os.walk."""
+    folders = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        if os.path.relpath(dirpath, root).count(os.sep) == 2:
+            folders[dirpath] = {}
+            for name in filenames:
+                st = os.stat(os.path.join(dirpath, name))
+                folders[dirpath][name] = (st.st_size, st.st_mtime_ns)
+    return folders
+
+
+def test_scan_root_matches_os_walk(tmp_path):
+    root = str(tmp_path)
+    make_tree(root)
+    expected = walk_speaker_folders(root)
+    for io_threads in (1, 4):
+        speaker_folders = scan_root(root, io_threads)
+        scanned = {folder.path: {entry.name: (entry.size, entry.mtime_ns) for entry in folder.files} for folder in speaker_folders}
+        assert scanned == expected
+        for folder in speaker_folders:
+            assert os.path.join(root, folder.state, folder.district, folder.speaker) == folder.path
+            assert folder.by_ext.get('.wav', ()) == tuple(entry.name for entry in folder.files)
+
+
+def test_threaded_scan_keeps_the_listing_order(tmp_path):
+    make_tree(str(tmp_path))
+    assert scan_root(str(tmp_path), 4) == scan_root(str(tmp_path), 1)
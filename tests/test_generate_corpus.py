@@ -0,0 +1,44 @@
+import collections
+import csv
+import os
+import pandas as pd
+from generate_corpus import TRXN_ERRORS, generate_corpus
+import transcription_checks
+
+# Reported in the other reports, or (SPK-E29) only with --wav_sample_rate, rather than per file in Error_files.tsv
+NOT_IN_ERROR_FILES = {'SPK-E17', 'SPK-E18', 'SPK-E21', 'SPK-E22', 'SPK-E23', 'SPK-E29', 'PDF-E1', 'WAV-E1', 'TSV-E1'}
+
+
+def test_every_injected_transcription_error_is_reported(tmp_path):
+    corpus = str(tmp_path / 'corpus')
+    description = generate_corpus(corpus, states=1, districts=1, speakers=4, utterances=3, segments=3, audio_seconds=2.0,
+                                  phase1_files=1, phase1_rows=10, transcription_batches=1,
+                                  transcription_folders=len(TRXN_ERRORS), transcription_rows_per_file=6, error_every=1)
+    output = str(tmp_path / 'transcription_errors.tsv')
+    transcription_checks.main(os.path.join(corpus, 'transcription'), output, audio_root_folder=os.path.join(corpus, 'raw'),
+                              check_charset=True)
+
+    reported = collections.Counter(pd.read_csv(output, sep='\t')['error'])
+    injected = collections.Counter(error['error'] for error in description['injected_errors'] if error['error'].startswith('TRXN'))
+    # The checker reports a file that is not tab-separated as having too few columns
+    injected['TRXN_E3'] += injected.pop('TRXN_E6')
+    assert reported == injected
+
+
+def test_every_injected_speaker_folder_error_is_reported(tmp_path, run_audio_checker):
+    corpus = str(tmp_path / 'corpus')
+    description = generate_corpus(corpus, states=2, districts=2, speakers=8, utterances=2, segments=3, audio_seconds=2.0,
+                                  phase1_files=1, phase1_rows=10, transcription_batches=1, transcription_folders=1,
+                                  transcription_rows_per_file=6, error_every=1)
+    output = tmp_path / 'output'
+    run_audio_checker(corpus, output, '--no_cache', '--check_wav_headers', '--check_segment_timeline', '--check_charset',
+                      '--phase1_audio_folder', os.path.join(corpus, 'phase1_audio'))
+
+    reported = collections.defaultdict(set)
+    with open(output / 'Error_files.tsv', encoding='utf-8') as file:
+        for file_name, issues in list(csv.reader(file, delimiter='\t'))[1:]:
+            speaker = file_name.split('_')[2].split('.')[0] if file_name.count('_') >= 2 else None
+            reported[speaker].update(issue.split(':')[0] for issue in issues.split(', '))
+    for error in description['injected_errors']:
+        if error['error'].startswith('SPK') and error['error'] not in NOT_IN_ERROR_FILES:
+            assert error['error'] in reported[os.path.basename(error['folder'])], error
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+import id_store
+from id_store import IdSet, encode_ids
+
+SPEAKERS = ['1', '42', '007', '0', '00', 'SPK_12', '123456789012345678', '1234567890123456789',
+            '99999999999999999999', '-5', '4.0', ' 7', '७']
+OTHERS = ['42', '7', '007', '0', 'SPK_12', 'spk_12', '123456789012345678', '1234567890123456789',
+          '99999999999999999999', '-5', '4', ' 7', '७', '5']
+
+
+def test_intersection_matches_plain_sets():
+    assert IdSet(SPEAKERS).intersection(IdSet(OTHERS)) == set(SPEAKERS) & set(OTHERS)
+
+
+def test_only_round_tripping_numbers_are_kept_as_integers():
+    numbers, others = encode_ids(pd.Series(SPEAKERS + [None], dtype=object))
+    assert numbers.tolist() == [0, 1, 42, 123456789012345678]
+    assert others == set(SPEAKERS) - {'0', '1', '42', '123456789012345678'}
+
+
+def test_len_counts_distinct_ids():
+    assert len(IdSet(SPEAKERS + SPEAKERS)) == len(set(SPEAKERS))
+
+
+@pytest.mark.parametrize('compact_rows', [1, 3, 1 << 16])
+def test_buffered_updates_give_the_same_set(monkeypatch, compact_rows):
+    monkeypatch.setattr(id_store, 'COMPACT_ROWS', compact_rows)
+    left, right = IdSet(), IdSet()
+    for start in range(0, 200, 7):
+        left.update(str(i) for i in range(start, start + 7))
+        right.update(pd.Series([str(i * 3) for i in range(start, start + 7)] + ['0' + str(start)], dtype=object))
+    expected = {str(i) for i in range(203)} & ({str(i * 3) for i in range(203)} | {'0' + str(s) for s in range(0, 200, 7)})
+    assert left.intersection(right) == expected
+    assert right.intersection(left) == expected
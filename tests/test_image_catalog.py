@@ -0,0 +1,54 @@
+import json
+import os
+import pandas as pd
+import pytest
+from image_catalog import ImageCatalog
+
+
+def write_workbook(path, district_images, generic_images):
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'Filename': district_images}).to_excel(writer, sheet_name='DistrictSpecificImages', index=False)
+        pd.DataFrame({'Filename': generic_images}).to_excel(writer, sheet_name='GenericImages', index=False)
+    return str(path)
+
+
+def read_cache(cache_path):
+    with open(cache_path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def test_warm_load_equals_cold_load(tmp_path):
+    xls_file = write_workbook(tmp_path / 'Images_Phase2.xlsx', ['Patna-1', 'Patna-2'], ['IMG-G_1'])
+    cache_path = str(tmp_path / 'catalog.json')
+    cold = ImageCatalog.load(xls_file, cache_path)
+    assert read_cache(cache_path)['size'] == os.path.getsize(xls_file)
+
+    warm = ImageCatalog.load(xls_file, cache_path)
+    assert list(warm.filenames) == list(cold.filenames) == ['IMG-G_1', 'Patna-1', 'Patna-2']
+    assert list(warm.filenames) == list(ImageCatalog.from_workbook(xls_file).filenames)
+
+
+def test_changed_workbook_invalidates_the_cache(tmp_path):
+    xls_file = write_workbook(tmp_path / 'Images_Phase2.xlsx', ['Patna-1'], ['IMG-G_1'])
+    cache_path = str(tmp_path / 'catalog.json')
+    ImageCatalog.load(xls_file, cache_path)
+
+    write_workbook(tmp_path / 'Images_Phase2.xlsx', ['Patna-1', 'Patna-9'], ['IMG-G_1', 'IMG-G_2'])
+    os.utime(xls_file, ns=(1, 1))
+    catalog = ImageCatalog.load(xls_file, cache_path)
+    assert list(catalog.filenames) == ['IMG-G_1', 'IMG-G_2', 'Patna-1', 'Patna-9']
+    cached = read_cache(cache_path)
+    assert (cached['size'], cached['mtime_ns']) == (os.path.getsize(xls_file), 1)
+    assert cached['filenames'] == list(catalog.filenames)
+
+
+def test_touched_workbook_with_the_same_contents_reuses_the_cache(tmp_path, monkeypatch):
+    xls_file = write_workbook(tmp_path / 'Images_Phase2.xlsx', ['Patna-1'], ['IMG-G_1'])
+    cache_path = str(tmp_path / 'catalog.json')
+    cold = ImageCatalog.load(xls_file, cache_path)
+
+    os.utime(xls_file, ns=(1, 1))
+    monkeypatch.setattr(ImageCatalog, 'from_workbook', classmethod(lambda cls, xls_file: pytest.fail('workbook parsed again')))
+    warm = ImageCatalog.load(xls_file, cache_path)
+    assert list(warm.filenames) == list(cold.filenames)
+    assert read_cache(cache_path)['mtime_ns'] == 1
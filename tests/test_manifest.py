@@ -0,0 +1,103 @@
+import gzip
+import os
+import pytest
+from manifest import load_manifest, scan_tree
+
+FILES = [
+    'Bihar/Patna/100050/Bihar_Patna_100050.txt',
+    'Bihar/Patna/100050/Bihar_Patna_100050_0_IMG-Patna_0.wav',
+    'Bihar/Patna/100050/Bihar_Patna_100050_0_IMG-Patna_0.tsv',
+    'Bihar/Patna/100051/Bihar_Patna_100051_0_IMG-Patna_0.wav',
+    'Karnataka/Mysore/100060/name with space.tsv',
+    'Karnataka/Mysore/100060/nested/extra.wav',
+]
+EMPTY_FOLDERS = ['Karnataka/Udupi']
+
+
+def build_corpus(root):
+    for path in FILES:
+        full = root / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_bytes(b'x' * len(path))
+    for path in EMPTY_FOLDERS:
+        (root / path).mkdir(parents=True)
+    return str(root)
+
+
+def listing(tree, top):
+    """Every (folder, sorted subfolders, sorted files) of an os.walk()-style walk, in sorted order."""
+    return sorted((os.path.relpath(dirpath, top), sorted(dirnames), sorted(filenames)) for dirpath, dirnames, filenames in tree.walk(top))
+
+
+def find_lines(root):
+    """The manifest `find ROOT -printf '%p\\t%s\\t%T@\\t%y\\n'` would write."""
+    lines = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        lines.append(f"{dirpath}\t4096\t{os.stat(dirpath).st_mtime:.6f}\td")
+        for name in filenames:
+            st = os.stat(os.path.join(dirpath, name))
+            lines.append(f"{os.path.join(dirpath, name)}\t{st.st_size}\t{st.st_mtime:.9f}\tf")
+    return lines
+
+
+def test_find_manifest_round_trip(tmp_path):
+    root = build_corpus(tmp_path / 'raw')
+    manifest = tmp_path / 'manifest.tsv'
+    manifest.write_text('path\tsize\tmtime\ttype\n' + '\n'.join(find_lines(root)) + '\n', encoding='utf-8')
+    tree = load_manifest(str(manifest), root)
+    assert listing(tree, root) == listing(scan_tree(root), root) == sorted(
+        (os.path.relpath(dirpath, root), sorted(dirnames), sorted(filenames)) for dirpath, dirnames, filenames in os.walk(root))
+    assert tree.complete_metadata
+    entries = {entry.name: entry for entry in tree.folder_files(('Bihar', 'Patna', '100050'))}
+    wav = os.path.join(root, FILES[1])
+    assert entries[os.path.basename(wav)].size == os.path.getsize(wav)
+    assert entries[os.path.basename(wav)].mtime_ns // 1000 == os.stat(wav).st_mtime_ns // 1000
+
+
+def test_gzipped_relative_file_list(tmp_path):
+    root = build_corpus(tmp_path / 'raw')
+    manifest = tmp_path / 'manifest.txt.gz'
+    with gzip.open(manifest, 'wt', encoding='utf-8') as file:
+        file.write('# delivery listing\n\n' + '\n'.join(FILES) + '\n' + '\n'.join(path + '/' for path in EMPTY_FOLDERS) + '\n')
+    tree = load_manifest(str(manifest), root)
+    assert listing(tree, root) == listing(scan_tree(root), root)
+    assert not tree.complete_metadata
+    assert list(tree.speaker_locations()) == [
+        ('Bihar', 'Patna', '100050', os.path.join(root, 'Bihar/Patna/100050'), os.path.join(root, 'Bihar/Patna')),
+        ('Bihar', 'Patna', '100051', os.path.join(root, 'Bihar/Patna/100051'), os.path.join(root, 'Bihar/Patna')),
+        ('Karnataka', 'Mysore', '100060', os.path.join(root, 'Karnataka/Mysore/100060'), os.path.join(root, 'Karnataka/Mysore')),
+    ]
+
+
+def test_paths_outside_root_are_ignored_and_bad_lines_rejected(tmp_path):
+    manifest = tmp_path / 'manifest.tsv'
+    manifest.write_text('/elsewhere/a.wav\t1\t1.0\tf\nBihar/a.wav\t1\t1.0\tf\n', encoding='utf-8')
+    tree = load_manifest(str(manifest), str(tmp_path / 'raw'))
+    assert tree.subfolders() == ['Bihar']
+    manifest.write_text('Bihar/a.wav\t1\t1.0\tf\nBihar/b.wav\tbig\t1.0\tf\n', encoding='utf-8')
+    with pytest.raises(ValueError, match=':2:'):
+        load_manifest(str(manifest), str(tmp_path / 'raw'))
+
+
+def test_scan_tree_follows_symlinked_folders(tmp_path):
+    storage = build_corpus(tmp_path / 'storage')
+    root = tmp_path / 'raw'
+    root.mkdir()
+    # A delivery whose state folders live on other storage
+    os.symlink(os.path.join(storage, 'Bihar'), root / 'Bihar')
+    tree = scan_tree(str(root))
+    assert tree.subfolders() == ['Bihar']
+    assert sorted(entry.name for entry in tree.folder_files(('Bihar', 'Patna', '100050'))) == sorted(
+        os.path.basename(path) for path in FILES[:3])
+
+
+def test_scan_tree_stops_at_symlink_cycles(tmp_path):
+    root = build_corpus(tmp_path / 'raw')
+    os.symlink(os.path.join(root, 'Bihar'), os.path.join(root, 'Bihar', 'Patna', 'loop'))
+    os.symlink(root, os.path.join(root, 'Karnataka', 'up'))
+    os.symlink(os.path.join(root, 'Bihar', 'Patna', '100050'), os.path.join(root, 'Karnataka', 'alias'))
+    tree = scan_tree(root)
+    assert 'loop' not in tree.subfolders(('Bihar', 'Patna'))
+    assert 'up' not in tree.subfolders(('Karnataka',))
+    # A symlink to a folder that is not above it is listed like any other folder
+    assert len(tree.folder_files(('Karnataka', 'alias'))) == 3
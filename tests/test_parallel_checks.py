@@ -0,0 +1,20 @@
+import filecmp
+import os
+
+REPORT_FILES = ('speaker_metadata_preinitial_checks_report.tsv', 'speaker_metadata_df_extras.csv', 'speaker_metadata_flagged.csv',
+                'Error_files.tsv')
+
+
+def test_parallel_run_writes_the_same_reports_as_a_serial_run(small_corpus, run_audio_checker, tmp_path):
+    options = ('--no_cache', '--check_wav_headers', '--check_segment_timeline', '--check_charset', '--phase1_audio_folder',
+               os.path.join(small_corpus, 'phase1_audio'))
+    run_audio_checker(small_corpus, tmp_path / 'serial', '--workers', '1', *options)
+    run_audio_checker(small_corpus, tmp_path / 'parallel', '--workers', '2', *options)
+    run_audio_checker(small_corpus, tmp_path / 'prefetched', '--workers', '1', '--io_threads', '3', *options)
+    assert os.path.getsize(tmp_path / 'serial' / 'Error_files.tsv') > 0
+    for name in REPORT_FILES:
+        serial = tmp_path / 'serial' / name
+        for other in ('parallel', 'prefetched'):
+            assert os.path.exists(serial) == os.path.exists(tmp_path / other / name), name
+            if os.path.exists(serial):
+                assert filecmp.cmp(serial, tmp_path / other / name, shallow=False), f"{other}/{name}"
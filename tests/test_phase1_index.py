@@ -0,0 +1,62 @@
+import os
+import sqlite3
+from phase1_index import load_phase1_id_sets
+
+
+def write_tsv(path, pairs):
+    lines = ['audio_path\ttranscription'] + [f'/data/phase1/KA_Mysore_{speakerid}_{uttid}_IMG-1.wav\ttext' for speakerid, uttid in pairs]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def indexed_pairs(index_path):
+    conn = sqlite3.connect(index_path)
+    rows = conn.execute("SELECT f.path, p.speakerid, p.uttid FROM files f JOIN pairs p ON p.file_id = f.id").fetchall()
+    file_count, = conn.execute("SELECT COUNT(*) FROM files").fetchone()
+    conn.close()
+    pairs = {}
+    for path, speakerid, uttid in rows:
+        pairs.setdefault(os.path.basename(path), set()).add((speakerid, uttid))
+    return file_count, pairs
+
+
+def as_set(ids):
+    return ids.intersection(ids)
+
+
+def test_changed_added_and_deleted_tsvs_update_the_index(tmp_path):
+    phase1 = tmp_path / 'phase1'
+    phase1.mkdir()
+    index_path = str(tmp_path / 'index.sqlite')
+    write_tsv(phase1 / 'a.tsv', [('101', '1'), ('101', '2')])
+    deleted = write_tsv(phase1 / 'b.tsv', [('102', '1')])
+    load_phase1_id_sets(str(phase1), index_path)
+    assert indexed_pairs(index_path) == (2, {'a.tsv': {('101', '1'), ('101', '2')}, 'b.tsv': {('102', '1')}})
+
+    changed = write_tsv(phase1 / 'a.tsv', [('103', '1')])
+    os.utime(changed, ns=(1, 1))
+    os.remove(deleted)
+    write_tsv(phase1 / 'c.tsv', [('104', '7')])
+    speaker_ids, utt_ids, pair_count, errors = load_phase1_id_sets(str(phase1), index_path)
+    assert errors == []
+    assert indexed_pairs(index_path) == (2, {'a.tsv': {('103', '1')}, 'c.tsv': {('104', '7')}})
+    assert as_set(speaker_ids) == {'103', '104'}
+    assert as_set(utt_ids) == {'1', '7'}
+    assert pair_count == 2
+
+
+def test_warm_index_returns_the_same_ids_as_a_cold_one(tmp_path):
+    phase1 = tmp_path / 'phase1'
+    phase1.mkdir()
+    write_tsv(phase1 / 'a.tsv', [('101', '1'), ('101', '2'), ('S7', 'u1')])
+    write_tsv(phase1 / 'b.tsv', [('101', '1'), ('102', '3')])
+    index_path = str(tmp_path / 'index.sqlite')
+
+    cold = load_phase1_id_sets(str(phase1), index_path)
+    warm = load_phase1_id_sets(str(phase1), index_path)
+    fresh = load_phase1_id_sets(str(phase1), str(tmp_path / 'fresh.sqlite'))
+    for speaker_ids, utt_ids, pair_count, errors in (warm, fresh):
+        assert as_set(speaker_ids) == as_set(cold[0]) == {'101', '102', 'S7'}
+        assert as_set(utt_ids) == as_set(cold[1]) == {'1', '2', '3', 'u1'}
+        assert pair_count == cold[2] == 4
+        assert errors == []
@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from folder_scanner import scan_root
+from prefetch import iter_prefetched, prefetch_folder
+
+
+def make_folders(root, count):
+    for i in range(count):
+        speaker_path = os.path.join(root, 'Bihar', 'Patna', f'{100000 + i}')
+        os.makedirs(speaker_path)
+        for name, data in ((f'{i}_meta.txt', f'speaker {i}\n' * (i + 1)), (f'{i}_1.tsv', f'0.0\t1.0\tutterance {i}\n'),
+                           (f'{i}_1.wav', 'RIFF')):
+            with open(os.path.join(speaker_path, name), 'w') as file:
+                file.write(data)
+    return scan_root(root)
+
+
+def expected_contents(speaker_folder):
+    contents = {}
+    for entry in speaker_folder.files:
+        if not entry.name.endswith('.wav'):
+            with open(os.path.join(speaker_folder.path, entry.name), 'rb') as file:
+                contents[entry.name] = file.read()
+    return contents
+
+
+def test_prefetched_folders_come_in_input_order(tmp_path):
+    speaker_folders = make_folders(str(tmp_path), 12)
+    # A budget of zero still queues one folder ahead; the larger ones queue several
+    for max_bytes in (0, 100, 1 << 20):
+        prefetched = list(iter_prefetched(speaker_folders, 4, max_bytes))
+        assert [folder for folder, _ in prefetched] == speaker_folders
+        assert [contents for _, contents in prefetched] == [expected_contents(folder) for folder in speaker_folders]
+
+
+def test_prefetch_folder_leaves_unreadable_files_to_the_checks(tmp_path):
+    speaker_folder, = make_folders(str(tmp_path), 1)
+    os.remove(os.path.join(speaker_folder.path, '0_1.tsv'))
+    with ThreadPoolExecutor(2) as executor:
+        contents = prefetch_folder(speaker_folder, executor)
+    assert contents == {'0_meta.txt': b'speaker 0\n'}
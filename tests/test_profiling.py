@@ -0,0 +1,22 @@
+from array import array
+import profiling
+
+
+def test_summary_reports_calls_per_second(monkeypatch):
+    monkeypatch.setattr(profiling, 'latencies', {'inspect_tsv': array('d', [0.25, 0.25, 0.5, 1.0]), 'stage:scan': array('d', [2.0])})
+    monkeypatch.setattr(profiling, 'bytes_read', {'inspect_tsv': 4000000})
+    rows = {row['name']: row for row in profiling.summary()}
+    assert rows['inspect_tsv']['calls'] == 4
+    assert rows['inspect_tsv']['calls_per_s'] == 2.0
+    assert rows['inspect_tsv']['mb_per_s'] == 2.0
+    assert rows['stage:scan']['calls_per_s'] == 0.5
+    assert rows['stage:scan']['mb_per_s'] is None
+    assert 'files_per_s' not in rows['inspect_tsv']
+
+
+def test_report_tsv_header(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'latencies', {'inspect_wav': array('d', [0.1])})
+    monkeypatch.setattr(profiling, 'bytes_read', {})
+    profiling.write_report(str(tmp_path / 'profile'))
+    header = (tmp_path / 'profile.tsv').read_text().splitlines()[0].split('\t')
+    assert header == ['name', 'calls', 'total_s', 'mean_ms', 'p50_ms', 'p99_ms', 'bytes_read', 'calls_per_s', 'mb_per_s']
@@ -0,0 +1,57 @@
+import csv
+import os
+import random
+import report_sink
+from report_sink import ReportSink
+
+
+def in_memory_report(findings):
+    """The report as the checker builds it from log_entries: files in first-seen order, issues deduplicated."""
+    entries = {}
+    for file, issue in findings:
+        entries.setdefault(file, {}).setdefault(issue)
+    return [[file, ', '.join(issues)] for file, issues in entries.items()]
+
+
+def read_report(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = list(csv.reader(file, delimiter='\t'))
+    assert rows[0] == ['File', 'Issue']
+    return rows[1:]
+
+
+def random_findings(count, seed=0):
+    rng = random.Random(seed)
+    files = [f'Bihar_Patna_{rng.randrange(10**6)}_{i}.wav' for i in range(count // 5)] + ['name, with "quotes"', 'Ünïcode.tsv']
+    return [(rng.choice(files), f'SPK-E{rng.randrange(12, 40)}') for _ in range(count)]
+
+
+def test_external_merge_matches_in_memory_order(tmp_path, monkeypatch):
+    # Small runs and a small fan-in force several levels of merging
+    monkeypatch.setattr(report_sink, 'MERGE_FANIN', 3)
+    findings = random_findings(5000)
+    sink = ReportSink(str(tmp_path / 'spill'), spill_rows=97)
+    for file, issue in findings:
+        sink.add(file, issue)
+    assert len(sink.runs) > report_sink.MERGE_FANIN
+    sink.write(str(tmp_path / 'Error_files.tsv'))
+    sink.close()
+    assert read_report(tmp_path / 'Error_files.tsv') == in_memory_report(findings)
+
+
+def test_add_entries_and_unspilled_buffer(tmp_path):
+    sink = ReportSink(str(tmp_path / 'spill'))
+    sink.add_entries({'b.wav': ['SPK-E13', 'SPK-E14', 'SPK-E13'], 'a.wav': ['SPK-E99: bad, header']})
+    sink.add('b.wav', 'SPK-E20')
+    sink.write(str(tmp_path / 'Error_files.tsv'))
+    sink.close()
+    assert read_report(tmp_path / 'Error_files.tsv') == [['b.wav', 'SPK-E13, SPK-E14, SPK-E20'], ['a.wav', 'SPK-E99: bad, header']]
+
+
+def test_close_removes_the_run_files(tmp_path):
+    sink = ReportSink(str(tmp_path / 'spill'), spill_rows=2)
+    for file, issue in random_findings(20):
+        sink.add(file, issue)
+    assert os.listdir(sink.spill_dir)
+    sink.close()
+    assert not os.path.exists(sink.spill_dir)
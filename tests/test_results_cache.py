@@ -0,0 +1,69 @@
+import filecmp
+import os
+import shutil
+import sqlite3
+
+AUDIO_CHECKER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio_all_checks_combined_S_V.py')
+REPORT_FILES = ('speaker_metadata_preinitial_checks_report.tsv', 'speaker_metadata_df_extras.csv', 'speaker_metadata_flagged.csv',
+                'Error_files.tsv')
+CACHE_FILE = 'speaker_folder_results_cache.sqlite'
+
+
+def cached_fingerprints(output):
+    conn = sqlite3.connect(os.path.join(output, CACHE_FILE))
+    rows = dict(conn.execute("SELECT folder, fingerprint FROM results"))
+    conn.close()
+    return rows
+
+
+def reused_line(stdout):
+    return next(line for line in stdout.splitlines() if line.startswith('Reusing cached results'))
+
+
+def assert_same_reports(first, second):
+    for name in REPORT_FILES:
+        assert os.path.exists(first / name) == os.path.exists(second / name), name
+        if os.path.exists(first / name):
+            assert filecmp.cmp(first / name, second / name, shallow=False), name
+
+
+def test_only_the_changed_folder_is_checked_again(small_corpus, run_audio_checker, tmp_path):
+    corpus = tmp_path / 'corpus'
+    shutil.copytree(small_corpus, corpus)
+    output = tmp_path / 'cached'
+    first = run_audio_checker(corpus, output, '--check_wav_headers')
+    before = cached_fingerprints(output)
+    assert reused_line(first) == f"Reusing cached results for 0 of {len(before)} speaker folders."
+
+    second = run_audio_checker(corpus, output, '--check_wav_headers')
+    assert reused_line(second) == f"Reusing cached results for {len(before)} of {len(before)} speaker folders."
+    assert cached_fingerprints(output) == before
+
+    changed_folder = os.path.join(corpus, 'raw', 'Bihar', 'Patna', '100008')
+    changed_file = os.path.join(changed_folder, sorted(os.listdir(changed_folder))[0])
+    os.utime(changed_file, ns=(1, 1))
+    third = run_audio_checker(corpus, output, '--check_wav_headers')
+    after = cached_fingerprints(output)
+    assert reused_line(third) == f"Reusing cached results for {len(before) - 1} of {len(before)} speaker folders."
+    assert {folder for folder in before if before[folder] != after[folder]} == {changed_folder}
+
+    run_audio_checker(corpus, tmp_path / 'uncached', '--check_wav_headers', '--no_cache')
+    assert_same_reports(output, tmp_path / 'uncached')
+
+
+def test_checker_code_change_and_rebuild_cache_check_every_folder(small_corpus, run_audio_checker, tmp_path):
+    script = tmp_path / 'checker' / os.path.basename(AUDIO_CHECKER)
+    script.parent.mkdir()
+    shutil.copy(AUDIO_CHECKER, script)
+    output = tmp_path / 'cached'
+    run_audio_checker(small_corpus, output, script=script)
+    total = len(cached_fingerprints(output))
+
+    script.write_text(script.read_text() + '\n# changed\n')
+    changed = run_audio_checker(small_corpus, output, script=script)
+    assert reused_line(changed) == f"Reusing cached results for 0 of {total} speaker folders."
+
+    rebuilt = run_audio_checker(small_corpus, output, '--rebuild-cache', script=script)
+    assert reused_line(rebuilt) == f"Reusing cached results for 0 of {total} speaker folders."
+    run_audio_checker(small_corpus, tmp_path / 'uncached', '--no_cache', script=script)
+    assert_same_reports(output, tmp_path / 'uncached')
@@ -0,0 +1,33 @@
+import json
+
+from run_benchmarks import stage_result, compare_reports
+
+
+def test_failed_stage_has_no_timing():
+    result = stage_result('audio_checker_w1', 0.2, 1000, 50.0, 1)
+    assert result['seconds'] is None
+    assert result['items_per_sec'] is None
+    assert result['returncode'] == 1
+
+
+def test_successful_stage_is_timed():
+    result = stage_result('scan', 2.0, 1000, 50.0, 0)
+    assert result['seconds'] == 2.0
+    assert result['items_per_sec'] == 500.0
+
+
+def write_report(path, stages):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'runs': [{'speaker_folders': 10, 'stages': stages}]}, file)
+    return str(path)
+
+
+def test_compare_skips_failed_stages(tmp_path, capsys):
+    old = write_report(tmp_path / 'old.json', [stage_result('scan', 2.0, 100, 10.0, 0), stage_result('audio_checker_w1', 9.0, 100, 10.0, 0)])
+    new = write_report(tmp_path / 'new.json', [stage_result('scan', 1.0, 100, 10.0, 0), stage_result('audio_checker_w1', 0.1, 100, 10.0, 1)])
+    compare_reports(old, new)
+    lines = capsys.readouterr().out.splitlines()
+    scan = next(line for line in lines if ' scan ' in line)
+    checker = next(line for line in lines if 'audio_checker_w1' in line)
+    assert scan.split()[4] == '0.50'
+    assert 'skipped' in checker
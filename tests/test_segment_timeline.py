@@ -0,0 +1,48 @@
+import numpy as np
+from segment_timeline import OVERLAP_TOLERANCE, build_timeline, check_timeline
+
+
+def check(segment_tables):
+    return check_timeline(build_timeline(segment_tables), len(segment_tables))
+
+
+def test_clean_files_have_no_issues():
+    issues = check([([0.0, 1.0, 2.5], [1.0, 2.5, 4.0]), ([0.5], [2.0])])
+    assert not issues.negative.any() and not issues.overlapping.any() and not issues.out_of_order.any()
+    assert np.allclose(issues.covered_seconds, [4.0, 1.5])
+
+
+def test_negative_segments_are_flagged_and_not_counted():
+    issues = check([([0.0, 3.0], [1.0, 2.0]), ([0.0], [1.0])])
+    assert issues.negative.tolist() == [True, False]
+    assert not issues.overlapping.any()
+    assert np.allclose(issues.covered_seconds, [1.0, 1.0])
+
+
+def test_overlaps_beyond_the_tolerance_are_flagged_and_counted_once():
+    issues = check([
+        ([0.0, 1.5], [2.0, 3.0]),                       # overlaps by half a second
+        ([0.0, 1.0 - OVERLAP_TOLERANCE / 2], [1.0, 2.0]),  # within the rounding tolerance
+        ([0.0, 1.0, 3.0], [5.0, 2.0, 4.0]),             # nested in the first segment
+    ])
+    assert issues.overlapping.tolist() == [True, False, True]
+    assert np.allclose(issues.covered_seconds, [3.0, 2.0, 5.0])
+
+
+def test_out_of_order_rows_are_flagged_within_a_file_only():
+    issues = check([([2.0, 0.0], [3.0, 1.0]), ([5.0], [6.0]), ([0.0], [1.0])])
+    # file 2 starting before file 1 ended is not out of order
+    assert issues.out_of_order.tolist() == [True, False, False]
+    assert not issues.overlapping.any()
+    assert np.allclose(issues.covered_seconds, [2.0, 1.0, 1.0])
+
+
+def test_unparseable_times_are_left_out():
+    issues = check([(['0.0', 'x', '2.0'], ['1.0', '5.0', None]), ([], [])])
+    assert not issues.negative.any() and not issues.overlapping.any() and not issues.out_of_order.any()
+    assert np.allclose(issues.covered_seconds, [1.0, 0.0])
+
+
+def test_no_files():
+    issues = check([])
+    assert len(issues.negative) == len(issues.covered_seconds) == 0
@@ -0,0 +1,71 @@
+import argparse
+import pickle
+import random
+import pytest
+from shards import parse_shard, shard_of, shard_output_path, write_shard, open_shards, iter_merged_records
+
+COUNT = 4
+LOCATIONS = [f'State{i % 3}/District{i % 7}/{100000 + i}' for i in range(300)]
+
+
+def partial(position):
+    return {'durations': [position / 10], 'log_entries': {f'{LOCATIONS[position]}.wav': ['SPK-E13']}}
+
+
+def write_split(folder, count=COUNT, folders=len(LOCATIONS)):
+    folder.mkdir(exist_ok=True)
+    paths = []
+    for index in range(count):
+        positions = [position for position, location in enumerate(LOCATIONS) if shard_of(location, count) == index]
+        path = shard_output_path(str(folder), index, count)
+        write_shard(path, {'index': index, 'count': count, 'folders': folders, 'log_entries': {}},
+                    ((position, partial(position)) for position in positions))
+        paths.append(path)
+    return paths
+
+
+def test_partition_is_stable_and_complete():
+    shards = [shard_of(location, COUNT) for location in LOCATIONS]
+    assert shards == [shard_of(location, COUNT) for location in LOCATIONS]
+    assert set(shards) == set(range(COUNT))
+
+
+def test_merge_restores_batch_order(tmp_path):
+    paths = write_split(tmp_path)
+    random.Random(0).shuffle(paths)
+    headers = open_shards(paths)
+    assert [header['index'] for header in headers] == list(range(COUNT))
+    assert list(iter_merged_records(headers)) == [partial(position) for position in range(len(LOCATIONS))]
+
+
+def test_missing_or_repeated_shards_are_rejected(tmp_path):
+    paths = write_split(tmp_path)
+    with pytest.raises(ValueError, match=r'Missing shard outputs for shards \[2\]'):
+        open_shards(paths[:2] + paths[3:])
+    with pytest.raises(ValueError, match='given twice'):
+        open_shards(paths + paths[:1])
+
+
+def test_shards_of_different_listings_are_rejected(tmp_path):
+    paths = write_split(tmp_path / 'a')[:2] + write_split(tmp_path / 'b', folders=len(LOCATIONS) + 1)[2:]
+    with pytest.raises(ValueError, match='different split or listing'):
+        open_shards(paths)
+
+
+def test_other_pickles_are_rejected(tmp_path):
+    path = str(tmp_path / 'other.pkl')
+    with open(path, 'wb') as file:
+        pickle.dump({'index': 0, 'count': 1}, file)
+    with pytest.raises(ValueError, match='not a shard output'):
+        open_shards([path])
+
+
+@pytest.mark.parametrize('text, expected', [('0/1', (0, 1)), ('3/4', (3, 4))])
+def test_parse_shard(text, expected):
+    assert parse_shard(text) == expected
+
+
+@pytest.mark.parametrize('text', ['4/4', '-1/4', '1/0', '1', 'a/b'])
+def test_parse_shard_rejects(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(text)
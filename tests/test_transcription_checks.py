@@ -0,0 +1,113 @@
+import pandas as pd
+import transcription_checks
+from audio_segment_index import AudioSegmentIndex
+from transcription_checks import check_tsv_file, error_codes, validate_tsv_columns
+
+E3 = error_codes["The file does not have all column or not tab seperated."]
+E4 = error_codes["The file has a transcript with a newline or tab character."]
+E7 = error_codes["The file not following the format(transcriber <original_tsv_row> Transcription)"]
+
+
+def transcription_row(i, text=None, start=None):
+    start = float(i) if start is None else start
+    return [str(i), f'IMG_{i}.jpg', f'Bihar_Patna_1_{i}_IMG_{i}.wav', str(i), str(start), str(start + 0.5), text or f'text {i}']
+
+
+def write_tsv(path, rows):
+    path.write_text(''.join('\t'.join(row) + '\n' for row in rows), encoding='utf-8')
+    return str(path)
+
+
+def test_first_offending_rows_across_chunks(tmp_path):
+    rows = [transcription_row(i) for i in range(10)]
+    rows[3][0] = 'x'
+    rows[7][4] = 'late'
+    path = write_tsv(tmp_path / 'a.tsv', rows)
+    assert validate_tsv_columns(path, chunksize=2) == [(E7, 3)]
+
+
+def test_clean_file_has_no_findings(tmp_path):
+    path = write_tsv(tmp_path / 'a.tsv', [transcription_row(i) for i in range(5)])
+    assert validate_tsv_columns(path, chunksize=2) == []
+
+
+def test_wrong_column_count(tmp_path):
+    path = write_tsv(tmp_path / 'a.tsv', [row[:6] for row in (transcription_row(i) for i in range(3))])
+    assert validate_tsv_columns(path) == [(E3, None)]
+
+
+def test_rows_found_before_a_short_chunk_are_kept(tmp_path, monkeypatch):
+    first = pd.DataFrame([transcription_row(0), transcription_row(1)])
+    first.iloc[1, 0] = 'x'
+    short = pd.DataFrame([transcription_row(2)[:6]], index=[2])
+    monkeypatch.setattr(transcription_checks.pd, 'read_csv', lambda *args, **kwargs: iter([first, short]))
+    assert validate_tsv_columns('unused.tsv') == [(E7, 1), (E3, None)]
+
+
+def test_watch_rebuilds_the_audio_index_when_the_batch_changes(tmp_path, monkeypatch):
+    E8 = error_codes["The transcription references audio that is not in the audio batch."]
+    transcription_root = tmp_path / 'transcription'
+    (transcription_root / 'batch' / 'Patna').mkdir(parents=True)
+    write_tsv(transcription_root / 'batch' / 'Patna' / 'a.tsv', [transcription_row(i) for i in range(2)])
+    audio_folder = tmp_path / 'audio' / 'Bihar' / 'Patna' / '1'
+    audio_folder.mkdir(parents=True)
+
+    def add_audio(i):
+        stem = f'Bihar_Patna_1_{i}_IMG_{i}'
+        (audio_folder / f'{stem}.wav').write_bytes(b'')
+        write_tsv(audio_folder / f'{stem}.tsv', [['x', 'x', 'x', str(float(i)), str(i + 0.5)]])
+
+    output = tmp_path / 'result.tsv'
+    logs = []
+
+    def sleep(interval):
+        logs.append(pd.read_csv(output, sep='\t', dtype=str))
+        add_audio(1)
+
+    add_audio(0)
+    monkeypatch.setattr(transcription_checks.time, 'sleep', sleep)
+    transcription_checks.watch_root_folder(str(transcription_root), str(output), 0, cycles=2,
+                                           audio_root_folder=str(tmp_path / 'audio'))
+    assert logs[0][['filename', 'error', 'row']].values.tolist() == [['a.tsv', E8, '1']]
+    # The audio added after the first scan is joined against on the second
+    assert pd.read_csv(output, sep='\t').empty
+
+
+def test_check_tsv_file_reads_the_file_once(tmp_path, monkeypatch):
+    rows = [transcription_row(i) for i in range(6)]
+    rows[1][6] = 'नमस्ते'
+    rows[2][2] = 'Bihar_Patna_1_9_IMG_9.wav'
+    rows[3][5] = '9.0'
+    rows[4][6] = 'a\u200bb'
+    path = write_tsv(tmp_path / 'a.tsv', rows)
+    index = AudioSegmentIndex([transcription_row(i)[2] for i in range(6)], range(6), [i * 1000 for i in range(6)], [i * 1000 + 500 for i in range(6)], range(6))
+
+    reads = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(transcription_checks.pd, 'read_csv', lambda *args, **kwargs: reads.append(args) or read_csv(*args, **kwargs))
+    entries, coverage = check_tsv_file(path, index, check_charset=True)
+    assert len(reads) == 1
+    assert entries == [
+        ('a.tsv', error_codes["The transcription references audio that is not in the audio batch."], 2, None),
+        ('a.tsv', error_codes["The transcription segment bounds do not match any segment of the audio."], 3, None),
+        ('a.tsv', error_codes["The transcript has control or invisible formatting characters."], 4, 'U+200B x1 rows 4'),
+    ]
+    positions, wav_ids = coverage
+    assert sorted((index.keys[positions] >> 32).tolist()) == [0, 1, 4, 5]
+    assert sorted(wav_ids.tolist()) == [0, 1, 3, 4, 5]
+
+
+def test_charset_summary_goes_to_the_details_column(tmp_path):
+    rows = [transcription_row(i) for i in range(3)]
+    rows[2][6] = 'abc தமிழ்'
+    path = write_tsv(tmp_path / 'a.tsv', rows)
+    entries, _ = check_tsv_file(path, check_charset=True)
+    E11 = error_codes["The transcript has characters outside the script of its language."]
+    assert [entry[:3] for entry in entries] == [('a.tsv', E11, 2)]
+    assert entries[0][3].startswith('U+0BA4 x1 rows 2')
+
+    output = tmp_path / 'result.tsv'
+    transcription_checks.save_error_log(entries + [('b', error_codes["The folder is empty."])], str(output))
+    saved = pd.read_csv(output, sep='\t', dtype=str, keep_default_na=False)
+    assert saved.columns.tolist() == ['filename', 'error', 'row', 'details']
+    assert saved.values.tolist() == [['a.tsv', E11, '2', entries[0][3]], ['b', 'TRXN_E2', '', '']]
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from validation_api import CheckContext, check_file_names, validate_speaker_folder
+
+CONTEXT = CheckContext({'Bihar'}, {'Patna'})
+
+
+def make_speaker_folder(root, speaker, broken):
+    folder = root / 'Bihar' / 'Patna' / str(speaker)
+    folder.mkdir(parents=True)
+    (folder / f'Bihar_Patna_{speaker}.txt').write_text(f'Speaker_ID: {speaker}\n')
+    (folder / f'Bihar_Patna_{speaker}.pdf').write_bytes(b'')
+    for utt in range(3):
+        stem = f'Bihar_Patna_{speaker}_{"x" if broken and utt == 2 else utt}_Patna-IMG_{utt}'
+        (folder / f'{stem}.wav').write_bytes(b'')
+        (folder / f'{stem}.tsv').write_text(f'a\tb\tc\t0.0\t{utt + 1}.5\n')
+    return str(folder)
+
+
+def test_speaker_folders_can_be_checked_from_several_threads(tmp_path):
+    pytest.importorskip('speaker_metadata_checks')
+    paths = [make_speaker_folder(tmp_path, 100000 + i, broken=i % 2) for i in range(12)]
+    serial = [validate_speaker_folder(path, CONTEXT) for path in paths]
+    with ThreadPoolExecutor(6) as pool:
+        threaded = list(pool.map(lambda path: validate_speaker_folder(path, CONTEXT), paths * 3))
+    assert threaded == serial * 3
+
+    assert serial[0].findings == []
+    assert serial[0].details['speaker_ids_phase2'] == {'100000'}
+    assert sum(serial[0].details['durations']) == pytest.approx(7.5 / 3600)
+    broken_name = 'Bihar_Patna_100001_x_Patna-IMG_2.wav'
+    assert {finding for finding in serial[1].findings if finding.file == broken_name} == \
+        set(check_file_names([broken_name], CONTEXT).findings)
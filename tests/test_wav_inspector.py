@@ -0,0 +1,72 @@
+import struct
+import wave
+import pytest
+from wav_inspector import WavSpec, WavHeaderError, WAVE_FORMAT_EXTENSIBLE, inspect_wav, matches_spec
+
+
+def fmt_chunk(audio_format=1, channels=1, sample_rate=16000, bits_per_sample=16):
+    block_align = channels * bits_per_sample // 8
+    body = struct.pack('<HHIIHH', audio_format, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample)
+    return b'fmt ' + struct.pack('<I', len(body)) + body
+
+
+def riff(*chunks):
+    body = b'WAVE' + b''.join(chunks)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_matches_wave_module(tmp_path):
+    path = str(tmp_path / 'a.wav')
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(8000)
+        out.writeframes(b'\0' * 4 * 12000)
+    info = inspect_wav(path)
+    assert (info.channels, info.sample_rate, info.bits_per_sample) == (2, 8000, 16)
+    assert info.duration == pytest.approx(1.5)
+    assert not info.truncated
+    assert matches_spec(info, WavSpec(8000, 2, None))
+    assert not matches_spec(info, WavSpec(16000, None, None))
+
+
+def test_truncated_data_chunk(tmp_path):
+    data = b'data' + struct.pack('<I', 32000) + b'\0' * 16000
+    info = inspect_wav(write(tmp_path / 'a.wav', riff(fmt_chunk(), data)))
+    assert info.truncated
+    assert info.data_size == 16000
+    assert info.duration == pytest.approx(0.5)
+
+
+def test_odd_sized_chunk_is_padded(tmp_path):
+    odd = b'LIST' + struct.pack('<I', 3) + b'abc' + b'\0'
+    data = b'data' + struct.pack('<I', 32000) + b'\0' * 32000
+    info = inspect_wav(write(tmp_path / 'a.wav', riff(odd, fmt_chunk(), data)))
+    assert info.duration == pytest.approx(1.0)
+    assert info.data_offset == 12 + len(odd) + len(fmt_chunk()) + 8
+
+
+def test_extensible_format_is_pcm(tmp_path):
+    data = b'data' + struct.pack('<I', 4) + b'\0' * 4
+    info = inspect_wav(write(tmp_path / 'a.wav', riff(fmt_chunk(audio_format=WAVE_FORMAT_EXTENSIBLE), data)))
+    assert matches_spec(info, WavSpec(16000, 1, 16))
+    info = inspect_wav(write(tmp_path / 'b.wav', riff(fmt_chunk(audio_format=3), data)))
+    assert not matches_spec(info, WavSpec(None, None, None))
+
+
+@pytest.mark.parametrize('contents, message', [
+    (b'', 'empty'),
+    (b'RIFX\0\0\0\0WAVE', 'RIFF/WAVE'),
+    (riff(b'data' + struct.pack('<I', 4) + b'\0' * 4), 'before fmt'),
+    (riff(fmt_chunk()), 'no data chunk'),
+    (riff(b'fmt ' + struct.pack('<I', 8) + b'\0' * 8), 'too short'),
+    (riff(fmt_chunk(sample_rate=0), b'data' + struct.pack('<I', 0)), 'zero sample rate'),
+])
+def test_bad_headers(tmp_path, contents, message):
+    with pytest.raises(WavHeaderError, match=message):
+        inspect_wav(write(tmp_path / 'a.wav', contents))
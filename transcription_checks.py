@@ -3,9 +3,16 @@
 '''
 
 import os
+import numpy as np
 import pandas as pd
 import argparse
 import csv
+import time
+from multiprocessing import Pool
+import profiling
+from manifest import load_manifest, scan_tree
+import charset_rules
+from audio_segment_index import build_audio_segment_index, wav_basenames
 
 # Define error codes
 error_codes = {
@@ -16,46 +23,182 @@ error_codes = {
     "The file is completely empty.": "TRXN_E5",
     "The file is not tab-separated.": "TRXN_E6",
     "The file not following the format(transcriber <original_tsv_row> Transcription)": "TRXN_E7",
+    "The transcription references audio that is not in the audio batch.": "TRXN_E8",
+    "The transcription segment bounds do not match any segment of the audio.": "TRXN_E9",
+    "The audio has segments without a transcription.": "TRXN_E10",
+    "The transcript has characters outside the script of its language.": "TRXN_E11",
+    "The transcript has control or invisible formatting characters.": "TRXN_E12",
+    "The transcript has a zero-width joiner or non-joiner outside a word of its script.": "TRXN_E13",
 }
 
-def check_column_types(row):
-    try:
-        #print(row)
-        # Check if the first column is an integer
-        if not isinstance(int(row[0]), int):
-            return False
+# Code of each issue found by the character-set scan
+charset_codes = {
+    charset_rules.WRONG_SCRIPT: error_codes["The transcript has characters outside the script of its language."],
+    charset_rules.CONTROL_CHARACTER: error_codes["The transcript has control or invisible formatting characters."],
+    charset_rules.MISPLACED_JOINER: error_codes["The transcript has a zero-width joiner or non-joiner outside a word of its script."],
+}
 
-        # Check if the second column is a .jpg filename
-        # if not (isinstance(row[1], str) and row[1].endswith('.jpg')):
-        #     return False
+# Audio batch index and character-set option of the current pool worker (see init_worker)
+worker_audio_index = None
+worker_check_charset = False
 
-        # Check if the third column is a .wav filename
-        if not (isinstance(row[2], str) and row[2].endswith('.wav')):
-            return False
+def find_format_violations(chunk):
+    """Return a boolean mask of the rows that break the (transcriber <original_tsv_row> Transcription) layout.
 
-        # Check if the fourth column is an integer
-        if not isinstance(int(row[3]), int):
-            return False
+    Columns 1 and 4 must be numeric IDs, column 3 a .wav filename, columns 5
+    and 6 numeric start/end times and column 7 a non-empty transcript.
+    """
+    valid = (pd.to_numeric(chunk[0], errors='coerce').notna()
+             & chunk[2].str.endswith('.wav', na=False)
+             & pd.to_numeric(chunk[3], errors='coerce').notna()
+             & pd.to_numeric(chunk[4], errors='coerce').notna()
+             & pd.to_numeric(chunk[5], errors='coerce').notna()
+             & chunk[6].notna())
+    return ~valid
 
-        # Check if the fifth and sixth columns are floats or integers
-        if not (isinstance(float(row[4]), (float, int)) and isinstance(float(row[5]), (float, int))):
-            return False
+def find_transcripts_with_separators(chunk):
+    # Check for newline or tab characters in the 7th column
+    return chunk[6].str.contains('[\t\n]', na=False, regex=True)
 
-        # Check if the seventh column is a string
-        if not isinstance(row[6], str):
-            return False
+# Row checks of the transcription layout, in report order
+column_checks = [
+    (error_codes["The file not following the format(transcriber <original_tsv_row> Transcription)"], find_format_violations),
+    (error_codes["The file has a transcript with a newline or tab character."], find_transcripts_with_separators),
+]
 
-        return True
+# Row checks of the join against the audio batch, in report order
+audio_codes = [
+    error_codes["The transcription references audio that is not in the audio batch."],
+    error_codes["The transcription segment bounds do not match any segment of the audio."],
+]
+
+def read_tsv_chunks(file_path, chunksize=100000):
+    # Read the .tsv file without header, every cell as text
+    return pd.read_csv(file_path, sep='\t', header=None, dtype=str, chunksize=chunksize)
+
+def check_columns(chunk, first_rows):
+    """Record in first_rows the first offending row of every layout check not found yet."""
+    for code, check in column_checks:
+        if code not in first_rows:
+            offending = check(chunk)
+            if offending.any():
+                first_rows[code] = int(offending.idxmax())
+
+def cross_check_audio(chunk, audio_index, first_rows):
+    """Join the rows of a chunk against the audio batch index.
+
+    Records in first_rows the first row whose audio is not in the batch and
+    the first row whose start/end match no segment of its audio, and returns
+    the (segment positions, wav ids) of the index that the chunk covers.
+    """
+    missing, mismatched, matched, referenced = audio_index.match(chunk[2], chunk[4], chunk[5])
+    for code, offending in zip(audio_codes, (missing, mismatched)):
+        if code not in first_rows and offending.any():
+            first_rows[code] = int(chunk.index[offending.argmax()])
+    return matched, referenced
+
+def script_of_rows(wav_names):
+    """Return the script of every row, from the state and district that start its .wav name."""
+    parts = wav_basenames(wav_names).str.split('_', n=2)
+    pairs = parts.str[0].fillna('') + '_' + parts.str[1].fillna('')
+    return pairs.map({pair: charset_rules.script_for(*pair.split('_', 1)) for pair in pairs.unique()})
+
+def check_transcript_charset(chunk):
+    """Scan the transcripts of a chunk against the script of their language, which the wav name gives."""
+    return [charset_rules.scan_column(transcripts, script)
+            for script, transcripts in chunk[6].groupby(script_of_rows(chunk[2]), sort=False)]
+
+def check_tsv_chunks(chunks, audio_index=None, check_charset=False):
+    """Run every row check of a transcription TSV in one pass over its chunks.
+
+    Returns (results, coverage): (error_code, first_row, details) triples,
+    where first_row is the 0-based index of the first offending row (None for
+    file-level errors) and details is the summary of the offending codepoints
+    of the character-set issues (see charset_rules.describe), else None. With
+    an audio index coverage holds the (segment positions, wav ids) the file
+    covers. A chunk with the wrong number of columns ends the checks; the
+    layout rows found before it are still reported, the audio join and the
+    character-set scan are not.
+    """
+    first_rows = {}
+    positions, wav_ids, charset_parts = [], [], []
+    for chunk in chunks:
+        if chunk.shape[1] != 7:
+            found = [(code, first_rows[code], None) for code, _ in column_checks if code in first_rows]
+            return found + [(error_codes["The file does not have all column or not tab seperated."], None, None)], None
+
+        check_columns(chunk, first_rows)
+        if audio_index is not None:
+            matched, referenced = cross_check_audio(chunk, audio_index, first_rows)
+            positions.append(matched)
+            wav_ids.append(referenced)
+        if check_charset:
+            charset_parts.extend(check_transcript_charset(chunk))
+
+        # Later chunks cannot change the first offending rows once every code is found
+        if audio_index is None and not check_charset and all(code in first_rows for code, _ in column_checks):
+            break
+
+    codes = [code for code, _ in column_checks] + audio_codes
+    results = [(code, first_rows[code], None) for code in codes if code in first_rows]
+    issues = charset_rules.merge_issues(charset_parts)
+    results += [(charset_codes[issue], int(issues[issue][1].min()), charset_rules.describe(*issues[issue]))
+                for issue in charset_rules.ISSUES if issue in issues]
+    coverage = (np.concatenate(positions), np.concatenate(wav_ids)) if positions else None
+    return results, coverage
+
+def validate_tsv_columns(file_path, chunksize=100000):
+    """Validate the layout of a transcription TSV column-wise, streaming it in chunks.
+
+    Returns a list of (error_code, first_row) pairs, one per error code found
+    (see check_tsv_chunks).
+    """
+    results, _ = check_tsv_chunks(read_tsv_chunks(file_path, chunksize))
+    return [(code, row) for code, row, _ in results]
+
+def check_tsv_file(file_path, audio_index=None, check_charset=False):
+    """Return the error log entries of one .tsv file and, with an audio index, the segments it covers.
+
+    The file is read once; the layout checks, the join against the audio and
+    the character-set scan all work on the same chunks.
+    """
+    file = os.path.basename(file_path)
+    try:
+        results, coverage = check_tsv_chunks(read_tsv_chunks(file_path), audio_index, check_charset)
+        return [(file, code, row, details) for code, row, details in results], coverage
+    except pd.errors.EmptyDataError:
+        # Handle completely empty files
+        return [(file, error_codes["The file is completely empty."])], None
+    except Exception as e:
+        return [(file, f"Could not read the file. Error: {e}")], None
+
+def check_tsv_file_worker(file_path):
+    """Pool entry point for check_tsv_file; also hands back the worker's profile samples."""
+    entries, coverage = check_tsv_file(file_path, worker_audio_index, worker_check_charset)
+    return entries, coverage, profiling.drain() if profiling.enabled else None
+
+def init_worker(audio_index=None, check_charset=False):
+    global worker_audio_index, worker_check_charset
+    worker_audio_index = audio_index
+    worker_check_charset = check_charset
+    # A forked worker starts with a copy of the parent's samples; only report its own
+    profiling.drain()
+
+def check_tsv_files(root_folder, error_log, tree=None, tsv_results=None, audio_index=None, check_charset=False):
+    """Check the folders under root_folder and every .tsv file in them.
+
+    tsv_results, when given, yields the check_tsv_file() results of the .tsv
+    files in the order this walk reaches them (see process_all_subfolders).
+    The segments each file covers are marked as transcribed in audio_index.
+    """
+    if tree is None:
+        tree = scan_tree(root_folder)
 
-    except (ValueError, TypeError):
-        return False
-    
-def check_tsv_files(root_folder, error_log):
     # Dictionary to count the number of .tsv files in each folder
     tsv_file_count = {}
     
-    # Walk through the directory
-    for dirpath, dirnames, filenames in os.walk(root_folder):
+    # Walk through the directory listing
+    for dirpath, dirnames, filenames in tree.walk(root_folder):
         tsv_files = [file for file in filenames if file.endswith('.tsv')]
         
         if tsv_files:
@@ -66,72 +209,218 @@ def check_tsv_files(root_folder, error_log):
                 error_log.append((os.path.basename(dirpath), error_codes["The folder is empty."]))
         
         for file in tsv_files:
-            file_path = os.path.join(dirpath, file)
-            try:
-                # Read the .tsv file without header
-                df = pd.read_csv(file_path, sep='\t', header=None)
-
-                
-                if df.shape[1] != 7:
-                    error_log.append((file, error_codes["The file does not have all column or not tab seperated."]))
-                else:
-                    # Check each row for correct data types
-                    for i, row in df.iterrows():
-                        if not check_column_types(row):
-                            error_log.append((file, error_codes["The file not following the format(transcriber <original_tsv_row> Transcription)"]))
-                            break
-
-                    # Check for newline or tab characters in the 7th column
-                    transcripts = df.iloc[:, 6]  # 7th column by index (0-based)
-                    for i, transcript in enumerate(transcripts):
-                        if pd.isna(transcript):
-                            continue
-                        if '\n' in transcript or '\t' in transcript:
-                            error_log.append((file, error_codes["The file has a transcript with a newline or tab character."]))
-            except pd.errors.EmptyDataError:
-                # Handle completely empty files
-                error_log.append((file, error_codes["The file is completely empty."]))
-            except Exception as e:
-                error_log.append((file, f"Could not read the file. Error: {e}"))
+            if tsv_results is None:
+                entries, coverage = check_tsv_file(os.path.join(dirpath, file), audio_index, check_charset)
+            else:
+                entries, coverage = next(tsv_results)
+            error_log.extend(entries)
+            if coverage is not None:
+                audio_index.mark_transcribed(*coverage)
     
     # Check the number of .tsv files found in each folder
     for folder, count in tsv_file_count.items():
         if count != 1:
             error_log.append((os.path.basename(folder), error_codes["The folder contains multiple .tsv files."]))
 
-def process_all_subfolders(main_root_folder, error_log):
-    # Traverse the top-level directories in the main root folder
-    for directory in os.listdir(main_root_folder):
-        directory_path = os.path.join(main_root_folder, directory)
-        if os.path.isdir(directory_path):  # Check if it's a directory
-            # Process each subfolder within this top-level directory
-            for subdirectory in os.listdir(directory_path):
-                subdirectory_path = os.path.join(directory_path, subdirectory)
-                if os.path.isdir(subdirectory_path):  # Check if it's a directory
-                    check_tsv_files(subdirectory_path, error_log)
+def list_subfolders(main_root_folder, tree):
+    """Return the second-level subfolders of main_root_folder, which hold the .tsv files."""
+    return [os.path.join(main_root_folder, directory, subdirectory)
+            for directory in tree.subfolders() for subdirectory in tree.subfolders((directory,))]
+
+def list_tsv_paths(subfolders, tree):
+    """Return the .tsv files under subfolders in the order check_tsv_files() reaches them."""
+    return [os.path.join(dirpath, file) for subfolder in subfolders
+            for dirpath, dirnames, filenames in tree.walk(subfolder) for file in filenames if file.endswith('.tsv')]
+
+def iter_pool_results(pool, tsv_paths, workers):
+    chunksize = max(1, len(tsv_paths) // (workers * 16))
+    for entries, coverage, samples in pool.imap(check_tsv_file_worker, tsv_paths, chunksize=chunksize):
+        if samples is not None:
+            profiling.merge(samples)
+        yield entries, coverage
+
+def process_all_subfolders(main_root_folder, error_log, tree=None, workers=1, audio_index=None, check_charset=False):
+    """Check every second-level subfolder of main_root_folder.
+
+    The folders are listed once up front (or taken from a manifest tree). With
+    workers > 1 the .tsv files are validated in a process pool; imap returns
+    their results in walk order, so the error log is the same as a serial run.
+    """
+    if tree is None:
+        tree = scan_tree(main_root_folder)
+    subfolders = list_subfolders(main_root_folder, tree)
+
+    if workers <= 1:
+        for subfolder in subfolders:
+            check_tsv_files(subfolder, error_log, tree, audio_index=audio_index, check_charset=check_charset)
+        return
+
+    tsv_paths = list_tsv_paths(subfolders, tree)
+    with Pool(workers, initializer=init_worker, initargs=(audio_index, check_charset)) as pool:
+        tsv_results = iter_pool_results(pool, tsv_paths, workers)
+        for subfolder in subfolders:
+            check_tsv_files(subfolder, error_log, tree, tsv_results, audio_index)
+
+def report_untranscribed_segments(audio_index, error_log):
+    """Log the first untranscribed segment row of every audio the transcriptions reference.
+
+    Audio that no transcription references at all is left out; it belongs to
+    another transcription batch.
+    """
+    code = error_codes["The audio has segments without a transcription."]
+    error_log.extend((wav_name, code, row) for wav_name, row in audio_index.untranscribed())
+
+def check_tsv_paths(tsv_paths, workers=1, audio_index=None, check_charset=False):
+    """Return the check_tsv_file() results of tsv_paths in order, in a process pool with workers > 1."""
+    if workers <= 1 or len(tsv_paths) < 2:
+        return [check_tsv_file(file_path, audio_index, check_charset) for file_path in tsv_paths]
+    with Pool(workers, initializer=init_worker, initargs=(audio_index, check_charset)) as pool:
+        return list(iter_pool_results(pool, tsv_paths, workers))
+
+def tsv_version(file_path):
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def audio_listing_version(audio_tree):
+    """Return what build_audio_segment_index() reads: the .wav names and the version of every segment TSV."""
+    listing = []
+    for dirpath, dirnames, filenames in audio_tree.walk(audio_tree.root):
+        for name in filenames:
+            if name.endswith('.wav'):
+                listing.append(name)
+            elif name.endswith('.tsv'):
+                listing.append((name, tsv_version(os.path.join(dirpath, name))))
+    return listing
+
+def watch_root_folder(root_folder, output_file, interval, cycles=0, workers=1, audio_root_folder=None, check_charset=False):
+    """Check root_folder every interval seconds and rewrite output_file whenever the findings change.
+
+    Each scan lists the folders again. Only .tsv files that are new, or whose
+    size or mtime changed, are validated again; the results for the others
+    are kept in memory. With audio_root_folder the audio batch is listed again
+    too, and when a .wav or segment TSV was added, removed or changed the audio
+    index is rebuilt and every .tsv file is joined against it again. The
+    output is written to a temporary file and then renamed over output_file.
+    """
+    results = {}  # .tsv path -> ((size, mtime_ns), check_tsv_file() result)
+    audio_index = None
+    audio_version = None
+    previous_log = None
+    cycle = 0
+    while True:
+        if audio_root_folder:
+            audio_tree = scan_tree(audio_root_folder)
+            listing_version = audio_listing_version(audio_tree)
+            if listing_version != audio_version:
+                audio_index = build_audio_segment_index(audio_tree)
+                audio_version = listing_version
+                # The kept results were joined against the old index
+                results.clear()
+
+        tree = scan_tree(root_folder)
+        subfolders = list_subfolders(root_folder, tree)
+        tsv_paths = list_tsv_paths(subfolders, tree)
+        versions = {file_path: tsv_version(file_path) for file_path in tsv_paths}
+        for file_path in [file_path for file_path in results if file_path not in versions]:
+            del results[file_path]
+        stale = [file_path for file_path in tsv_paths if file_path not in results or results[file_path][0] != versions[file_path]]
+        for file_path, result in zip(stale, check_tsv_paths(stale, workers, audio_index, check_charset)):
+            results[file_path] = (versions[file_path], result)
+
+        # Rebuilding the log from the kept results only walks the listing, so the folder checks stay current too
+        error_log = []
+        if audio_index is not None:
+            audio_index.clear_coverage()
+        tsv_results = (results[file_path][1] for file_path in tsv_paths)
+        for subfolder in subfolders:
+            check_tsv_files(subfolder, error_log, tree, tsv_results, audio_index)
+        if audio_index is not None:
+            report_untranscribed_segments(audio_index, error_log)
+
+        if error_log != previous_log:
+            temp_file = output_file + '.tmp'
+            save_error_log(error_log, temp_file)
+            os.replace(temp_file, output_file)
+            previous_log = error_log
+            print(f"Checked {len(stale)} new or changed .tsv files; {len(error_log)} findings saved to {output_file}")
+
+        cycle += 1
+        if cycles and cycle >= cycles:
+            break
+        time.sleep(interval)
 
 def save_error_log(error_log, output_file):
     # Convert error log to DataFrame
-    error_df = pd.DataFrame(error_log, columns=["filename", "error"])
+    error_df = pd.DataFrame(error_log, columns=["filename", "error", "row", "details"])
+    error_df["row"] = error_df["row"].astype("Int64")
     # Save DataFrame to TSV file
     error_df.to_csv(output_file, sep='\t', index=False)
 
-def main(root_folder, output_file):
+# Functions timed by --profile
+PROFILED_CHECKS = ('check_columns', 'cross_check_audio', 'check_transcript_charset', 'check_tsv_chunks', 'check_tsv_file', 'check_tsv_files',
+                   'process_all_subfolders', 'scan_tree', 'build_audio_segment_index', 'save_error_log')
+
+def enable_profiling():
+    profiling.enable()
+    profiling.instrument(globals(), PROFILED_CHECKS, {'check_tsv_file': profiling.file_size})
+
+def main(root_folder, output_file, profile=False, manifest=None, workers=1, audio_root_folder=None, audio_manifest=None,
+         watch=False, watch_interval=60, watch_cycles=0, check_charset=False):
+    if profile:
+        enable_profiling()
+
     # Initialize error log
     error_log = []
 
-    # Process all subfolders and collect errors
-    process_all_subfolders(root_folder, error_log)
+    # Folder checks (TRXN_E1/E2) then only use the manifest; just the .tsv contents are read
+    tree = load_manifest(manifest, root_folder) if manifest else None
+
+    # Index the audio batch once (wav names -> segment bounds) to join the transcription rows against;
+    # --watch indexes it itself and rebuilds the index when the audio batch changes
+    audio_index = None
+    if audio_root_folder and not watch:
+        audio_tree = load_manifest(audio_manifest, audio_root_folder) if audio_manifest else scan_tree(audio_root_folder)
+        audio_index = build_audio_segment_index(audio_tree)
+
+    if watch:
+        try:
+            watch_root_folder(root_folder, output_file, watch_interval, watch_cycles, workers, audio_root_folder, check_charset)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+    else:
+        # Process all subfolders and collect errors
+        process_all_subfolders(root_folder, error_log, tree, workers, audio_index, check_charset)
+
+        if audio_index is not None:
+            report_untranscribed_segments(audio_index, error_log)
+
+        # Save errors to the output TSV file
+        save_error_log(error_log, output_file)
 
-    # Save errors to the output TSV file
-    save_error_log(error_log, output_file)
+    if profile:
+        profiling.write_report(os.path.splitext(output_file)[0] + '_profile')
 
 if __name__ == "__main__":
     # Argument parsing
     parser = argparse.ArgumentParser(description="Check .tsv files in subfolders and save errors to a TSV file.")
     parser.add_argument("root_folder", type=str, help="Root folder containing subfolders with .tsv files.")
     parser.add_argument("output_file", type=str, help="Output TSV file to save errors.")
+    parser.add_argument("--manifest", type=str, help="File list (path or path/size/mtime TSV, optionally gzipped) to use instead of walking root_folder.")
+    parser.add_argument("--audio_root_folder", type=str, help="Root folder of the audio batch the transcriptions belong to; rows are cross-checked against its segment TSVs.")
+    parser.add_argument("--audio_manifest", type=str, help="File list of the audio batch to use instead of walking audio_root_folder.")
+    parser.add_argument("--check_charset", action="store_true", help="Check transcripts for characters outside the script of their language (from the state/district of the .wav name), control characters and misplaced zero-width joiners.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes validating .tsv files in parallel.")
+    parser.add_argument("--watch", action="store_true", help="Keep running and rewrite output_file whenever new or changed .tsv files change the findings.")
+    parser.add_argument("--watch_interval", type=float, default=60, help="Seconds between two scans of root_folder with --watch.")
+    parser.add_argument("--watch_cycles", type=int, default=0, help="Stop --watch after this many scans (0 runs until interrupted).")
+    parser.add_argument("--profile", action="store_true", help="Time every check and write <output_file>_profile.json/.tsv")
     args = parser.parse_args()
+    if args.watch and (args.manifest or args.audio_manifest):
+        parser.error("--watch lists root_folder and audio_root_folder itself and cannot be combined with --manifest or --audio_manifest")
 
     # Call main function with parsed arguments
-    main(args.root_folder, args.output_file)
+    main(args.root_folder, args.output_file, args.profile, args.manifest, args.workers, args.audio_root_folder, args.audio_manifest,
+         args.watch, args.watch_interval, args.watch_cycles, args.check_charset)
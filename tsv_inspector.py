@@ -0,0 +1,72 @@
+"""One-read inspection of the segment TSVs in a speaker folder.
+
+Each TSV is read into a single buffer (memory-mapped once it is large) and
+everything the audio checks need is taken from that buffer: the trailing
+newline flag, the forbidden characters present, the parsed start/end
+columns used for the duration total and, when a script is given, the
+character-set issues found by charset_rules.
+"""
+
+import io
+import mmap
+import os
+from collections import namedtuple
+import pandas as pd
+from charset_rules import scan_buffer
+
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+# read_error is set when the file could not be opened or read, parse_error when
+# the buffer could not be turned into start/end columns. starts/ends are the
+# 4th and 5th TSV columns (segment start and end in seconds). charset_issues
+# is the scan_buffer() result, or None when no script was given.
+TsvInspection = namedtuple('TsvInspection', ['ends_with_newline', 'found_chars', 'starts', 'ends', 'read_error', 'parse_error',
+                                             'charset_issues'], defaults=(None,))
+
+
+def read_tsv_buffer(file_path):
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return file.read()
+
+
+def find_chars(buffer, chars):
+    return [char for char in chars if buffer.find(char.encode('utf-8')) != -1]
+
+
+def parse_segment_columns(buffer):
+    if isinstance(buffer, mmap.mmap):
+        buffer.seek(0)
+        df = pd.read_csv(buffer, sep='\t', header=None)
+    else:
+        df = pd.read_csv(io.BytesIO(buffer), sep='\t', header=None)
+
+    if df.empty:
+        raise ValueError("The file is empty")
+
+    return df.iloc[:, 3], df.iloc[:, 4]
+
+
+def inspect_tsv(file_path, unicode_chars, buffer=None, charset_script=None):
+    """Inspect file_path, or its contents when they were already read into buffer; charset_script also scans its characters."""
+    if buffer is None:
+        try:
+            buffer = read_tsv_buffer(file_path)
+        except Exception as e:
+            return TsvInspection(None, [], None, None, e, e)
+
+    try:
+        ends_with_newline = buffer[-1:] == b'\n'
+        found_chars = find_chars(buffer, unicode_chars)
+        charset_issues = scan_buffer(buffer, charset_script) if charset_script is not None else None
+        starts = ends = parse_error = None
+        try:
+            starts, ends = parse_segment_columns(buffer)
+        except Exception as e:
+            parse_error = e
+        return TsvInspection(ends_with_newline, found_chars, starts, ends, None, parse_error, charset_issues)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
@@ -0,0 +1,81 @@
+"""Library entry points to the Phase 2 checks, for services that validate deliveries as they arrive.
+
+The command-line checkers collect the findings of a whole batch and write report
+files at the end. These functions check one speaker folder, one
+transcription TSV or a list of file names and return a Result instead. The
+batch-wide checks (image catalog, Phase 1 repeats, total duration) are left
+to the checkers.
+
+Nothing heavy is imported up front: the checkers, and with them pandas (and
+openpyxl, through pandas), are loaded by the first call that needs them, so a
+worker that only runs check_file_names() never pays for them. Every call
+records into its own state, so the functions can be used from several
+threads.
+"""
+
+import os
+from collections import namedtuple
+from error_codes import ERROR_CODES
+from filename_grammar import parse_filename, name_rule_violations
+from folder_scanner import scan_speaker_folder
+
+# The context tuple of the audio checker: the state and district names of the
+# mapping file, the characters not allowed in segment TSVs, the expected
+# WavSpec (None skips the header checks), whether to fingerprint the audio,
+# whether to check the segment timelines and whether to check the characters
+# of the segment TSVs against the script of their language.
+CheckContext = namedtuple('CheckContext', ['states', 'districts', 'unicode_chars', 'wav_spec', 'fingerprint_audio', 'segment_timeline',
+                                           'check_charset'],
+                          defaults=((), (), ('\r',), None, False, False, False))
+
+# row is the 0-based row of the first offending TSV row where the check knows
+# it, else None, and a Finding's details the summary of the offending
+# codepoints of a character-set finding. A Result's details holds everything
+# else the check produced, such as the segment durations and speaker metadata
+# rows of a speaker folder.
+Finding = namedtuple('Finding', ['file', 'code', 'row', 'details'], defaults=(None,))
+Result = namedtuple('Result', ['path', 'findings', 'details'])
+
+
+def audio_checks():
+    import audio_all_checks_combined_S_V
+    return audio_all_checks_combined_S_V
+
+
+def load_context(txt_file_path, **options):
+    """Return a CheckContext with the states and districts of a state/district mapping file; options set the other fields."""
+    import pandas as pd
+    mapping = pd.read_csv(txt_file_path, sep='\t', header=None, names=['State', 'District'])
+    return CheckContext(set(mapping['State'].unique()), set(mapping['District'].unique()), **options)
+
+
+def speaker_folder_at(path):
+    """Scan the speaker folder at path, which is laid out as <state>/<district>/<speaker>."""
+    path = os.path.normpath(path)
+    district_path = os.path.dirname(path)
+    return scan_speaker_folder(os.path.basename(os.path.dirname(district_path)), os.path.basename(district_path),
+                               os.path.basename(path), path, district_path)
+
+
+def validate_speaker_folder(path, context=CheckContext()):
+    """Run the per-folder audio checks on the speaker folder at path."""
+    checks = audio_checks()
+    speaker_folder = speaker_folder_at(path)
+    partial = checks.validate_speaker_folder(speaker_folder, tuple(context))
+    findings = [Finding(file, code, None) for file, codes in partial.pop('log_entries').items() for code in codes]
+    return Result(path, findings, partial)
+
+
+def validate_transcription_tsv(path, audio_index=None, check_charset=False):
+    """Run the transcription TSV checks on one file, joining its rows against audio_index (an AudioSegmentIndex) if given."""
+    import transcription_checks
+    entries, coverage = transcription_checks.check_tsv_file(path, audio_index, check_charset)
+    findings = [Finding._make((entry + (None, None))[:4]) for entry in entries]
+    return Result(path, findings, {'coverage': coverage})
+
+
+def check_file_names(names, context=CheckContext()):
+    """Apply the naming rules to file names alone, without reading the disk or importing pandas."""
+    findings = [Finding(name, ERROR_CODES[rule], None) for name in names
+                for rule in name_rule_violations(parse_filename(name), context.states, context.districts)]
+    return Result(None, findings, {})
@@ -0,0 +1,78 @@
+"""Header-only inspection of .wav files.
+
+Only the RIFF, fmt and data chunk headers are read (through mmap, so just the
+pages holding them are touched); samples are never decoded. The true duration
+comes from the size of the data chunk actually present on disk.
+"""
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# truncated is set when the data chunk declares more bytes than the file holds;
+# duration is then based on the bytes that are present. data_offset is where
+# the samples start in the file.
+WavInfo = namedtuple('WavInfo', ['audio_format', 'channels', 'sample_rate', 'bits_per_sample', 'data_size', 'duration', 'truncated',
+                                 'data_offset'])
+
+# Expected format; a field left as None is not checked.
+WavSpec = namedtuple('WavSpec', ['sample_rate', 'channels', 'bits_per_sample'])
+
+
+class WavHeaderError(ValueError):
+    pass
+
+
+def parse_wav_header(buffer, file_size):
+    if file_size < 12 or buffer[0:4] != b'RIFF' or buffer[8:12] != b'WAVE':
+        raise WavHeaderError("not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= file_size:
+        chunk_id = buffer[offset:offset + 4]
+        chunk_size, = struct.unpack_from('<I', buffer, offset + 4)
+        body = offset + 8
+
+        if chunk_id == b'fmt ':
+            if chunk_size < 16 or body + 16 > file_size:
+                raise WavHeaderError("fmt chunk is too short")
+            fmt = struct.unpack_from('<HHIIHH', buffer, body)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise WavHeaderError("data chunk found before fmt chunk")
+            audio_format, channels, sample_rate, byte_rate, block_align, bits_per_sample = fmt
+            if sample_rate == 0 or block_align == 0:
+                raise WavHeaderError("fmt chunk has a zero sample rate or block size")
+            available = file_size - body
+            data_size = min(chunk_size, available)
+            duration = data_size / (sample_rate * block_align)
+            return WavInfo(audio_format, channels, sample_rate, bits_per_sample, data_size, duration, chunk_size > available, body)
+
+        # Chunks are word aligned
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise WavHeaderError("no fmt chunk found" if fmt is None else "no data chunk found")
+
+
+def inspect_wav(file_path):
+    with open(file_path, 'rb') as file:
+        file_size = os.fstat(file.fileno()).st_size
+        if file_size == 0:
+            raise WavHeaderError("the file is empty")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return parse_wav_header(buffer, file_size)
+
+
+def matches_spec(info, spec):
+    if info.audio_format not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE):
+        return False
+    for field in WavSpec._fields:
+        expected = getattr(spec, field)
+        if expected is not None and getattr(info, field) != expected:
+            return False
+    return True